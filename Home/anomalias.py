@@ -0,0 +1,210 @@
+import json
+import math
+import os
+from datetime import datetime
+
+import pandas as pd
+
+import diario
+import linhas
+import particoes
+
+# -----------------------------
+# Desgaste fora do padrão na TL
+# -----------------------------
+# Média e variância acumuladas (algoritmo de Welford) do Km/DIA e dos dias de
+# uso de cada bending e de cada posição, atualizadas a cada gravação só com as
+# linhas alteradas: incluir ou excluir uma movimentação custa O(1) por
+# estatística, sem reler o histórico. Cada movimentação encerrada é comparada
+# com as estatísticas do seu grupo *antes* de entrar nelas; com pelo menos
+# MINIMO_AMOSTRAS e |z| >= LIMITE_Z, vira alerta (ex.: cassete quebrado,
+# que até agora só aparecia pelos arranhões na tira).
+# O estado fica em data/anomalias/tl.json com a versão do TL.csv que resume
+# (como resumo.py): se o arquivo mudar por fora, o estado é refeito
+# reprocessando as movimentações em ordem de entrada, incluindo as já
+# arquivadas nas partições (arquivar não tira nada do histórico).
+REGISTRO = "tl"
+METRICAS = ("Km/DIA", "Dias de uso")
+GRUPOS = ("Codigo", "Posição")
+LIMITE_Z = 3.0
+MINIMO_AMOSTRAS = 5
+
+
+def _arquivo():
+    return os.path.join(linhas.pasta(), "anomalias", f"{REGISTRO}.json")
+
+
+class Welford:
+    """Média e variância de uma série, atualizadas um valor por vez (inclusão e remoção)."""
+
+    def __init__(self, n=0, media=0.0, m2=0.0):
+        self.n, self.media, self.m2 = n, media, m2
+
+    def incluir(self, x):
+        self.n += 1
+        delta = x - self.media
+        self.media += delta / self.n
+        self.m2 += delta * (x - self.media)
+
+    def remover(self, x):
+        if self.n <= 1:
+            self.n, self.media, self.m2 = 0, 0.0, 0.0
+            return
+        delta = x - self.media
+        self.media = (self.n * self.media - x) / (self.n - 1)
+        self.m2 = max(self.m2 - delta * (x - self.media), 0.0)
+        self.n -= 1
+
+    @property
+    def desvio(self):
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+    def z(self, x):
+        """Desvios-padrão de `x` em relação à série; None sem amostras suficientes."""
+        if self.n < MINIMO_AMOSTRAS or self.desvio == 0:
+            return None
+        return (x - self.media) / self.desvio
+
+    def lista(self):
+        return [self.n, self.media, self.m2]
+
+
+def _valores(linha):
+    # só movimentações encerradas: nas abertas os dias de uso ainda crescem todo dia
+    if not linha or not str(linha.get("Saída", "")).strip():
+        return {}
+    valores = {}
+    for metrica in METRICAS:
+        try:
+            x = float(linha.get(metrica, ""))
+        except (TypeError, ValueError):
+            continue
+        if math.isfinite(x) and x > 0:
+            valores[metrica] = x
+    return valores
+
+
+def _grupos(linha):
+    for grupo in GRUPOS:
+        valor = str(linha.get(grupo, "")).strip()
+        if valor and valor != "Nenhum":
+            yield grupo, valor
+
+
+class Detector:
+    """Estatísticas por (grupo, valor do grupo, métrica) e alertas em aberto."""
+
+    def __init__(self, estatisticas=None, alertas=None):
+        self.estatisticas = {k: Welford(*v) for k, v in (estatisticas or {}).items()}
+        self.alertas = alertas or []
+
+    def _serie(self, grupo, valor, metrica):
+        return self.estatisticas.setdefault(f"{grupo}|{valor}|{metrica}", Welford())
+
+    def remover(self, linha):
+        self.alertas = [a for a in self.alertas if a["ID"] != linha.get("ID")]
+        for metrica, x in _valores(linha).items():
+            for grupo, valor in _grupos(linha):
+                self._serie(grupo, valor, metrica).remover(x)
+
+    def incluir(self, linha):
+        """Compara a linha com o histórico do grupo e então a inclui. Retorna os alertas novos."""
+        novos = []
+        for metrica, x in _valores(linha).items():
+            for grupo, valor in _grupos(linha):
+                serie = self._serie(grupo, valor, metrica)
+                z = serie.z(x)
+                if z is not None and abs(z) >= LIMITE_Z:
+                    novos.append({
+                        "ID": linha.get("ID", ""), "Codigo": linha.get("Codigo", ""),
+                        "Posição": linha.get("Posição", ""), "Entrada": linha.get("Entrada", ""),
+                        "Saída": linha.get("Saída", ""), "métrica": metrica, "valor": x,
+                        "grupo": f"{grupo} {valor}", "média": round(serie.media, 2),
+                        "desvio": round(serie.desvio, 2), "z": round(z, 1),
+                        "detectado": datetime.now().strftime("%Y-%m-%d %H:%M"),
+                    })
+                serie.incluir(x)
+        self.alertas += novos
+        return novos
+
+    def estado(self, versao):
+        return {"versao": list(versao) if versao else None,
+                "estatisticas": {k: s.lista() for k, s in self.estatisticas.items()},
+                "alertas": self.alertas}
+
+
+def reconstruir(df):
+    """Detector a partir do registro inteiro, reprocessando as movimentações em ordem de entrada."""
+    detector = Detector()
+    if df.empty:
+        return detector
+    ordem = pd.to_datetime(df["Entrada"], format="%Y-%m-%d", errors="coerce").sort_values(kind="stable").index
+    for linha in df.loc[ordem].to_dict("records"):
+        detector.incluir(linha)
+    return detector
+
+
+def linhas_alteradas(anterior, novo, chave):
+    """[(linha antes, linha depois)] das linhas incluídas, editadas ou excluídas (dicts ou None)."""
+    entradas = diario.diferencas(anterior, novo, chave)
+    if not entradas:
+        return []
+    antes = anterior.drop_duplicates(chave, keep="last").set_index(chave, drop=False) if chave in anterior.columns else None
+    depois = novo.drop_duplicates(chave, keep="last").set_index(chave, drop=False)
+    pares = []
+    for op, c in entradas:
+        a = antes.loc[c["id"]].to_dict() if op != diario.INSERCAO else None
+        d = depois.loc[c["id"]].to_dict() if op != diario.EXCLUSAO else None
+        pares.append((a, d))
+    return pares
+
+
+def ler(versao):
+    """Estado gravado, ou None se não existir ou não for da `versao` atual do registro."""
+    try:
+        with open(_arquivo(), encoding="utf-8") as f:
+            estado = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return estado if estado.get("versao") == (list(versao) if versao else None) else None
+
+
+def _salvar(estado):
+    os.makedirs(os.path.dirname(_arquivo()), exist_ok=True)
+    tmp = _arquivo() + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(estado, f, ensure_ascii=False)
+    os.replace(tmp, _arquivo())
+
+
+def atualizar(df, alteracoes, versao_antes, versao_depois):
+    """
+    Chamado dentro da trava, depois de gravar `df`. Com `alteracoes`
+    ([(antes, depois)], ver linhas_alteradas) e o estado da versão anterior,
+    só essas linhas são tiradas e repostas nas estatísticas; caso contrário
+    o estado é refeito a partir de `df`. Retorna os alertas novos.
+    """
+    estado = ler(versao_antes) if alteracoes is not None else None
+    if estado is None:
+        arquivado = particoes.ler(REGISTRO)
+        if not arquivado.empty:
+            df = pd.concat([arquivado, df], ignore_index=True).fillna("").drop_duplicates("ID", keep="last")
+        detector = reconstruir(df)
+        _salvar(detector.estado(versao_depois))
+        return []
+    detector = Detector(estado["estatisticas"], estado["alertas"])
+    novos = []
+    for antes, depois in alteracoes:
+        if antes:
+            detector.remover(antes)
+        if depois:
+            novos += detector.incluir(depois)
+    _salvar(detector.estado(versao_depois))
+    return novos
+
+
+def descartar():
+    try:
+        os.remove(_arquivo())
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,200 @@
+import asyncio
+import uuid
+from datetime import datetime
+
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+import armazenamento
+import linha_tempo
+import linhas
+
+# -----------------------------
+# API HTTP/JSON dos registros
+# -----------------------------
+# Processo separado do Streamlit, sobre os mesmos arquivos de data/.
+# Executar a partir da raiz do projeto:
+#   uvicorn api:app --app-dir Home --port 8502
+#
+# GET  /registros                          -> registros disponíveis e versão atual
+# GET  /registros/{nome}/historico         -> histórico paginado (?pagina=&tamanho=&codigo=)
+# GET  /registros/{nome}/status            -> situação atual de cada código
+# POST /registros/{nome}                   -> inclui um novo lançamento (JSON)
+#
+# As respostas GET levam ETag derivado da versão do arquivo; um cliente que
+# reenvia If-None-Match recebe 304 sem que o arquivo seja lido.
+# Todas as rotas aceitam ?linha=<codigo> (linhas.py); sem ele, a linha padrão.
+
+TAMANHO_PADRAO = 50
+TAMANHO_MAXIMO = 500
+
+# DataFrames já lidos (arquivo quente + partições arquivadas), por linha e
+# registro: (versao, df). Todas as requisições compartilham a mesma leitura
+# enquanto o arquivo não muda.
+_frames = {}
+_travas = {(linha, nome): asyncio.Lock() for linha in linhas.codigos() for nome in armazenamento.REGISTROS}
+
+COLUNA_DATA = {"pote": "Entrada", "desengraxe": "Entrada", "tl": "Entrada", "banho": "Data_Inicio"}
+
+
+def _etag(versao):
+    return f'"{versao[2]}-{versao[0]:x}-{versao[1]:x}"' if versao else '"vazio"'
+
+
+def _frame(nome, versao):
+    chave = (linhas.atual(), nome)
+    em_cache = _frames.get(chave)
+    if em_cache and em_cache[0] == versao:
+        return em_cache[1]
+    df = armazenamento.com_arquivo(nome, armazenamento.ler_texto(nome))
+    _frames[chave] = (versao, df)
+    return df
+
+
+def _nao_modificado(request, etag):
+    return etag in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]
+
+
+def _json(conteudo, etag=None, status_code=200):
+    headers = {"ETag": etag, "Cache-Control": "no-cache"} if etag else None
+    return JSONResponse(conteudo, status_code=status_code, headers=headers)
+
+
+def _linha(request):
+    # vale para o resto da requisição, inclusive o que roda em run_in_threadpool (copia o contexto)
+    linha = request.query_params.get("linha", linhas.PADRAO)
+    if linha not in linhas.LINHAS:
+        return _json({"erro": f"linha desconhecida: {linha}"}, status_code=404)
+    linhas.definir(linha)
+    return None
+
+
+def _registro(request):
+    erro = _linha(request)
+    if erro:
+        return None, erro
+    nome = request.path_params["nome"]
+    if nome not in armazenamento.REGISTROS:
+        return None, _json({"erro": f"registro desconhecido: {nome}"}, status_code=404)
+    return nome, None
+
+
+# -----------------------------
+# Rotas
+# -----------------------------
+async def listar(request):
+    erro = _linha(request)
+    if erro:
+        return erro
+    return _json({
+        nome: {"arquivo": cfg["arquivo"], "chave": cfg["chave"], "etag": _etag(armazenamento.versao(nome))}
+        for nome, cfg in armazenamento.REGISTROS.items()
+    })
+
+
+async def historico(request):
+    nome, erro = _registro(request)
+    if erro:
+        return erro
+    versao = armazenamento.versao(nome)
+    etag = _etag(versao)
+    if _nao_modificado(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    try:
+        pagina = max(1, int(request.query_params.get("pagina", 1)))
+        tamanho = min(TAMANHO_MAXIMO, max(1, int(request.query_params.get("tamanho", TAMANHO_PADRAO))))
+    except ValueError:
+        return _json({"erro": "pagina e tamanho devem ser inteiros"}, status_code=400)
+
+    df = await run_in_threadpool(_frame, nome, versao)
+    codigo = request.query_params.get("codigo")
+    if codigo and "Codigo" in df.columns:
+        df = df[df["Codigo"] == codigo]
+    if COLUNA_DATA[nome] in df.columns:
+        df = df.sort_values(COLUNA_DATA[nome], ascending=False, kind="stable")
+
+    inicio = (pagina - 1) * tamanho
+    return _json({
+        "pagina": pagina,
+        "tamanho": tamanho,
+        "total": len(df),
+        "itens": df.iloc[inicio:inicio + tamanho].to_dict(orient="records"),
+    }, etag)
+
+
+def _status(nome, versao):
+    df = _frame(nome, versao)
+    if df.empty:  # arquivo ausente ou ainda sem lançamentos
+        return df
+    hoje = datetime.today().date()
+    if nome != "banho":
+        return linha_tempo.IndiceTemporal(df).em(hoje)
+    # equipamentos do banho: campanha vigente (ou a mais recente)
+    inicio = pd.to_datetime(df["Data_Inicio"], errors="coerce").dt.date
+    fim = pd.to_datetime(df["Data_Fim"], errors="coerce").dt.date
+    vigente = df[(inicio <= hoje) & (fim >= hoje)]
+    return vigente if not vigente.empty else df.loc[inicio.sort_values(kind="stable").index[-1:]]
+
+
+async def status(request):
+    nome, erro = _registro(request)
+    if erro:
+        return erro
+    versao = armazenamento.versao(nome)
+    etag = _etag(versao)
+    if _nao_modificado(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    atual = await run_in_threadpool(_status, nome, versao)
+    return _json({"itens": atual.to_dict(orient="records")}, etag)
+
+
+def _incluir(nome, dados, usuario):
+    armazenamento.garantir_ids(nome)
+    df = armazenamento.ler_texto(nome)
+    desconhecidas = set(dados) - set(df.columns)
+    if desconhecidas:
+        raise ValueError(f"colunas desconhecidas: {', '.join(sorted(desconhecidas))}")
+    if "Codigo" in df.columns and not str(dados.get("Codigo", "")).strip():
+        raise ValueError("Codigo é obrigatório")
+
+    novo = {c: "" for c in df.columns}
+    novo.update({c: "" if v is None else str(v) for c, v in dados.items()})
+    novo[armazenamento.chave(nome)] = str(uuid.uuid4())
+    if "Data_Registro" in novo and not novo["Data_Registro"]:
+        novo["Data_Registro"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    armazenamento.incluir(nome, novo, usuario=usuario)
+    return novo
+
+
+async def incluir(request):
+    nome, erro = _registro(request)
+    if erro:
+        return erro
+    try:
+        dados = await request.json()
+    except ValueError:
+        return _json({"erro": "corpo deve ser um objeto JSON"}, status_code=400)
+    if not isinstance(dados, dict):
+        return _json({"erro": "corpo deve ser um objeto JSON"}, status_code=400)
+    usuario = dados.pop("_usuario", "api")
+
+    # trava local evita ocupar várias threads esperando a trava de arquivo
+    async with _travas[(linhas.atual(), nome)]:
+        try:
+            novo = await run_in_threadpool(_incluir, nome, dados, usuario)
+        except ValueError as e:
+            return _json({"erro": str(e)}, status_code=400)
+    return _json(novo, _etag(armazenamento.versao(nome)), status_code=201)
+
+
+app = Starlette(routes=[
+    Route("/registros", listar),
+    Route("/registros/{nome}/historico", historico),
+    Route("/registros/{nome}/status", status),
+    Route("/registros/{nome}", incluir, methods=["POST"]),
+])
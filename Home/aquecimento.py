@@ -0,0 +1,102 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import armazenamento
+import imagens
+import indicadores
+import linhas
+import notificacao
+
+log = logging.getLogger(__name__)
+
+# -----------------------------
+# Aquecimento dos caches na subida do servidor
+# -----------------------------
+# Depois de reiniciar o container, o primeiro operador a abrir cada página
+# pagaria a leitura dos CSVs, a conversão das plantas e a montagem das figuras.
+# O aquecimento faz isso em paralelo, logo na subida do processo, para todas as
+# linhas, nos caches compartilhados pelas sessões:
+# - cópia em memória de cada registro (notificacao.espelho) e seu resumo;
+# - estado dos alertas de desgaste da TL;
+# - variantes WebP e tamanho das plantas dos mapas (imagens.py);
+# - dados derivados e figuras padrão das páginas (indicadores.PADRAO).
+# Começa antes da primeira sessão quando o servidor sobe por servidor.py
+# (deploy/iniciar_workers.sh); com `streamlit run`, na primeira execução de
+# qualquer página. Falhas só são anotadas: a página calcula quando precisar.
+TRABALHADORES = 4
+
+_trava = threading.Lock()
+_iniciado = False
+_tarefas = {}  # descrição -> "pendente" | "ok" | erro (repr)
+_inicio = None
+_fim = None
+
+
+def _lista():
+    tarefas = []
+    for linha in linhas.codigos():
+        for nome in armazenamento.REGISTROS:
+            tarefas.append((f"{linha}: registro {nome}", linha, _registro, (nome,)))
+        tarefas.append((f"{linha}: alertas de desgaste", linha, armazenamento.ler_anomalias, ()))
+        for nome, funcao in indicadores.PADRAO.items():
+            tarefas.append((f"{linha}: {nome}", linha, funcao, ()))
+    plantas = {cfg["imagem"] for linha in linhas.LINHAS.values() for cfg in linha["mapas"].values()}
+    for imagem in sorted(plantas):
+        tarefas.append((f"planta {imagem}", linhas.PADRAO, imagens.tamanho, (imagem,)))
+    return tarefas
+
+
+def _registro(nome):
+    if armazenamento.versao(nome) is None:  # linha sem esse registro ainda
+        return
+    notificacao.espelho(nome)
+    armazenamento.ler_resumo(nome)
+
+
+def _executar(descricao, linha, funcao, args):
+    try:
+        with linhas.usar(linha):
+            funcao(*args)
+        estado = "ok"
+    except Exception as e:
+        estado = repr(e)
+        log.exception("aquecimento %s", descricao)
+    with _trava:
+        _tarefas[descricao] = estado
+
+
+def _aquecer(tarefas):
+    global _fim
+    with ThreadPoolExecutor(max_workers=TRABALHADORES, thread_name_prefix="aquecimento") as pool:
+        for tarefa in tarefas:
+            pool.submit(_executar, *tarefa)
+    _fim = time.time()
+
+
+def iniciar():
+    """Inicia o aquecimento em segundo plano (uma vez por processo); não espera."""
+    global _iniciado, _inicio
+    with _trava:
+        if _iniciado:
+            return
+        _iniciado = True
+        tarefas = _lista()
+        _tarefas.update({descricao: "pendente" for descricao, *_ in tarefas})
+        _inicio = time.time()
+    threading.Thread(target=_aquecer, args=(tarefas,), daemon=True, name="aquecimento").start()
+
+
+def pronto():
+    with _trava:
+        return _iniciado and all(e != "pendente" for e in _tarefas.values())
+
+
+def progresso():
+    """{"feitas", "total", "erros": {descrição: erro}, "segundos"} do aquecimento deste processo."""
+    with _trava:
+        feitas = sum(e != "pendente" for e in _tarefas.values())
+        erros = {d: e for d, e in _tarefas.items() if e not in ("pendente", "ok")}
+        segundos = ((_fim or time.time()) - _inicio) if _inicio else 0.0
+        return {"feitas": feitas, "total": len(_tarefas), "erros": erros, "segundos": segundos}
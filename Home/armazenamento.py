@@ -0,0 +1,420 @@
+import os
+import io
+import logging
+import uuid
+from contextlib import contextmanager
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+import anomalias
+import diario
+import linhas
+import particoes
+import resumo
+import validacao
+
+log = logging.getLogger(__name__)
+
+# -----------------------------
+# Registros (arquivos de dados)
+# -----------------------------
+# Na pasta da linha em uso (linhas.pasta(); data/ na linha padrão).
+# nome do registro -> arquivo CSV e coluna usada como chave das linhas.
+# A chave é um UUID gerado na inclusão e nunca reaproveitado.
+REGISTROS = {
+    "pote": {"arquivo": "Movimentação_pote.csv", "chave": "ID"},
+    "desengraxe": {"arquivo": "Movimentação_desengraxe.csv", "chave": "ID"},
+    "tl": {"arquivo": "TL.csv", "chave": "ID"},
+    "banho": {"arquivo": "equipamentos_banho.csv", "chave": "ID"},
+}
+
+
+def caminho(nome):
+    return os.path.join(linhas.pasta(), REGISTROS[nome]["arquivo"])
+
+
+def chave(nome):
+    return REGISTROS[nome]["chave"]
+
+
+def versao(nome):
+    """
+    Identificador barato da versão do arquivo, usado como chave de cache.
+    Leva a linha: caches de linhas diferentes nunca se confundem.
+    """
+    try:
+        info = os.stat(caminho(nome))
+    except FileNotFoundError:
+        return None
+    return (info.st_mtime_ns, info.st_size, linhas.atual())
+
+
+def versao_com_arquivo(nome):
+    """versao() mais a das partições arquivadas: chave de cache do histórico completo."""
+    return (versao(nome), particoes.versao(nome))
+
+
+def disponivel():
+    """
+    False durante uma queda simulada: com IVG_SIMULAR_QUEDA apontando para um
+    arquivo, data/ é tratado como inacessível enquanto esse arquivo existir.
+    """
+    queda = os.environ.get("IVG_SIMULAR_QUEDA")
+    return not (queda and os.path.exists(queda))
+
+
+@contextmanager
+def trava(nome):
+    """
+    Trava exclusiva do registro entre processos (vários workers do Streamlit
+    e a API), mantida durante a leitura-alteração-gravação.
+    Levanta OSError se data/ estiver inacessível.
+    """
+    if not disponivel():
+        raise ConnectionError(f"data/ indisponível (queda simulada): {nome}")
+    os.makedirs(linhas.pasta(), exist_ok=True)
+    with open(caminho(nome) + ".lock", "a") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+# -----------------------------
+# Leitura
+# -----------------------------
+def _texto_para_df(texto):
+    return pd.read_csv(io.StringIO(texto), dtype=str).fillna("")
+
+
+def ler(nome, **kwargs):
+    """
+    Lê o registro (argumentos repassados ao pd.read_csv) guardando em
+    df.attrs["base"] a versão e o conteúdo lidos. gravar() usa essa base para
+    não desfazer gravações feitas por outros processos depois da leitura.
+    Linhas sem ID recebem um antes da leitura (ver garantir_ids()).
+    """
+    v = versao(nome)
+    with open(caminho(nome), encoding="utf-8") as f:
+        texto = f.read()
+    df = pd.read_csv(io.StringIO(texto), **kwargs)
+    if garantir_ids(nome, df):
+        return ler(nome, **kwargs)
+    df.attrs["base"] = (v, texto)
+    return df
+
+
+def indice(df, nome):
+    """ID -> rótulo da linha em `df`, para localizar a linha editada sem percorrer o DataFrame."""
+    return dict(zip(df[chave(nome)], df.index))
+
+
+# partições lidas uma vez por versão do manifesto e compartilhadas pelas leituras do histórico completo
+_arquivadas = {}  # (linha, nome) -> (particoes.versao, DataFrame)
+
+
+def arquivadas(nome):
+    """Todas as linhas arquivadas do registro, como strings. O DataFrame retornado não deve ser alterado."""
+    v = particoes.versao(nome)
+    if v is None:
+        return pd.DataFrame()
+    guardado = _arquivadas.get((linhas.atual(), nome))
+    if guardado is None or guardado[0] != v:
+        guardado = _arquivadas[(linhas.atual(), nome)] = (v, particoes.ler(nome))
+    return guardado[1]
+
+
+def com_arquivo(nome, quente):
+    """
+    `quente` (strings) precedido das linhas arquivadas: o histórico completo,
+    base de todo indicador. Linha nos dois (arquivamento interrompido no
+    meio) vale a do arquivo quente.
+    """
+    arquivado = arquivadas(nome)
+    if arquivado.empty:
+        return quente
+    return pd.concat([arquivado, quente], ignore_index=True).fillna("").drop_duplicates(chave(nome), keep="last")
+
+
+def ler_com_arquivo(nome):
+    """
+    Arquivo quente mais as partições arquivadas (particoes.py), como strings.
+    Só passa pela trava se faltar ID; sem data/ gravável, lê como está.
+    """
+    quente = ler_texto(nome)
+    if versao(nome) is not None and disponivel() and garantir_ids(nome, quente):
+        quente = ler_texto(nome)
+    return com_arquivo(nome, quente)
+
+
+def ler_resumo(nome):
+    """Indicadores do registro para a página inicial (ver resumo.py); None se o arquivo não existe."""
+    v = versao(nome)
+    if v is None:
+        return None
+    dados = resumo.ler(nome, v)
+    if dados is None:
+        # refeito fora da trava; só é guardado se o arquivo não mudou durante a leitura (e sem queda)
+        dados = resumo.calcular(nome, com_arquivo(nome, ler_texto(nome)))
+        if disponivel() and versao(nome) == v:
+            resumo.gravar(nome, dados, v)
+    return dados
+
+
+def ler_anomalias():
+    """Estatísticas e alertas de desgaste da TL (ver anomalias.py); None se o arquivo não existe."""
+    nome = anomalias.REGISTRO
+    if versao(nome) is None:
+        return None
+    estado = anomalias.ler(versao(nome))
+    if estado is None and not disponivel():  # idem a ler_resumo()
+        return anomalias.reconstruir(com_arquivo(nome, ler_texto(nome))).estado(versao(nome))
+    if estado is None:
+        with trava(nome):
+            anomalias.atualizar(ler_texto(nome), None, None, versao(nome))
+        estado = anomalias.ler(versao(nome))
+    return estado
+
+
+def ler_texto(nome):
+    """
+    Lê o registro com todas as colunas como string (vazio no lugar de NaN).
+    Usado para comparar versões sem depender da inferência de tipos do pandas.
+    """
+    if not os.path.exists(caminho(nome)):
+        return pd.DataFrame()
+    return pd.read_csv(caminho(nome), dtype=str).fillna("")
+
+
+# -----------------------------
+# Gravação
+# -----------------------------
+def _escrever(nome, df, alteracoes=None, registrado=False):
+    # arquivo temporário + os.replace: quem lê nunca vê um CSV pela metade
+    antes = versao(nome)
+    tmp = caminho(nome) + ".tmp"
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, caminho(nome))
+    # `registrado`: as entradas que acabaram de ir para o diário explicam esta versão (ver notificacao.espelho)
+    if registrado:
+        diario.marcar_versao(nome, antes, versao(nome))
+    # resumo da página inicial: só os rolos das linhas alteradas (sem `alteracoes`, refeito na leitura)
+    try:
+        if alteracoes is None:
+            resumo.descartar(nome)
+        else:
+            resumo.atualizar(nome, df, alteracoes, arquivadas(nome), antes, versao(nome))
+    except Exception:  # o dado já foi gravado; sem resumo, ler_resumo() recalcula
+        log.exception("resumo %s", nome)
+        resumo.descartar(nome)
+    # estatísticas de desgaste: só as linhas alteradas (sem `alteracoes`, refeitas a partir de df)
+    if nome == anomalias.REGISTRO:
+        try:
+            anomalias.atualizar(df, alteracoes, antes, versao(nome))
+        except Exception:  # idem: ler_anomalias() refaz o estado
+            log.exception("anomalias %s", nome)
+            anomalias.descartar()
+
+
+def gravar(nome, df, usuario="", registrar=True):
+    """
+    Salva o DataFrame do registro e, se `registrar`, lança no diário
+    as inserções, edições e exclusões em relação ao arquivo anterior.
+    Linhas incluídas ou editadas passam por validacao.conferir()
+    (levanta validacao.DadosInvalidos).
+
+    Se o arquivo mudou desde a leitura de `df` (df.attrs["base"], ver ler()),
+    só as alterações feitas em `df` são aplicadas sobre o conteúdo atual.
+    """
+    with trava(nome):
+        atual = ler_texto(nome)
+        base = df.attrs.get("base")
+        if base is not None and base[0] != versao(nome):
+            anterior, editado = _texto_para_df(base[1]), _texto_para_df(df.to_csv(index=False))
+            atual = _restaurar(nome, atual, _alteradas(nome, anterior, editado))
+            df = diario.mesclar(atual, anterior, editado, chave(nome))
+        novo = _conferir(nome, atual, _texto_para_df(df.to_csv(index=False)))
+        if registrar:
+            diario.registrar_diferencas(nome, atual, novo, chave(nome), usuario)
+        _escrever(nome, novo, _alteracoes(nome, atual, novo), registrado=registrar)
+
+
+def _conferir(nome, atual, novo):
+    # normaliza e valida só as linhas incluídas ou editadas; as demais ficam para reparar()
+    alteradas = {c["id"] for op, c in diario.diferencas(atual, novo, chave(nome)) if op != diario.EXCLUSAO}
+    linhas = novo[chave(nome)].isin(alteradas) if chave(nome) in novo.columns else None
+    return validacao.conferir(nome, novo, linhas, colunas_aceitas=atual.columns)
+
+
+def _alteradas(nome, anterior, novo):
+    # IDs editados ou excluídos de `anterior` para `novo`
+    return {c["id"] for op, c in diario.diferencas(anterior, novo, chave(nome)) if op != diario.INSERCAO}
+
+
+def _restaurar(nome, atual, ids):
+    """
+    Dentro da trava: as linhas de `ids` que estão só nas partições (arquivadas
+    depois de lidas pela página ou pela fila) voltam para o arquivo quente
+    antes de serem editadas, excluídas ou desfeitas. Como o arquivamento, não
+    passa pelo diário. Retorna o arquivo quente.
+    """
+    presentes = set(atual[chave(nome)]) if chave(nome) in atual.columns else set()
+    faltam = set(ids) - presentes
+    arquivado = arquivadas(nome) if faltam else pd.DataFrame()
+    if arquivado.empty:
+        return atual
+    voltam = arquivado[arquivado[chave(nome)].isin(faltam)]
+    if voltam.empty:
+        return atual
+    # arquivo quente antes das partições: uma interrupção no meio deixa a linha duplicada, nunca perdida
+    atual = pd.concat([atual, voltam], ignore_index=True).fillna("")
+    _escrever(nome, atual)
+    particoes.remover(nome, voltam, chave(nome))
+    return atual
+
+
+def _alteracoes(nome, atual, novo):
+    # pares (antes, depois) para quem acompanha linha a linha (resumo.py, anomalias.py)
+    return anomalias.linhas_alteradas(atual, novo, chave(nome))
+
+
+def incluir(nome, linha, usuario=""):
+    """Acrescenta uma linha lendo o arquivo dentro da trava (sem risco de sobrescrever outra inclusão)."""
+    with trava(nome):
+        atual = ler_texto(nome)
+        linha = validacao.conferir(nome, pd.DataFrame([linha]), colunas_aceitas=atual.columns)
+        novo = pd.concat([atual, linha], ignore_index=True).fillna("")
+        diario.registrar_diferencas(nome, atual, novo, chave(nome), usuario)
+        _escrever(nome, novo, [(None, novo.iloc[-1].to_dict())], registrado=True)
+
+
+def aplicar_alteracoes(nome, alteracoes, usuario=""):
+    """
+    Aplica alterações no formato de diario.diferencas() (lotes da fila.py)
+    de forma idempotente pelo ID: alteração já presente no arquivo é ignorada;
+    linha que não está mais como o lote esperava não é tocada e volta na lista
+    de conflitos [{"id", "operacao", "motivo"}]. O restante é gravado e lançado
+    no diário.
+    """
+    recusadas = []
+    with trava(nome):
+        atual = _restaurar(nome, ler_texto(nome), {c["id"] for op, c in alteracoes if op != diario.INSERCAO})
+        novo = atual
+        for op, c in alteracoes:
+            linhas = novo[novo[chave(nome)] == c["id"]] if chave(nome) in novo.columns else novo.iloc[:0]
+            linha = linhas.iloc[0].to_dict() if not linhas.empty else None
+
+            def igual(campos):
+                return all(linha.get(k, "") == v for k, v in campos.items())
+
+            if op == diario.INSERCAO:
+                if linha is None:
+                    novo = diario.aplicar(novo, {"op": op, "id": c["id"], "depois": c["d"]}, chave(nome))
+                elif not igual(c["d"]):
+                    recusadas.append({"id": c["id"], "operacao": "Inclusão", "motivo": "ID já existe com outro conteúdo"})
+            elif op == diario.EDICAO:
+                if linha is None:
+                    recusadas.append({"id": c["id"], "operacao": "Edição", "motivo": "linha excluída"})
+                elif igual(c["a"]):
+                    novo = diario.aplicar(novo, {"op": op, "id": c["id"], "depois": c["d"]}, chave(nome))
+                elif not igual(c["d"]):
+                    recusadas.append({"id": c["id"], "operacao": "Edição", "motivo": "linha alterada por outra gravação"})
+            elif linha is not None:
+                if igual(c["a"]):
+                    novo = diario.aplicar(novo, {"op": op, "id": c["id"], "depois": None}, chave(nome))
+                else:
+                    recusadas.append({"id": c["id"], "operacao": "Exclusão", "motivo": "linha alterada por outra gravação"})
+        novo = _conferir(nome, atual, novo)
+        diario.registrar_diferencas(nome, atual, novo, chave(nome), usuario)
+        _escrever(nome, novo, _alteracoes(nome, atual, novo), registrado=True)
+    return recusadas
+
+
+def garantir_ids(nome, df=None):
+    """
+    Preenche com UUID a chave das linhas que não têm uma (registros antigos ou
+    editados à mão). Se a coluna de chave ainda não existia, o diário anterior,
+    indexado por outra coluna, é arquivado. Retorna True se o arquivo mudou.
+    """
+    col = chave(nome)
+    if df is not None and col in df.columns and df[col].notna().all() and (df[col] != "").all():
+        return False
+    with trava(nome):
+        atual = ler_texto(nome)
+        if col in atual.columns and (atual[col] != "").all():
+            return False
+        if col not in atual.columns:
+            atual.insert(0, col, "")
+            diario.arquivar(nome)
+        vazios = atual[col] == ""
+        atual.loc[vazios, col] = [str(uuid.uuid4()) for _ in range(vazios.sum())]
+        _escrever(nome, atual)
+    return True
+
+
+def reparar(nome, usuario="reparo"):
+    """
+    Normaliza o arquivo inteiro segundo o esquema (valores e conjunto de
+    colunas, ver validacao.py), registrando as correções no diário.
+    Retorna (número de linhas corrigidas, problemas que restaram).
+    """
+    garantir_ids(nome)
+    with trava(nome):
+        atual = ler_texto(nome)
+        novo = validacao.normalizar(nome, atual, colunas=True)
+        corrigidas = diario.registrar_diferencas(nome, atual, novo, chave(nome), usuario)
+        _escrever(nome, novo, registrado=True)
+    return corrigidas, validacao.validar(nome, novo)
+
+
+def arquivar_antigos(nome, dias):
+    """
+    Move para as partições mensais (particoes.py) as linhas encerradas há
+    mais de `dias` dias, mantendo no arquivo quente a última de cada código
+    (ou de cada campanha, no banho). Não passa pelo diário: o diário continua
+    descrevendo o histórico completo, e os indicadores o leem com com_arquivo().
+    Só roda quando pedido (manutencao.py --arquivar ou IVG_ARQUIVAR=1).
+    Retorna o número de linhas arquivadas.
+    """
+    inicio, fim = particoes.COLUNAS[nome]
+    garantir_ids(nome)  # as partições são indexadas pela chave
+    with trava(nome):
+        atual = ler_texto(nome)
+        if atual.empty or fim not in atual.columns:
+            return 0
+        grupo = "Codigo" if "Codigo" in atual.columns else "Campanha"
+        encerramento = pd.to_datetime(atual[fim], format="%Y-%m-%d", errors="coerce")
+        ultimas = atual.sort_values(inicio, kind="stable").drop_duplicates(grupo, keep="last").index
+        antigos = (encerramento < pd.Timestamp.today().normalize() - pd.Timedelta(days=dias)) & ~atual.index.isin(ultimas)
+        if not antigos.any():
+            return 0
+        # partição antes do arquivo quente: uma interrupção no meio deixa a linha duplicada, nunca perdida
+        particoes.acrescentar(nome, atual[antigos], chave(nome))
+        _escrever(nome, atual[~antigos])
+    return int(antigos.sum())
+
+
+def desfazer(nome, seq, usuario=""):
+    """
+    Desfaz a alteração `seq` do diário aplicando a operação inversa
+    sobre o estado atual. A reversão também fica registrada no diário.
+    Retorna False se a alteração não puder ser desfeita.
+    """
+    entrada = diario.entrada(nome, seq)
+    with trava(nome):
+        atual = ler_texto(nome)
+        if entrada is not None:
+            atual = _restaurar(nome, atual, [entrada["id"]])
+        revertido = diario.aplicar_inverso(nome, atual, seq, chave(nome))
+        if revertido is None:
+            return False
+        diario.registrar_diferencas(nome, atual, revertido, chave(nome), usuario, desfaz=seq)
+        _escrever(nome, revertido, registrado=True)
+    return True
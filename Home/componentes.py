@@ -0,0 +1,366 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from datetime import date, datetime, time
+import tracemalloc
+
+import aquecimento
+import armazenamento
+import desgaste
+import diario
+import fila
+import instrumentacao
+import intervalos
+import linhas
+import memoria
+import notificacao
+import particoes
+import validacao
+
+# -----------------------------
+# Componentes compartilhados entre as páginas
+# -----------------------------
+def _trocar_linha():
+    st.session_state["linha"] = st.session_state["_linha"]
+
+
+def seletor_linha():
+    """
+    Linha de galvanização da sessão (linhas.py), chamado no início de cada
+    página, antes de qualquer leitura. Fica em st.session_state["linha"], que
+    sobrevive à troca de página, e na URL (?linha=) para favoritos. Com uma
+    linha só, nada aparece.
+    """
+    if st.session_state.get("linha") not in linhas.LINHAS:
+        pedida = st.query_params.get("linha")
+        st.session_state["linha"] = pedida if pedida in linhas.LINHAS else linhas.PADRAO
+    codigos = linhas.codigos()
+    if len(codigos) > 1:
+        st.sidebar.selectbox("🏭 Linha", codigos, index=codigos.index(st.session_state["linha"]),
+                             format_func=linhas.nome, key="_linha", on_change=_trocar_linha)
+        st.query_params["linha"] = st.session_state["linha"]
+
+
+def _legenda_aquecimento():
+    p = aquecimento.progresso()
+    if aquecimento.pronto():
+        st.caption(f"✅ Dados preparados ({p['total']} itens em {p['segundos']:.1f}s)")
+        if p["erros"]:
+            st.caption(f"⚠️ {len(p['erros'])} item(ns) não preparado(s); serão calculados quando usados.")
+    else:
+        st.progress(p["feitas"] / max(p["total"], 1),
+                    text=f"🔥 Preparando dados das páginas: {p['feitas']}/{p['total']}")
+
+
+@st.fragment(run_every=2)
+def _acompanhar_aquecimento():
+    _legenda_aquecimento()
+
+
+def indicador_aquecimento():
+    """Andamento do aquecimento dos caches (aquecimento.py) na barra lateral; acompanha até terminar."""
+    aquecimento.iniciar()
+    with st.sidebar:
+        if aquecimento.pronto():
+            _legenda_aquecimento()
+        else:
+            _acompanhar_aquecimento()
+
+
+def campo_operador():
+    st.sidebar.text_input("👷 Operador", key="operador", placeholder="Seu nome ou matrícula")
+
+
+def operador():
+    return st.session_state.get("operador", "")
+
+
+def painel_desfazer(nome):
+    """Lista as alterações recentes do registro com opção de desfazer e consulta por data."""
+    with st.expander("🕘 Alterações recentes / Desfazer"):
+        entradas = diario.recentes(nome)
+        if not entradas:
+            st.info("Nenhuma alteração registrada no diário ainda.")
+        for e in entradas:
+            quando = datetime.fromtimestamp(e["ts"]).strftime("%d/%m/%Y %H:%M")
+            descricao = f"**{diario.NOMES_OPERACAO[e['op']]}** · `{e['id']}` · {quando} · {e['usuario'] or 'anônimo'}"
+            if e["op"] == diario.EDICAO:
+                mudancas = ", ".join(f"{c}: '{e['antes'][c]}' → '{e['depois'][c]}'" for c in e["depois"])
+                descricao += f"  \n{mudancas}"
+            if e["desfaz"] is not None:
+                descricao += f"  \n↩️ reversão da alteração #{e['desfaz']}"
+
+            col_desc, col_botao = st.columns([5, 1])
+            col_desc.markdown(descricao)
+            if e["desfeita"]:
+                col_botao.caption("Desfeita")
+            elif e["desfaz"] is None and col_botao.button("↩️ Desfazer", key=f"desfazer_{nome}_{e['seq']}"):
+                if armazenamento.desfazer(nome, e["seq"], operador()):
+                    st.success("✅ Alteração desfeita.")
+                    st.rerun()
+                else:
+                    st.warning("⚠️ Não foi possível desfazer: o registro mudou depois dessa alteração.")
+
+        st.markdown("---")
+        st.markdown("**Consultar o registro como estava em uma data**")
+        col_data, col_hora = st.columns(2)
+        dia = col_data.date_input("Data", key=f"diario_data_{nome}")
+        hora = col_hora.time_input("Hora", value=time(23, 59), key=f"diario_hora_{nome}")
+        if st.button("🔎 Consultar", key=f"diario_consultar_{nome}"):
+            instante = datetime.combine(dia, hora).timestamp()
+            estado = diario.estado_em(nome, instante, armazenamento.chave(nome))
+            if estado is None:
+                st.info("O diário começou depois dessa data.")
+            else:
+                st.dataframe(estado, use_container_width=True)
+
+
+def avisar_fila():
+    st.toast("📴 Sem acesso aos dados: lançamento guardado na fila local; será enviado automaticamente.")
+
+
+def avisar_periodos(nome, df, linha):
+    """Confere só o grupo da linha recém-gravada (intervalos.conferir_linhas) e avisa se sobrepõe outra."""
+    for o in intervalos.conferir_linhas(nome, df, [linha]).itertuples():
+        fim = o.fim.strftime("%d/%m/%Y") if o.fim is not None and not pd.isna(o.fim) else "hoje"
+        st.toast(f"⚠️ Período sobreposto a outro registro ({o.grupo}): {o.inicio:%d/%m/%Y} a {fim}. "
+                 "Confira na página PERIODOS.")
+
+
+def alertas_desgaste():
+    """Alertas de desgaste em aberto da TL (anomalias.py), como conjunto de (ID, métrica, grupo)."""
+    estado = armazenamento.ler_anomalias() or {}
+    return {(a["ID"], a["métrica"], a["grupo"]) for a in estado.get("alertas", [])}
+
+
+def avisar_desgaste(anteriores):
+    """Avisa os alertas de desgaste que surgiram com a última gravação (não estavam em `anteriores`)."""
+    estado = armazenamento.ler_anomalias() or {}
+    for a in estado.get("alertas", []):
+        if (a["ID"], a["métrica"], a["grupo"]) not in anteriores:
+            st.toast(f"🚨 Bending {a['Codigo']} ({a['Posição']}): {a['métrica']} = {a['valor']:g}, "
+                     f"{a['z']:+.1f} desvios da média de {a['grupo']} ({a['média']:g}). Confira o equipamento.")
+
+
+def painel_fila():
+    """Gravações guardadas na fila local (fila.py) ainda não enviadas, e conflitos do reenvio."""
+    fila.iniciar()  # lotes deixados por uma execução anterior também são reenviados
+    pendentes, conflitos = fila.pendentes(), fila.conflitos()
+    if not pendentes and not conflitos:
+        return
+    with st.sidebar.expander(f"📴 Fila local ({len(pendentes)})", expanded=True):
+        if pendentes:
+            st.warning(f"{len(pendentes)} gravação(ões) aguardando acesso aos dados. "
+                       "Não feche o terminal; o envio é automático.")
+            if st.button("Enviar agora", key="fila_enviar"):
+                fila.enviar(forcar=True)
+                st.rerun()
+        for lote in conflitos:
+            st.error(f"Conflito ({lote['registro']}, {lote['usuario'] or 'anônimo'}): "
+                     + "; ".join(c["motivo"] for c in lote["conflitos"]))
+
+
+def painel_diagnostico():
+    """
+    Chamado ao fim de cada página: contabiliza a memória da sessão
+    (memoria.py). Tempos das seções e memória das sessões ficam num painel
+    oculto, aberto com ?diag=1 na URL.
+    """
+    descartadas = memoria.contabilizar(instrumentacao.pagina_atual())
+    if st.query_params.get("diag") != "1":
+        return
+    with st.sidebar.expander("🩺 Diagnóstico", expanded=True):
+        ultima = instrumentacao.medicoes(execucao=instrumentacao.execucao_atual())
+        st.markdown("**Última execução**")
+        if ultima:
+            tabela = pd.DataFrame(ultima)[["secao", "etapa", "segundos"]]
+            tabela["ms"] = (tabela.pop("segundos") * 1000).round(1)
+            st.dataframe(tabela, use_container_width=True, hide_index=True)
+
+        st.markdown("**Acumulado do processo**")
+        st.dataframe(pd.DataFrame(instrumentacao.resumo()), use_container_width=True, hide_index=True)
+        falhas = instrumentacao.falhas()
+        if falhas:
+            st.markdown("**Falhas em segundo plano**")
+            st.dataframe(pd.DataFrame(falhas), use_container_width=True, hide_index=True)
+
+        st.download_button("⬇️ JSON", instrumentacao.como_json(), "medicoes.json", "application/json")
+        st.download_button("⬇️ Prometheus", instrumentacao.como_prometheus(), "metricas.prom", "text/plain")
+
+    with st.sidebar.expander("🧠 Memória", expanded=True):
+        processo = memoria.rss()
+        residente = f"Processo: {processo / 1024 / 1024:.0f} MB residentes · " if processo else ""
+        st.caption(f"{residente}orçamento por sessão: {memoria.ORCAMENTO_MB:g} MB · "
+                   f"ociosa após {memoria.OCIOSA_MINUTOS:g} min")
+        if descartadas:
+            st.caption(f"Descartadas nesta execução: {', '.join(descartadas)}")
+        st.markdown("**Sessões deste processo**")
+        st.dataframe(pd.DataFrame(memoria.sessoes()), use_container_width=True, hide_index=True)
+
+        st.markdown("**Alocações (tracemalloc)**")
+        if not tracemalloc.is_tracing():
+            if st.button("Ativar tracemalloc", key="diag_tracemalloc"):
+                memoria.ativar()
+                st.rerun()
+            return
+        atual, pico = tracemalloc.get_traced_memory()
+        st.caption(f"Rastreado: {atual / 1024 / 1024:.1f} MB (pico {pico / 1024 / 1024:.1f} MB)")
+        col1, col2 = st.columns(2)
+        if col1.button("📸 Snapshot", key="diag_snapshot"):
+            memoria.snapshot()
+        if col2.button("Desativar", key="diag_tracemalloc_off"):
+            memoria.desativar()
+            st.rerun()
+        agrupar = st.radio("Agrupar por", ["lineno", "filename"], horizontal=True, key="diag_agrupar",
+                           format_func={"lineno": "linha", "filename": "arquivo"}.get)
+        maiores = memoria.maiores(agrupar=agrupar)
+        if maiores:
+            st.dataframe(pd.DataFrame(maiores), use_container_width=True, hide_index=True)
+        else:
+            st.caption("Tire um snapshot; a partir do segundo, aparece a variação entre eles.")
+
+
+def mostrar_problemas(erro):
+    """Mostra por que uma gravação foi recusada (validacao.DadosInvalidos)."""
+    st.error("❌ Dados não gravados: corrija os campos abaixo.")
+    st.dataframe(erro.problemas, use_container_width=True, hide_index=True)
+
+
+@st.cache_data(max_entries=linhas.por_linha(4))
+def _arquivadas(nome, versao, inicio, fim):
+    return particoes.ler(nome, inicio, fim)
+
+
+def filtro_periodo(nome, df, coluna=None, key=None, rotulo="Período (data de entrada)"):
+    """
+    Filtro de período dos históricos pela data de início (particoes.COLUNAS).
+    `df` tem só o arquivo quente; se o início escolhido for anterior a ele,
+    somam-se apenas as partições arquivadas que cruzam o período.
+    Linhas sem data válida continuam aparecendo, inclusive as arquivadas.
+    """
+    coluna = coluna or particoes.COLUNAS[nome][0]
+    datas = pd.to_datetime(df[coluna], errors="coerce")
+    hoje = date.today()
+    inicio_quente = datas.min().date() if datas.notna().any() else hoje
+    fim_quente = max(hoje, datas.max().date()) if datas.notna().any() else hoje
+    inicio_arquivo = particoes.inicio(nome)
+    minimo = min(inicio_arquivo, inicio_quente) if inicio_arquivo else inicio_quente
+    periodo = st.date_input(rotulo, value=(inicio_quente, fim_quente), min_value=minimo, key=key)
+    if len(periodo) != 2:
+        return df
+    inicio, fim = periodo
+    if (inicio_arquivo and inicio < inicio_quente) or particoes.tem_sem_data(nome):
+        arquivadas = _arquivadas(nome, particoes.versao(nome), inicio, fim).copy()
+        # partições são lidas como texto; numéricas voltam ao tipo do arquivo quente
+        for col in df.select_dtypes("number").columns.intersection(arquivadas.columns):
+            arquivadas[col] = pd.to_numeric(arquivadas[col], errors="coerce")
+        df = pd.concat([arquivadas, df], ignore_index=True).drop_duplicates(armazenamento.chave(nome), keep="last")
+        datas = pd.to_datetime(df[coluna], errors="coerce")
+    return df[datas.isna() | ((datas.dt.date >= inicio) & (datas.dt.date <= fim))]
+
+
+def recarregar_com_aviso(mensagem, tipo="success"):
+    """
+    Recarrega a página inteira (não só o fragmento atual) mostrando `mensagem`
+    na próxima execução. Usado após gravações feitas dentro de fragmentos,
+    para que as outras abas vejam os dados novos.
+    """
+    st.session_state["_aviso"] = (tipo, mensagem)
+    st.rerun()
+
+
+def mostrar_aviso():
+    if "_aviso" in st.session_state:
+        tipo, mensagem = st.session_state.pop("_aviso")
+        getattr(st, tipo)(mensagem)
+
+
+def legenda_atualizacao(nome):
+    """Legenda das telas que se atualizam sozinhas, com o horário dos dados exibidos."""
+    # atualização automática: a tela segue aberta, mas não conta como interação
+    memoria.contabilizar(interacao=False)
+    chave = f"_visto_{nome}"
+    n = notificacao.contador(nome)
+    if st.session_state.get(chave, (None,))[0] != n:
+        st.session_state[chave] = (n, datetime.now().strftime("%H:%M:%S"))
+    st.caption(f"🔄 Atualização automática a cada {notificacao.INTERVALO}s · dados de {st.session_state[chave][1]}")
+
+
+def legenda_recalculo(atual):
+    """Avisa quando o resultado exibido é o anterior e o novo está sendo calculado (derivados.py)."""
+    if not atual:
+        st.caption("⏳ Recalculando com os dados mais recentes; exibindo o último resultado.")
+
+
+@st.cache_data(max_entries=linhas.por_linha(4))
+def _analise_desgaste(versao, diametro_minimo):
+    return desgaste.analisar(desgaste.carregar_medicoes(), diametro_minimo)
+
+
+def aba_desgaste(codigos):
+    """Lançamento dos perfis de diâmetro (m1..m5) e análise de desgaste dos rolos."""
+    st.header("📐 Medições e desgaste")
+
+    with st.form("form_medicao", clear_on_submit=True):
+        col1, col2, col3 = st.columns(3)
+        rolo = col1.selectbox("Rolo", sorted(codigos), accept_new_options=True)
+        data_medicao = col2.date_input("Data da medição")
+        certificado = col3.text_input("Certificado")
+        st.markdown("Diâmetros (mm), de uma ponta à outra do rolo:")
+        cols = st.columns(len(desgaste.PONTOS))
+        medidas = {m: c.number_input(m.upper(), min_value=0.0, value=None, format="%.2f")
+                   for m, c in zip(desgaste.PONTOS, cols)}
+        motivo = st.text_input("Motivo / serviço")
+        enviar = st.form_submit_button("💾 Registrar medição")
+
+    if enviar:
+        if not rolo or all(v is None for v in medidas.values()):
+            st.warning("⚠️ Informe o rolo e pelo menos um ponto de medição.")
+        else:
+            try:
+                desgaste.registrar_medicoes([{
+                    "rolo_id": rolo, "data_entrada": data_medicao.strftime("%Y-%m-%d"),
+                    "motivo_saida": motivo, "certificado": certificado, **medidas,
+                }])
+                st.success(f"✅ Medição do rolo {rolo} registrada.")
+            except validacao.DadosInvalidos as e:
+                mostrar_problemas(e)
+
+    with st.expander("📥 Importar medições em lote (CSV)"):
+        st.caption("Colunas: rolo_id, data_entrada, m1, m2, m3, m4, m5 e, opcionais, certificado, motivo_saida, posicao.")
+        arquivo = st.file_uploader("Arquivo CSV", type="csv", key="upload_medicoes")
+        if arquivo is not None and st.button("Importar", key="importar_medicoes"):
+            lote = pd.read_csv(arquivo, dtype=str)
+            faltando = {"rolo_id", "data_entrada"} - set(lote.columns)
+            if faltando:
+                st.error(f"❌ Colunas obrigatórias ausentes: {', '.join(sorted(faltando))}")
+            else:
+                try:
+                    n = desgaste.registrar_medicoes(lote.to_dict(orient="records"))
+                    st.success(f"✅ {n} medições importadas.")
+                except validacao.DadosInvalidos as e:
+                    mostrar_problemas(e)
+
+    st.markdown("---")
+    diametro_minimo = st.number_input("Diâmetro mínimo de operação (mm)", value=desgaste.DIAMETRO_MINIMO, step=1.0)
+    perfis, rolos = _analise_desgaste(desgaste.versao(), diametro_minimo)
+    if perfis.empty:
+        st.info("Nenhuma medição registrada ainda.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Rolos medidos", len(rolos))
+    col2.metric("Rolos em alerta", int(rolos["alerta"].sum()))
+    col3.metric("Desgaste médio (mm/mês)", f"{-rolos['taxa_mm_dia'].mean() * 30:.2f}" if rolos["taxa_mm_dia"].notna().any() else "—")
+
+    st.subheader("⚠️ Situação por rolo")
+    st.dataframe(rolos, use_container_width=True, hide_index=True)
+
+    fig = px.line(perfis, x="data", y="minimo", color="rolo_id", markers=True,
+                  title="Diâmetro mínimo do perfil por medição")
+    fig.add_hline(y=diametro_minimo, line_dash="dot", line_color="red", annotation_text="Mínimo de operação")
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.subheader("📏 Perfis medidos")
+    st.dataframe(perfis[["rolo_id", "data_entrada", *desgaste.PONTOS, "media", "minimo", "conicidade", "coroa", "certificado"]]
+                 .sort_values("data_entrada", ascending=False), use_container_width=True, hide_index=True)
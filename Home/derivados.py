@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import instrumentacao
+import linhas
+
+# -----------------------------
+# Dados derivados recalculados em segundo plano
+# -----------------------------
+# Colunas calculadas, rankings, médias e figuras montadas a partir dos
+# registros ficam guardados aqui, um resultado por (linha, nome, argumentos),
+# junto com a versão dos dados de que vieram. Quando a versão muda, a página
+# recebe na hora o último resultado calculado e o novo é montado em uma
+# thread do pool ("stale-while-revalidate"); a próxima execução da página já
+# o encontra pronto. Só na primeira vez (sem resultado anterior) a página
+# espera o cálculo.
+# Se várias sessões pedem o mesmo resultado ao mesmo tempo, um único cálculo
+# é feito e todas esperam por ele.
+# As funções rodam fora da execução da página: não podem usar st.* nem a
+# sessão, e recebem a linha em uso via linhas.usar().
+# Um cálculo que falha fica registrado em instrumentacao.falhas(); a página
+# recebe o último valor bom (ou None) e a mesma versão só é tentada de novo
+# depois de ESPERA_FALHA segundos.
+TRABALHADORES = 2
+MAXIMO = 64  # resultados guardados (os menos usados saem primeiro)
+ESPERA_FALHA = 60
+
+_pool = ThreadPoolExecutor(max_workers=TRABALHADORES, thread_name_prefix="derivados")
+_trava = threading.Lock()
+_entradas = OrderedDict()  # chave -> {"versao", "valor", "futuro", "falhou"}
+
+
+def _calcular(chave, versao, linha, funcao, args):
+    try:
+        with linhas.usar(linha):
+            valor = funcao(*args)
+    except Exception as e:
+        with _trava:
+            if chave in _entradas:
+                _entradas[chave]["falhou"] = (versao, time.time())
+        instrumentacao.registrar_falha(f"derivados {chave[1]}", e)
+        return None
+    with _trava:
+        entrada = _entradas.setdefault(chave, {"futuro": None})
+        entrada.update(versao=versao, valor=valor, falhou=None)
+    return valor
+
+
+def _pendente(entrada):
+    return entrada["futuro"] is not None and not entrada["futuro"].done()
+
+
+def _em_espera(entrada, versao):
+    # a versão que falhou não é recalculada a cada execução: só quando os dados mudarem ou depois da espera
+    falhou = entrada.get("falhou")
+    return falhou is not None and falhou[0] == versao and time.time() < falhou[1] + ESPERA_FALHA
+
+
+def obter(nome, versao, funcao, *args, esperar=True):
+    """
+    Resultado de funcao(*args) para a `versao` dos dados, como (valor, atual).
+    Com a versão guardada igual a `versao`, devolve (valor, True). Senão agenda
+    o recálculo (se ainda não houver um em andamento) e devolve o último valor
+    com atual=False. Sem valor anterior, espera o cálculo; com esperar=False,
+    ou se o cálculo falhar, devolve (None, False). `args` precisam ser hashable: fazem parte da chave.
+    """
+    linha = linhas.atual()
+    chave = (linha, nome, args)
+    with _trava:
+        entrada = _entradas.get(chave)
+        if entrada is not None:
+            _entradas.move_to_end(chave)
+            if "valor" in entrada and entrada["versao"] == versao:
+                return entrada["valor"], True
+        else:
+            entrada = _entradas[chave] = {"futuro": None, "falhou": None}
+            while len(_entradas) > MAXIMO:
+                _entradas.popitem(last=False)
+        if not _pendente(entrada) and not _em_espera(entrada, versao):
+            entrada["futuro"] = _pool.submit(_calcular, chave, versao, linha, funcao, args)
+        futuro = entrada["futuro"]
+        if "valor" in entrada:
+            return entrada["valor"], False
+    if not esperar or futuro is None:
+        return None, False
+    futuro.result()
+    with _trava:
+        # o cálculo em andamento pode ter sido de uma versão anterior, ou ter falhado
+        entrada = _entradas.get(chave, {})
+        return entrada.get("valor"), "valor" in entrada and entrada["versao"] == versao
+
+
+def recalculando(nome=None):
+    """True se há recálculo em andamento (do `nome`, ou qualquer um) na linha em uso."""
+    linha = linhas.atual()
+    with _trava:
+        return any(_pendente(e) for (l, n, _), e in _entradas.items()
+                   if l == linha and (nome is None or n == nome))
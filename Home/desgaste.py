@@ -0,0 +1,187 @@
+import os
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import linhas
+import validacao
+
+# -----------------------------
+# Medições de diâmetro (rolls.db / tabela historico)
+# -----------------------------
+# Cada visita do rolo à oficina grava um perfil de 5 pontos (m1..m5, de uma
+# ponta à outra do rolo) e o certificado de medição. Um banco por linha
+# (linhas.banco(); o da linha padrão continua em rolls.db, na raiz).
+PONTOS = ["m1", "m2", "m3", "m4", "m5"]
+
+DIAMETRO_MINIMO = 570.0   # mm, abaixo disso o rolo não volta para a linha
+MARGEM_ALERTA = 5.0       # mm acima do mínimo que já geram alerta
+HORIZONTE_ALERTA = 60     # dias previstos até o mínimo que já geram alerta
+
+
+def conectar():
+    # WAL: leitores não bloqueiam a gravação de outro worker; timeout espera a trava
+    con = sqlite3.connect(linhas.banco(), timeout=30)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS rolos (
+            id TEXT PRIMARY KEY,
+            tipo TEXT,
+            posicao TEXT,
+            cor TEXT,
+            obs TEXT
+        )""")
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS historico (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            rolo_id TEXT,
+            data_entrada TEXT,
+            data_saida TEXT,
+            motivo_saida TEXT,
+            posicao TEXT,
+            m1 REAL, m2 REAL, m3 REAL, m4 REAL, m5 REAL,
+            certificado TEXT,
+            criado_em TEXT
+        )""")
+    return con
+
+
+def versao():
+    """Identificador barato da versão do banco, usado como chave de cache."""
+    try:
+        info = os.stat(linhas.banco())
+    except FileNotFoundError:
+        return None
+    return (info.st_mtime_ns, info.st_size, linhas.atual())
+
+
+def registrar_medicoes(medicoes):
+    """
+    Grava uma ou mais medições. Cada medição é um dict com rolo_id, data_entrada,
+    m1..m5 e, opcionalmente, data_saida, motivo_saida, posicao e certificado.
+    O lote inteiro é validado antes (validacao.DadosInvalidos se houver erro).
+    Rolos ainda não cadastrados em `rolos` são incluídos.
+    """
+    lote = pd.DataFrame(list(medicoes))
+    lote = validacao.conferir("medicoes", lote, colunas_aceitas=lote.columns)
+    agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    registros = []
+    for linha in lote.to_dict(orient="records"):
+        rolo = linha["rolo_id"]
+        medidas = [float(linha[m]) if linha.get(m) else None for m in PONTOS]
+        registros.append((
+            rolo, linha["data_entrada"], linha.get("data_saida", "") or "",
+            linha.get("motivo_saida", "") or "", linha.get("posicao", "") or "",
+            *medidas, linha.get("certificado", "") or "", agora,
+        ))
+    con = conectar()
+    try:
+        with con:
+            con.executemany(
+                "INSERT OR IGNORE INTO rolos (id, tipo) VALUES (?, ?)",
+                {(r[0], "".join(c for c in r[0] if c.isalpha())) for r in registros},
+            )
+            con.executemany(f"""
+                INSERT INTO historico (rolo_id, data_entrada, data_saida, motivo_saida, posicao,
+                                       {", ".join(PONTOS)}, certificado, criado_em)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""", registros)
+    finally:
+        con.close()
+    return len(registros)
+
+
+def carregar_medicoes():
+    con = conectar()
+    try:
+        return pd.read_sql_query("SELECT * FROM historico ORDER BY rolo_id, data_entrada, id", con)
+    finally:
+        con.close()
+
+
+# -----------------------------
+# Análise de desgaste (vetorizada para todos os rolos)
+# -----------------------------
+def analisar(medicoes, diametro_minimo=DIAMETRO_MINIMO, margem=MARGEM_ALERTA, horizonte=HORIZONTE_ALERTA):
+    """
+    Retorna (perfis, rolos):
+    - perfis: uma linha por medição com média, mínimo, conicidade (mm entre
+      as pontas, ajuste linear em m1..m5) e coroa (centro menos média das pontas);
+    - rolos: uma linha por rolo com último diâmetro mínimo, taxa de desgaste
+      (mm/dia, regressão linear da média no tempo), dias previstos até o
+      diâmetro mínimo e alerta.
+    """
+    perfis = medicoes.copy()
+    perfis["data"] = pd.to_datetime(perfis["data_entrada"], errors="coerce")
+    perfis = perfis[perfis["data"].notna()].sort_values(["rolo_id", "data", "id"], kind="stable").reset_index(drop=True)
+
+    m = perfis[PONTOS].to_numpy(dtype=float)
+    validos = ~np.isnan(m)
+    n_pontos = validos.sum(axis=1)
+    mv = np.where(validos, m, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = mv.sum(axis=1) / n_pontos
+        minimo = np.where(validos, m, np.inf).min(axis=1)
+        minimo[n_pontos == 0] = np.nan
+
+        # conicidade: inclinação por mínimos quadrados ao longo dos 5 pontos (centrados)
+        x = np.arange(len(PONTOS), dtype=float) - (len(PONTOS) - 1) / 2
+        xv = np.where(validos, x, 0.0)
+        sx, sy = xv.sum(axis=1), mv.sum(axis=1)
+        sxx, sxy = (xv * xv).sum(axis=1), (xv * mv).sum(axis=1)
+        inclinacao = (n_pontos * sxy - sx * sy) / (n_pontos * sxx - sx * sx)
+        conicidade = inclinacao * (x[-1] - x[0])
+
+        coroa = m[:, len(PONTOS) // 2] - (m[:, 0] + m[:, -1]) / 2
+
+    perfis["media"] = media
+    perfis["minimo"] = minimo
+    perfis["conicidade"] = conicidade
+    perfis["coroa"] = coroa
+
+    colunas = ["rolo_id", "medicoes", "ultima_medicao", "diametro_atual", "taxa_mm_dia",
+               "dias_ate_minimo", "data_prevista_minimo", "alerta"]
+    if perfis.empty:
+        return perfis, pd.DataFrame(columns=colunas)
+
+    # regressão por rolo com somas agrupadas (bincount) — sem laço por rolo
+    codigos, grupo = np.unique(perfis["rolo_id"].to_numpy(), return_inverse=True)
+    t = (perfis["data"] - perfis["data"].min()).dt.days.to_numpy(dtype=float)
+    ok = ~np.isnan(media)
+    w = ok.astype(float)
+    y = np.where(ok, media, 0.0)
+    k = len(codigos)
+    n = np.bincount(grupo, weights=w, minlength=k)
+    s_t = np.bincount(grupo, weights=t * w, minlength=k)
+    s_y = np.bincount(grupo, weights=y, minlength=k)
+    s_tt = np.bincount(grupo, weights=t * t * w, minlength=k)
+    s_ty = np.bincount(grupo, weights=t * y, minlength=k)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        taxa = (n * s_ty - s_t * s_y) / (n * s_tt - s_t * s_t)
+    taxa[n < 2] = np.nan
+
+    # última medição de cada rolo (perfis já ordenados por data)
+    ultima = np.r_[grupo[1:] != grupo[:-1], True]
+    atual = minimo[ultima]
+    data_ultima = perfis["data"].to_numpy()[ultima]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        dias = np.where(taxa < 0, (atual - diametro_minimo) / -taxa, np.nan)
+    dias[atual <= diametro_minimo] = 0
+    alerta = (atual <= diametro_minimo + margem) | (dias <= horizonte)
+
+    rolos = pd.DataFrame({
+        "rolo_id": codigos,
+        "medicoes": n.astype(int),
+        "ultima_medicao": pd.to_datetime(data_ultima).date,
+        "diametro_atual": atual,
+        "taxa_mm_dia": taxa,
+        "dias_ate_minimo": np.round(dias),
+        "data_prevista_minimo": [
+            (pd.Timestamp(d) + pd.Timedelta(days=float(x))).date() if not np.isnan(x) else None
+            for d, x in zip(data_ultima, dias)
+        ],
+        "alerta": alerta,
+    })
+    return perfis, rolos[colunas].sort_values(["alerta", "dias_ate_minimo"], ascending=[False, True])
@@ -0,0 +1,379 @@
+import os
+import json
+import gzip
+import struct
+import time
+import zlib
+import pandas as pd
+
+import linhas
+
+# -----------------------------
+# Diário de alterações (append-only)
+# -----------------------------
+# Cada registro tem um arquivo binário em data/diario/<nome>.log (na pasta da linha) com uma
+# entrada por linha alterada. Cabeçalho fixo (tamanho, seq, instante, operação)
+# seguido do conteúdo em JSON comprimido com zlib. Edições guardam só as
+# colunas que mudaram. A cada INTERVALO_CHECKPOINT entradas o estado completo
+# é salvo em CSV gzip, permitindo reconstruir qualquer instante sem
+# reler o diário inteiro.
+# O meta guarda também, para as últimas MAX_GRAVACOES gravações lançadas no
+# diário, a versão do arquivo antes e depois e a faixa de bytes das entradas
+# (ver entradas_entre()): quem acompanha o arquivo pelo diário sabe quando as
+# entradas explicam a mudança de versão e quando houve gravação fora dele.
+INTERVALO_CHECKPOINT = 100
+MAX_GRAVACOES = 100
+
+INSERCAO, EDICAO, EXCLUSAO = 1, 2, 3
+NOMES_OPERACAO = {INSERCAO: "Inclusão", EDICAO: "Edição", EXCLUSAO: "Exclusão"}
+
+CABECALHO = struct.Struct("<IIdB")
+
+
+def pasta():
+    return os.path.join(linhas.pasta(), "diario")
+
+
+def _arquivo_log(nome):
+    return os.path.join(pasta(), f"{nome}.log")
+
+
+def _arquivo_meta(nome):
+    return os.path.join(pasta(), f"{nome}.meta.json")
+
+
+def _arquivo_checkpoint(nome, seq):
+    return os.path.join(pasta(), f"{nome}.{seq:08d}.csv.gz")
+
+
+def _ler_meta(nome):
+    if not os.path.exists(_arquivo_meta(nome)):
+        return None
+    with open(_arquivo_meta(nome), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _salvar_meta(nome, meta):
+    tmp = _arquivo_meta(nome) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp, _arquivo_meta(nome))
+
+
+def _salvar_checkpoint(nome, meta, df, offset):
+    seq = meta["proximo_seq"]
+    with gzip.open(_arquivo_checkpoint(nome, seq), "wt", encoding="utf-8", newline="") as f:
+        df.to_csv(f, index=False)
+    meta["checkpoints"].append({"seq": seq, "ts": time.time(), "offset": offset})
+
+
+def _ler_checkpoint(nome, seq):
+    with gzip.open(_arquivo_checkpoint(nome, seq), "rt", encoding="utf-8") as f:
+        return pd.read_csv(f, dtype=str).fillna("")
+
+
+def _compacto(row):
+    # guarda só os campos preenchidos
+    return {k: v for k, v in row.items() if v != ""}
+
+
+# -----------------------------
+# Escrita
+# -----------------------------
+def diferencas(anterior, novo, chave):
+    """
+    Compara duas versões do registro (todas as colunas como string) e
+    retorna uma lista de (operação, conteúdo) por linha incluída, editada ou excluída.
+    """
+    colunas = list(dict.fromkeys(list(anterior.columns) + list(novo.columns)))
+    if chave not in colunas:
+        return []
+
+    def indexar(df):
+        df = df.reindex(columns=colunas, fill_value="")
+        df = df[df[chave] != ""].drop_duplicates(chave, keep="last")
+        return df.set_index(chave)
+
+    a, b = indexar(anterior), indexar(novo)
+    comuns = a.index.intersection(b.index)
+    mudou = a.loc[comuns].ne(b.loc[comuns])
+    editados = mudou.index[mudou.any(axis=1)]
+
+    entradas = []
+    for id_ in b.index.difference(a.index):
+        entradas.append((INSERCAO, {"id": id_, "a": None, "d": _compacto(b.loc[id_].to_dict())}))
+    for id_ in editados:
+        cols = mudou.columns[mudou.loc[id_]].tolist()
+        entradas.append((EDICAO, {"id": id_, "a": a.loc[id_, cols].to_dict(), "d": b.loc[id_, cols].to_dict()}))
+    for id_ in a.index.difference(b.index):
+        entradas.append((EXCLUSAO, {"id": id_, "a": _compacto(a.loc[id_].to_dict()), "d": None}))
+    return entradas
+
+
+def registrar_diferencas(nome, anterior, novo, chave, usuario="", desfaz=None):
+    """
+    Acrescenta ao diário as diferenças entre `anterior` e `novo`. A gravação
+    do arquivo que vem em seguida chama marcar_versao().
+    """
+    os.makedirs(pasta(), exist_ok=True)
+    meta = _ler_meta(nome)
+    if meta is None:
+        # primeiro uso: o estado atual vira o ponto de partida
+        meta = {"proximo_seq": 0, "checkpoints": []}
+        _salvar_checkpoint(nome, meta, anterior, 0)
+
+    entradas = diferencas(anterior, novo, chave)
+    inicio = tamanho(nome)
+    if not entradas:
+        meta["pendente"] = {"inicio": inicio, "fim": inicio}
+        _salvar_meta(nome, meta)
+        return 0
+
+    agora = time.time()
+    with open(_arquivo_log(nome), "ab") as f:
+        for op, conteudo in entradas:
+            conteudo["u"] = usuario
+            if desfaz is not None:
+                conteudo["x"] = desfaz
+            dados = zlib.compress(json.dumps(conteudo, ensure_ascii=False).encode("utf-8"))
+            f.write(CABECALHO.pack(len(dados), meta["proximo_seq"], agora, op) + dados)
+            meta["proximo_seq"] += 1
+        offset = f.tell()
+
+    ultimo = meta["checkpoints"][-1]["seq"]
+    if meta["proximo_seq"] - ultimo >= INTERVALO_CHECKPOINT:
+        _salvar_checkpoint(nome, meta, novo, offset)
+    meta["pendente"] = {"inicio": inicio, "fim": offset}
+    _salvar_meta(nome, meta)
+    return len(entradas)
+
+
+def marcar_versao(nome, antes, depois):
+    """
+    Liga as entradas do último registrar_diferencas() à gravação do arquivo
+    que as seguiu, da versão `antes` para `depois` (armazenamento.versao()).
+    Chamado dentro da trava do registro, logo depois da gravação.
+    """
+    meta = _ler_meta(nome)
+    if meta is None or "pendente" not in meta:
+        return
+    faixa = meta.pop("pendente")
+    meta.setdefault("gravacoes", []).append({
+        "antes": list(antes) if antes else None, "depois": list(depois) if depois else None, **faixa,
+    })
+    del meta["gravacoes"][:-MAX_GRAVACOES]
+    _salvar_meta(nome, meta)
+
+
+def arquivar(nome):
+    """
+    Encerra o diário do registro renomeando seus arquivos com o instante atual
+    (usado quando a chave do registro muda). A próxima gravação começa um diário novo.
+    """
+    if not os.path.isdir(pasta()):
+        return
+    sufixo = time.strftime("%Y%m%d%H%M%S")
+    for arquivo in os.listdir(pasta()):
+        if arquivo.startswith(nome + "."):
+            os.replace(os.path.join(pasta(), arquivo),
+                       os.path.join(pasta(), f"{nome}-{sufixo}{arquivo[len(nome):]}"))
+
+
+# -----------------------------
+# Leitura
+# -----------------------------
+def ler_entradas(nome, offset=0):
+    """Percorre o diário a partir de `offset` (em bytes)."""
+    if not os.path.exists(_arquivo_log(nome)):
+        return
+    with open(_arquivo_log(nome), "rb") as f:
+        f.seek(offset)
+        while True:
+            pos = f.tell()
+            cab = f.read(CABECALHO.size)
+            if len(cab) < CABECALHO.size:
+                return
+            tamanho, seq, ts, op = CABECALHO.unpack(cab)
+            dados = f.read(tamanho)
+            if len(dados) < tamanho:
+                # entrada incompleta (gravação interrompida)
+                return
+            conteudo = json.loads(zlib.decompress(dados).decode("utf-8"))
+            yield {
+                "seq": seq, "ts": ts, "op": op, "offset": pos, "fim": f.tell(),
+                "id": conteudo["id"], "usuario": conteudo.get("u", ""),
+                "antes": conteudo["a"], "depois": conteudo["d"], "desfaz": conteudo.get("x"),
+            }
+
+
+def entradas_entre(nome, versao_inicial, versao_final):
+    """
+    Entradas que levam o registro da `versao_inicial` à `versao_final`, ou
+    None se elas não explicam a mudança: houve gravação fora do diário no
+    meio (colunas derivadas, IDs, arquivamento, edição manual), o diário foi
+    rotacionado ou as versões já saíram do meta. Não usa a trava: o diário
+    só cresce, e uma faixa que não fecha também devolve None.
+    """
+    meta = _ler_meta(nome)
+    if meta is None or versao_inicial is None or versao_final is None:
+        return None
+    atual, alvo, faixas = list(versao_inicial), list(versao_final), []
+    for g in meta.get("gravacoes", []):
+        if atual == alvo:
+            break
+        if g["antes"] == atual:
+            faixas.append(g)
+            atual = g["depois"]
+        elif faixas:  # a sequência começou e foi interrompida por outra gravação
+            return None
+    if atual != alvo:
+        return None
+
+    entradas = []
+    for g in faixas:
+        fim = g["inicio"]
+        for entrada in ler_entradas(nome, g["inicio"]):
+            if entrada["offset"] >= g["fim"]:
+                break
+            entradas.append(entrada)
+            fim = entrada["fim"]
+        if fim != g["fim"]:
+            return None
+    return entradas
+
+
+def tamanho(nome):
+    """Tamanho atual do diário em bytes (offset da próxima entrada)."""
+    try:
+        return os.path.getsize(_arquivo_log(nome))
+    except FileNotFoundError:
+        return 0
+
+
+def _checkpoint_ate(meta, seq=None, instante=None):
+    # último checkpoint anterior ao seq/instante pedido
+    escolhido = None
+    for ck in meta["checkpoints"]:
+        if seq is not None and ck["seq"] > seq:
+            break
+        if instante is not None and ck["ts"] > instante:
+            break
+        escolhido = ck
+    return escolhido
+
+
+def aplicar(df, entrada, chave):
+    """Aplica uma entrada do diário sobre um DataFrame de strings."""
+    id_ = entrada["id"]
+    if entrada["op"] == INSERCAO:
+        linha = {c: "" for c in df.columns}
+        linha.update(entrada["depois"])
+        linha[chave] = id_
+        df = pd.concat([df, pd.DataFrame([linha])], ignore_index=True).fillna("")
+    elif entrada["op"] == EXCLUSAO:
+        df = df[df[chave] != id_].reset_index(drop=True)
+    else:
+        df = df.copy()
+        for col, valor in entrada["depois"].items():
+            if col not in df.columns:
+                df[col] = ""
+            df.loc[df[chave] == id_, col] = valor
+    return df
+
+
+def mesclar(atual, base, novo, chave):
+    """
+    Aplica sobre `atual` somente as alterações feitas de `base` para `novo`.
+    Usado quando outro processo gravou o registro depois da leitura de `base`:
+    inclusões e edições alheias são preservadas. Inclusões de uma chave que já
+    existe e edições/exclusões de linhas que sumiram são ignoradas.
+    """
+    for op, conteudo in diferencas(base, novo, chave):
+        existe = (atual[chave] == conteudo["id"]).any() if chave in atual.columns else False
+        if (op == INSERCAO) == existe:
+            continue
+        atual = aplicar(atual, {"op": op, "id": conteudo["id"], "depois": conteudo["d"]}, chave)
+    return atual
+
+
+def estado_em(nome, instante, chave):
+    """
+    Reconstrói o registro como estava em `instante` (timestamp epoch).
+    Retorna None se o instante for anterior ao início do diário.
+    """
+    meta = _ler_meta(nome)
+    if meta is None:
+        return None
+    ck = _checkpoint_ate(meta, instante=instante)
+    if ck is None:
+        return None
+    df = _ler_checkpoint(nome, ck["seq"])
+    for entrada in ler_entradas(nome, ck["offset"]):
+        if entrada["ts"] > instante:
+            break
+        df = aplicar(df, entrada, chave)
+    return df
+
+
+def recentes(nome, n=20):
+    """Últimas `n` entradas do diário, da mais nova para a mais antiga."""
+    meta = _ler_meta(nome)
+    if meta is None:
+        return []
+    ck = _checkpoint_ate(meta, seq=max(0, meta["proximo_seq"] - n))
+    entradas = list(ler_entradas(nome, ck["offset"] if ck else 0))
+    desfeitas = {e["desfaz"] for e in entradas if e["desfaz"] is not None}
+    for e in entradas:
+        e["desfeita"] = e["seq"] in desfeitas
+    return entradas[::-1][:n]
+
+
+def entrada(nome, seq):
+    """Entrada `seq` do diário, ou None."""
+    meta = _ler_meta(nome)
+    if meta is None:
+        return None
+    ck = _checkpoint_ate(meta, seq=seq)
+    for e in ler_entradas(nome, ck["offset"] if ck else 0):
+        if e["seq"] == seq:
+            return e
+    return None
+
+
+def aplicar_inverso(nome, df, seq, chave):
+    """
+    Retorna `df` com a alteração `seq` revertida, ou None se ela já foi
+    desfeita ou se a linha mudou de forma que impede a reversão (numa edição,
+    se alguma coluna alterada não está mais com o valor que ela gravou).
+    """
+    meta = _ler_meta(nome)
+    if meta is None:
+        return None
+    ck = _checkpoint_ate(meta, seq=seq)
+    alvo = None
+    for entrada in ler_entradas(nome, ck["offset"] if ck else 0):
+        if entrada["seq"] == seq:
+            alvo = entrada
+        elif alvo is not None and entrada["desfaz"] == seq:
+            return None
+    if alvo is None:
+        return None
+
+    existe = (df[chave] == alvo["id"]).any() if chave in df.columns else False
+    if alvo["op"] == INSERCAO:
+        if not existe:
+            return None
+        inversa = {"op": EXCLUSAO, "id": alvo["id"]}
+    elif alvo["op"] == EXCLUSAO:
+        if existe:
+            return None
+        inversa = {"op": INSERCAO, "id": alvo["id"], "depois": alvo["antes"]}
+    else:
+        if not existe:
+            return None
+        # como em mesclar(): uma gravação posterior nas mesmas colunas não é sobrescrita
+        linha = df[df[chave] == alvo["id"]].iloc[0]
+        if any(linha.get(col, "") != valor for col, valor in alvo["depois"].items()):
+            return None
+        inversa = {"op": EDICAO, "id": alvo["id"], "depois": alvo["antes"]}
+    return aplicar(df, inversa, chave)
@@ -0,0 +1,217 @@
+import errno
+import io
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import pandas as pd
+
+import armazenamento
+import diario
+import linhas
+import validacao
+
+log = logging.getLogger(__name__)
+
+# -----------------------------
+# Fila local de gravações
+# -----------------------------
+# Quando data/ não está acessível (queda da rede até o compartilhamento, ou
+# IVG_SIMULAR_QUEDA, ver armazenamento.disponivel()), gravar() e incluir()
+# guardam as alterações linha a linha (formato de diario.diferencas) em um
+# arquivo JSON por lote em FILA_DIR, fora de data/. Uma thread reenvia os
+# lotes em ordem, com espera crescente entre tentativas. O reenvio é
+# idempotente pelo ID (UUID) de cada linha: alteração já presente é ignorada,
+# e linha alterada por outra pessoa enquanto o lote esperava vira conflito,
+# guardado em FILA_DIR/conflitos/ para conferência (ver armazenamento.aplicar_alteracoes).
+# Cada lote guarda a linha de galvanização em que foi criado (linhas.py).
+# Linha de comando, a partir da raiz do projeto:
+#   python Home/fila.py            -> lista lotes pendentes e conflitos
+#   python Home/fila.py --enviar   -> tenta enviar agora
+FILA_DIR = os.environ.get("IVG_FILA_DIR", os.path.join(os.path.expanduser("~"), ".ivg", "fila"))
+CONFLITOS_DIR = os.path.join(FILA_DIR, "conflitos")
+# erros de data/ fora do ar; os demais (disco cheio, permissão, só leitura) não
+# se resolvem reenviando e chegam à página
+INACESSIVEL = {errno.ENOENT, errno.ENOTCONN, errno.ESTALE, errno.EHOSTDOWN, errno.EHOSTUNREACH, errno.ETIMEDOUT}
+ESPERA_MINIMA = 5  # segundos; dobra a cada falha até ESPERA_MAXIMA
+ESPERA_MAXIMA = 300
+
+_iniciado = False
+_trava = threading.Lock()
+_envio = threading.Lock()
+
+
+def _arquivo(lote):
+    return os.path.join(FILA_DIR, f"{lote['criado']}-{lote['id']}.json")
+
+
+def _salvar(lote, caminho=None):
+    caminho = caminho or _arquivo(lote)
+    tmp = caminho + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(lote, f, ensure_ascii=False)
+    os.replace(tmp, caminho)
+
+
+def _ler_pasta(pasta):
+    if not os.path.isdir(pasta):
+        return []
+    lotes = []
+    for arquivo in sorted(os.listdir(pasta)):
+        if arquivo.endswith(".json"):
+            with open(os.path.join(pasta, arquivo), encoding="utf-8") as f:
+                lotes.append(json.load(f))
+    return lotes
+
+
+def pendentes():
+    """Lotes ainda não enviados, na ordem em que foram criados."""
+    return _ler_pasta(FILA_DIR)
+
+
+def conflitos():
+    return _ler_pasta(CONFLITOS_DIR)
+
+
+def enfileirar(nome, alteracoes, usuario=""):
+    os.makedirs(FILA_DIR, exist_ok=True)
+    lote = {"id": str(uuid.uuid4()), "registro": nome, "linha": linhas.atual(), "usuario": usuario,
+            "criado": datetime.now().strftime("%Y%m%d-%H%M%S-%f"),
+            "tentativas": 0, "proxima": 0, "erro": "",
+            "alteracoes": [[op, conteudo] for op, conteudo in alteracoes]}
+    _salvar(lote)
+    iniciar()
+    return lote
+
+
+# -----------------------------
+# Gravação com fila
+# -----------------------------
+def _texto(df):
+    return pd.read_csv(io.StringIO(df.to_csv(index=False)), dtype=str).fillna("")
+
+
+def _inacessivel(erro):
+    # ConnectionError: queda simulada (armazenamento.trava) ou lotes anteriores ainda na fila
+    return isinstance(erro, ConnectionError) or erro.errno in INACESSIVEL
+
+
+def _em_ordem():
+    # lotes antigos vão antes da gravação nova; se ainda não passam, a nova também espera
+    if pendentes() and enviar(forcar=True)[2]:
+        raise ConnectionError("há gravações anteriores na fila")
+
+
+def gravar(nome, df, usuario=""):
+    """
+    armazenamento.gravar(), guardando as alterações na fila se data/ não
+    responder (ver INACESSIVEL). Retorna False se foram para a fila. As
+    linhas alteradas são validadas antes de entrar na fila (levanta
+    validacao.DadosInvalidos).
+    """
+    try:
+        _em_ordem()
+        armazenamento.gravar(nome, df, usuario)
+        return True
+    except OSError as e:
+        base = df.attrs.get("base")
+        if base is None or not _inacessivel(e):
+            raise
+        anterior, novo = _texto(pd.read_csv(io.StringIO(base[1]), dtype=str)), _texto(df)
+        alteracoes = diario.diferencas(anterior, novo, armazenamento.chave(nome))
+        alteradas = {c["id"] for op, c in alteracoes if op != diario.EXCLUSAO}
+        novo = validacao.conferir(nome, novo, novo[armazenamento.chave(nome)].isin(alteradas),
+                                  colunas_aceitas=anterior.columns)
+        enfileirar(nome, diario.diferencas(anterior, novo, armazenamento.chave(nome)), usuario)
+        return False
+
+
+def incluir(nome, linha, usuario=""):
+    """armazenamento.incluir() com a mesma reserva de gravar()."""
+    try:
+        _em_ordem()
+        armazenamento.incluir(nome, linha, usuario)
+        return True
+    except OSError as e:
+        if not _inacessivel(e):
+            raise
+        linha = validacao.conferir(nome, pd.DataFrame([linha]), colunas_aceitas=list(linha)).iloc[0].to_dict()
+        id_ = linha[armazenamento.chave(nome)]
+        enfileirar(nome, [(diario.INSERCAO, {"id": id_, "a": None, "d": linha})], usuario)
+        return False
+
+
+# -----------------------------
+# Envio
+# -----------------------------
+def enviar(forcar=False):
+    """
+    Envia os lotes pendentes em ordem; para no primeiro que falhar por
+    indisponibilidade (os seguintes podem depender dele). Sem `forcar`,
+    respeita a espera do lote. Retorna (enviados, em_conflito, restantes).
+    """
+    enviados = em_conflito = 0
+    with _envio:
+        lotes = pendentes()
+        for i, lote in enumerate(lotes):
+            if not forcar and time.time() < lote["proxima"]:
+                return enviados, em_conflito, len(lotes) - i
+            try:
+                with linhas.usar(lote.get("linha", linhas.PADRAO)):
+                    recusadas = armazenamento.aplicar_alteracoes(
+                        lote["registro"], lote["alteracoes"], lote["usuario"])
+            except OSError as e:
+                lote["tentativas"] += 1
+                lote["erro"] = repr(e)
+                lote["proxima"] = time.time() + min(ESPERA_MAXIMA, ESPERA_MINIMA * 2 ** (lote["tentativas"] - 1))
+                _salvar(lote)
+                return enviados, em_conflito, len(lotes) - i
+            except validacao.DadosInvalidos as e:
+                recusadas = [{"id": p.linha, "operacao": "", "motivo": f"{p.coluna}: {p.problema}"}
+                             for p in e.problemas.itertuples()]
+            if recusadas:
+                os.makedirs(CONFLITOS_DIR, exist_ok=True)
+                lote["conflitos"] = recusadas
+                _salvar(lote, os.path.join(CONFLITOS_DIR, os.path.basename(_arquivo(lote))))
+                em_conflito += 1
+            else:
+                enviados += 1
+            os.remove(_arquivo(lote))
+    return enviados, em_conflito, 0
+
+
+def _laco():
+    while True:
+        try:
+            enviar()
+        except Exception:  # lote ilegível etc.: não derruba o app, tenta de novo depois
+            log.exception("fila")
+        time.sleep(ESPERA_MINIMA)
+
+
+def iniciar():
+    """Inicia o reenvio em segundo plano (uma vez por processo)."""
+    global _iniciado
+    with _trava:
+        if _iniciado:
+            return
+        _iniciado = True
+    threading.Thread(target=_laco, daemon=True, name="fila").start()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--enviar" in sys.argv:
+        print("enviados: %d, em conflito: %d, restantes: %d" % enviar(forcar=True))
+    for lote in pendentes():
+        print(f"pendente  {lote['criado']} {lote['registro']}: {len(lote['alteracoes'])} alteração(ões), "
+              f"{lote['tentativas']} tentativa(s) {lote['erro']}")
+    for lote in conflitos():
+        print(f"conflito  {lote['criado']} {lote['registro']}:")
+        for c in lote["conflitos"]:
+            print(f"    {c['id']}: {c['motivo']}")
@@ -0,0 +1,124 @@
+import re
+from datetime import date
+
+import pandas as pd
+
+import armazenamento
+import particoes
+
+# -----------------------------
+# Identidade dos rolos de fundo
+# -----------------------------
+# O banho (PEÇAS_DO_POTE.py) anota os rolos pelo número (Rolo_Titular = "45")
+# e o pote (SINK_ROLL.py) pelo código (SR45). rolo() leva os dois à mesma
+# identidade; IndiceRolos junta, por rolo, as campanhas do banho e as
+# movimentações do pote (arquivo quente + partições arquivadas), montado uma
+# vez por versão dos dados.
+LOCAIS_OFICINA = ["Oficina OCP", "Usinagem", "Revestimento"]
+
+
+def rolo(valor):
+    """'45', '045', 'sr45', 'SR045', 45.0 -> 'SR45'; None se não houver número."""
+    texto = str(valor).strip()
+    if re.fullmatch(r"\d+\.0*", texto):  # número lido como float
+        texto = texto.split(".")[0]
+    numero = re.search(r"\d+", texto)
+    return f"SR{int(numero.group()):02d}" if numero else None
+
+
+def versoes():
+    """Chave de cache do índice: versões dos arquivos quentes e das partições."""
+    return tuple((armazenamento.versao(n), particoes.versao(n)) for n in ("pote", "banho"))
+
+
+def carregar():
+    """Índice a partir dos arquivos atuais (usar com cache por versoes())."""
+    return IndiceRolos(armazenamento.ler_com_arquivo("pote"), armazenamento.ler_com_arquivo("banho"))
+
+
+def _dias(inicio, fim, hoje):
+    return (fim.fillna(hoje) - inicio).dt.days
+
+
+class IndiceRolos:
+    """
+    Campanhas do banho (uma linha por rolo e papel, titular ou reserva) e
+    movimentações do pote, ambas com a coluna "Rolo" normalizada e agrupadas
+    por rolo, para montar a ficha de um rolo sem percorrer os registros.
+    """
+
+    def __init__(self, movimentos, campanhas, hoje=None):
+        hoje = pd.Timestamp(hoje or date.today())
+
+        mov = movimentos.copy()
+        mov["Rolo"] = mov["Codigo"].map(rolo) if "Codigo" in mov.columns else None
+        mov = mov[mov["Rolo"].notna()]
+        entrada = pd.to_datetime(mov["Entrada"], errors="coerce")
+        mov["Dias"] = _dias(entrada, pd.to_datetime(mov["Saída"], errors="coerce"), hoje)
+        mov = mov.assign(_d=entrada).sort_values(["Rolo", "_d"], kind="stable").drop(columns="_d")
+        self.movimentos = mov.reset_index(drop=True)
+
+        partes = []
+        for papel in ("Titular", "Reserva"):
+            if f"Rolo_{papel}" not in campanhas.columns:
+                continue
+            parte = pd.DataFrame({
+                "Rolo": campanhas[f"Rolo_{papel}"].map(rolo),
+                "Papel": papel,
+                "Campanha": campanhas["Campanha"],
+                "Data_Inicio": campanhas["Data_Inicio"],
+                "Data_Fim": campanhas["Data_Fim"],
+                "Conjunto": campanhas[f"Conjunto_{papel}"],
+                "Diametro": campanhas[f"Diametro_{papel}"],
+            })
+            partes.append(parte[parte["Rolo"].notna()])
+        camp = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(
+            columns=["Rolo", "Papel", "Campanha", "Data_Inicio", "Data_Fim", "Conjunto", "Diametro"])
+        inicio = pd.to_datetime(camp["Data_Inicio"], errors="coerce")
+        # só o titular fica imerso; a reserva aguarda fora do banho
+        camp["Dias de banho"] = _dias(inicio, pd.to_datetime(camp["Data_Fim"], errors="coerce"), hoje).where(
+            camp["Papel"] == "Titular", 0)
+        camp = camp.assign(_d=inicio).sort_values(["Rolo", "_d"], kind="stable").drop(columns="_d")
+        self.campanhas = camp.reset_index(drop=True)
+
+        self._mov = self.movimentos.groupby("Rolo").indices
+        self._camp = self.campanhas.groupby("Rolo").indices
+
+    def rolos(self):
+        return sorted(set(self._mov) | set(self._camp))
+
+    def movimentos_de(self, codigo):
+        return self.movimentos.iloc[self._mov.get(rolo(codigo), [])]
+
+    def campanhas_de(self, codigo):
+        return self.campanhas.iloc[self._camp.get(rolo(codigo), [])]
+
+    def ficha(self, codigo):
+        """Campanhas, movimentações e totais do rolo."""
+        mov, camp = self.movimentos_de(codigo), self.campanhas_de(codigo)
+        oficina = mov[mov["Localização"].isin(LOCAIS_OFICINA)]
+        return {
+            "campanhas": camp,
+            "movimentos": mov,
+            "campanhas_titular": int((camp["Papel"] == "Titular").sum()),
+            "campanhas_reserva": int((camp["Papel"] == "Reserva").sum()),
+            "dias_banho": int(camp["Dias de banho"].sum()),
+            "visitas_oficina": len(oficina),
+            "dias_oficina": int(oficina["Dias"].sum()),
+            "localizacao": mov["Localização"].iloc[-1] if not mov.empty else "",
+        }
+
+    def resumo(self):
+        """Uma linha por rolo com os totais da ficha."""
+        camp = self.campanhas.groupby("Rolo").agg(
+            Campanhas_titular=("Papel", lambda p: int((p == "Titular").sum())),
+            Campanhas_reserva=("Papel", lambda p: int((p == "Reserva").sum())),
+            Dias_de_banho=("Dias de banho", "sum"),
+        )
+        oficina = self.movimentos[self.movimentos["Localização"].isin(LOCAIS_OFICINA)].groupby("Rolo").agg(
+            Visitas_oficina=("Dias", "size"), Dias_oficina=("Dias", "sum"))
+        local = self.movimentos.groupby("Rolo")["Localização"].last().rename("Localização atual")
+        tabela = pd.DataFrame(index=pd.Index(self.rolos(), name="Rolo")).join([local, camp, oficina])
+        numericas = ["Campanhas_titular", "Campanhas_reserva", "Dias_de_banho", "Visitas_oficina", "Dias_oficina"]
+        tabela[numericas] = tabela[numericas].fillna(0).astype(int)
+        return tabela.fillna("").reset_index()
@@ -0,0 +1,120 @@
+import hashlib
+import io
+import json
+import os
+import threading
+
+from PIL import Image
+
+import linhas
+
+# -----------------------------
+# Imagens de fundo dos mapas
+# -----------------------------
+# As plantas (decusi.png etc., na raiz do projeto) não vão mais embutidas em
+# base64 em cada figura do Plotly: são convertidas em WebP, em algumas
+# larguras, para Home/static/ (servida pelo Streamlit em app/static/, ver
+# .streamlit/config.toml). O nome de cada variante leva o hash do conteúdo
+# da imagem original, então a URL só muda quando a imagem muda e o navegador
+# (ou o nginx, ver deploy/nginx.conf) pode guardá-la indefinidamente.
+# As variantes são geradas no primeiro uso; para gerar antes:
+#   python Home/imagens.py
+IMAGENS = ["decusi.png", "desen.png", "TL.png", "nova.png"]
+LARGURAS = (640, 1200)  # além da largura original
+QUALIDADE = 85
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+URL_STATIC = "app/static"
+MANIFESTO = os.path.join(STATIC_DIR, "imagens.json")
+
+_trava = threading.Lock()
+_cache = {}  # nome -> (mtime, entrada do manifesto)
+
+
+def _ler_manifesto():
+    try:
+        with open(MANIFESTO, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _salvar_manifesto(manifesto):
+    tmp = MANIFESTO + f".{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, indent=1)
+    os.replace(tmp, MANIFESTO)
+
+
+def gerar(nome):
+    """Gera (se preciso) as variantes WebP de `nome` e retorna sua entrada no manifesto."""
+    with open(nome, "rb") as f:
+        hash_ = hashlib.sha256(f.read()).hexdigest()[:12]
+    manifesto = _ler_manifesto()
+    entrada = manifesto.get(nome)
+    if entrada and entrada["hash"] == hash_ and all(
+            os.path.exists(os.path.join(STATIC_DIR, a)) for a in entrada["variantes"].values()):
+        return entrada
+
+    os.makedirs(STATIC_DIR, exist_ok=True)
+    base = os.path.splitext(os.path.basename(nome))[0]
+    with Image.open(nome) as original:
+        largura, altura = original.size
+        variantes, tamanhos = {}, {}
+        for w in sorted({w for w in LARGURAS if w < largura} | {largura}):
+            arquivo = f"{base}-{w}.{hash_}.webp"
+            imagem = original if w == largura else original.resize((w, round(altura * w / largura)), Image.LANCZOS)
+            # plantas são desenhos de cores chapadas: sem perdas costuma ganhar, fica a menor codificação
+            codificadas = []
+            for opcoes in ({"lossless": True}, {"quality": QUALIDADE}):
+                buffer = io.BytesIO()
+                imagem.save(buffer, "WEBP", method=6, **opcoes)
+                codificadas.append(buffer.getvalue())
+            conteudo = min(codificadas, key=len)
+            with open(os.path.join(STATIC_DIR, arquivo), "wb") as f:
+                f.write(conteudo)
+            variantes[str(w)] = arquivo
+            tamanhos[str(w)] = len(conteudo)
+
+    # variantes de versões anteriores da mesma imagem
+    for antigo in os.listdir(STATIC_DIR):
+        if antigo.startswith(f"{base}-") and antigo.endswith(".webp") and antigo not in variantes.values():
+            os.remove(os.path.join(STATIC_DIR, antigo))
+
+    entrada = {"hash": hash_, "tamanho": [largura, altura], "variantes": variantes, "bytes": tamanhos}
+    manifesto = _ler_manifesto()
+    manifesto[nome] = entrada
+    _salvar_manifesto(manifesto)
+    return entrada
+
+
+def _entrada(nome):
+    mtime = os.stat(nome).st_mtime_ns  # FileNotFoundError se a imagem não existir
+    with _trava:
+        if nome not in _cache or _cache[nome][0] != mtime:
+            _cache[nome] = (mtime, gerar(nome))
+        return _cache[nome][1]
+
+
+def tamanho(nome):
+    """(largura, altura) da imagem original; as coordenadas dos mapas usam essa escala."""
+    return tuple(_entrada(nome)["tamanho"])
+
+
+def url(nome, largura):
+    """
+    URL estática da variante mais leve (em bytes) entre as que têm pelo menos
+    `largura` pixels; a original sempre entra na escolha.
+    """
+    entrada = _entrada(nome)
+    maior = max(entrada["variantes"], key=int)
+    candidatas = [w for w in entrada["variantes"] if int(w) >= largura] or [maior]
+    w = min(candidatas, key=lambda w: entrada["bytes"][w])
+    return f"{URL_STATIC}/{entrada['variantes'][w]}"
+
+
+if __name__ == "__main__":
+    plantas = {cfg["imagem"] for linha in linhas.LINHAS.values() for cfg in linha["mapas"].values()}
+    for nome in sorted(set(IMAGENS) | plantas):
+        entrada = gerar(nome)
+        print(nome, entrada["tamanho"], ", ".join(f"{a} ({entrada['bytes'][w]} B)" for w, a in entrada["variantes"].items()))
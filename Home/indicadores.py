@@ -0,0 +1,155 @@
+from datetime import date, datetime
+
+import pandas as pd
+import plotly.express as px
+
+import armazenamento
+import derivados
+import instrumentacao
+
+# -----------------------------
+# Dados derivados das páginas
+# -----------------------------
+# Colunas calculadas, indicadores e figuras padrão que as páginas mostram,
+# montados em segundo plano por derivados.py a partir dos arquivos (nunca da
+# cópia da sessão: rodam fora da execução da página, sem st.*).
+# Ficam aqui, e não nos scripts das páginas, para que o aquecimento
+# (aquecimento.py) prepare exatamente o que as páginas vão pedir.
+# Indicadores cobrem o histórico completo: arquivo quente mais as partições
+# arquivadas (armazenamento.ler_com_arquivo).
+
+
+def calc_dias(entrada, saida):
+    try:
+        ent = datetime.strptime(entrada, "%Y-%m-%d")
+        sai = datetime.strptime(saida, "%Y-%m-%d") if saida else datetime.today()
+        return (sai-ent).days
+    except:
+        return None
+
+
+def safe_float(value, default=0.0):
+    """
+    Converte uma string ou número para float tratando:
+    - valores com vírgula (e.g. '597,5')
+    - strings vazias
+    - valores não conversíveis
+    """
+    if pd.isna(value):
+        return default
+    if isinstance(value, (int, float)):
+        try:
+            return float(value)
+        except:
+            return default
+    s = str(value).strip()
+    if s == "":
+        return default
+    # troca vírgula por ponto e remove espaços
+    s = s.replace(",", ".").replace(" ", "")
+    try:
+        return float(s)
+    except:
+        return default
+
+
+# -----------------------------
+# TL
+# -----------------------------
+def com_dias(df):
+    """
+    Cópia da TL com "Dias de uso" e "Km/DIA" recalculados até hoje (os dias
+    de uso das movimentações em aberto crescem com a data), como calc_dias().
+    Só para exibir: o arquivo guarda os valores do momento da gravação.
+    """
+    df = df.copy()
+    entrada = pd.to_datetime(df["Entrada"], format="%Y-%m-%d", errors="coerce")
+    em_aberto = df["Saída"].isna() | (df["Saída"].astype(str) == "")
+    saida = pd.to_datetime(df["Saída"].where(~em_aberto), format="%Y-%m-%d", errors="coerce")
+    dias = (saida.where(~em_aberto, pd.Timestamp(date.today())) - entrada).dt.days
+    km = pd.to_numeric(df["Km de saída"], errors="coerce")
+    df["Dias de uso"] = dias
+    df["Km/DIA"] = (km / dias).round(2).where(km.fillna(0).ne(0) & (dias > 0))
+    return df
+
+
+def _montar_visao_geral_tl():
+    # as figuras são compartilhadas pelas sessões
+    df = armazenamento.ler_com_arquivo("tl")
+    df["Km de saída"] = pd.to_numeric(df["Km de saída"], errors="coerce")
+    df["Entrada"] = pd.to_datetime(df["Entrada"], errors="coerce")
+    ranking = df.groupby("Codigo")["Km de saída"].max().reset_index().sort_values(by="Km de saída", ascending=False)
+    with instrumentacao.medir("grafico_ranking", "figure"):
+        fig_rank = px.bar(ranking, x="Codigo", y="Km de saída",
+                          text_auto='.0f', title="Km total rodado por Bending")
+    with instrumentacao.medir("grafico_comparativo", "figure"):
+        fig_all = px.line(df, x="Entrada", y="Km de saída",
+                          color="Codigo", markers=True)
+        fig_all.add_hline(y=2000, line_dash="dot", line_color="red",
+                          annotation_text="Meta 2000 km")
+    return ranking, fig_rank, fig_all
+
+
+def visao_geral_tl():
+    """((ranking, figura do ranking, figura comparativa), atual) da visão geral do dashboard da TL."""
+    return derivados.obter("tl_visao_geral", armazenamento.versao_com_arquivo("tl"), _montar_visao_geral_tl)
+
+
+# -----------------------------
+# Banho (peças do pote)
+# -----------------------------
+@instrumentacao.medir("calcular_indicadores", "transform")
+def _calcular_banho():
+    df = armazenamento.ler_com_arquivo("banho")
+    if df.empty:
+        return None
+
+    # converter datas de forma resistente
+    df["Data_Inicio"] = pd.to_datetime(df["Data_Inicio"], errors="coerce")
+    df["Data_Fim"] = pd.to_datetime(df["Data_Fim"], errors="coerce")
+    df["Tempo_Banho_dias"] = (df["Data_Fim"] - df["Data_Inicio"]).dt.days
+
+    # converter diâmetros com safe_float
+    df["Diametro_Titular"] = df["Diametro_Titular"].apply(safe_float)
+    df["Diametro_Reserva"] = df["Diametro_Reserva"].apply(safe_float)
+
+    media_tempo = df.groupby("Campanha")["Tempo_Banho_dias"].mean().reset_index()
+    media_tempo["Tempo_Banho_dias"] = media_tempo["Tempo_Banho_dias"].round(1)
+
+    figuras = []
+    # garantir que Data_Registro exista e seja legível para plot
+    if "Data_Registro" in df.columns:
+        # tenta parse; se falhar, plota por posição
+        try:
+            df_plot = df.copy()
+            df_plot["Data_Registro"] = pd.to_datetime(df_plot["Data_Registro"], errors="coerce")
+            with instrumentacao.medir("grafico_diametros", "figure"):
+                figuras.append(px.line(df_plot, x="Data_Registro", y=["Diametro_Titular", "Diametro_Reserva"],
+                                       title="Evolução dos Diâmetros ao Longo do Tempo"))
+        except Exception:
+            figuras.append(px.bar(df, x="Campanha", y="Diametro_Titular", color="Campanha",
+                                  title="Diâmetro Titular por Campanha", text_auto=True))
+
+    with instrumentacao.medir("grafico_diametro_campanha", "figure"):
+        figuras.append(px.bar(df, x="Campanha", y="Diametro_Titular", color="Campanha",
+                              title="Diâmetro Titular por Campanha", text_auto=True))
+
+    return {
+        "total": len(df),
+        "media_titular": df["Diametro_Titular"].mean(),
+        "media_reserva": df["Diametro_Reserva"].mean(),
+        "media_tempo": media_tempo,
+        "figuras": figuras,
+    }
+
+
+def banho():
+    """
+    (indicadores, atual) da aba de indicadores do banho: métricas, médias por
+    campanha e figuras; indicadores é None sem registros.
+    """
+    return derivados.obter("banho_indicadores", armazenamento.versao_com_arquivo("banho"), _calcular_banho)
+
+
+# preparados pelo aquecimento, na ordem
+PADRAO = {"tl_visao_geral": visao_geral_tl, "banho_indicadores": banho}
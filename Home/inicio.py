@@ -1,4 +1,22 @@
 import streamlit as st
+from datetime import date
+
+import aquecimento
+import armazenamento
+import componentes
+import instrumentacao
+import linhas
+import manutencao
+import notificacao
+import relatorio
+
+instrumentacao.nova_execucao("inicio")
+# agendador de snapshots e arquivamento de data/ (um por processo)
+manutencao.iniciar()
+# caches compartilhados preparados em paralelo (já na subida, se por Home/servidor.py)
+aquecimento.iniciar()
+componentes.seletor_linha()
+componentes.indicador_aquecimento()
 
 
 
@@ -54,7 +72,64 @@ st.markdown("""
 
 # --- Conteúdo da página ---
 st.markdown('<div class="main-title"> Bem-vindo ao Controle de insumos (IVGI)</div>', unsafe_allow_html=True)
-st.markdown('<div class="sub-title"> Pote / Tension leveller — IVG</div>', unsafe_allow_html=True)
+st.markdown(f'<div class="sub-title"> Pote / Tension leveller — {linhas.nome()}</div>', unsafe_allow_html=True)
+
+st.markdown("<hr>", unsafe_allow_html=True)
+
+
+# --- Resumo (lido de data/resumo/, atualizado a cada gravação) ---
+def dias_desde(data):
+    return (date.today() - date.fromisoformat(data)).days if data else None
+
+
+@st.fragment(run_every=notificacao.INTERVALO)
+def painel_resumo():
+    pote, desengraxe, tl, banho = (armazenamento.ler_resumo(n) or {} for n in ("pote", "desengraxe", "tl", "banho"))
+    c1, c2, c3, c4 = st.columns(4)
+    for coluna, titulo, r in ((c1, "Pote", pote), (c2, "Desengraxe", desengraxe), (c3, "Tension leveller", tl)):
+        dias = dias_desde(r.get("ultima_troca"))
+        coluna.metric(f"{titulo} — rolos em linha", len(r.get("em_linha", [])),
+                      help=", ".join(r.get("em_linha", [])) or None)
+        coluna.caption(f"Última troca há {dias} dia(s)" if dias is not None else "Sem trocas registradas")
+    if banho.get("campanha"):
+        c4.metric("Banho — campanha atual", banho["campanha"])
+        c4.caption(f"{banho['inicio']} a {banho['fim']} · iniciada há {dias_desde(banho['inicio'])} dia(s)")
+    else:
+        c4.metric("Banho — campanha atual", "—")
+    sobrepostos = {n: r.get("sobreposicoes", 0) for n, r in
+                   (("pote", pote), ("desengraxe", desengraxe), ("tl", tl), ("banho", banho))}
+    if any(sobrepostos.values()):
+        st.warning("⚠️ Períodos sobrepostos: " + ", ".join(f"{n} ({q})" for n, q in sobrepostos.items() if q)
+                   + " — veja a página PERIODOS.")
+    perto = tl.get("perto_da_meta", [])
+    if perto:
+        st.warning("⚠️ Bendings perto ou acima da meta de 2000 km: " + ", ".join(f"{c} ({km:.0f} km)" for c, km in perto))
+
+
+painel_resumo()
+
+
+# --- Relatório semanal (gerado em segundo plano, ver relatorio.py) ---
+@st.fragment(run_every=notificacao.INTERVALO)
+def painel_relatorio():
+    st.markdown("#### 📄 Relatório semanal de manutenção")
+    ultimo = relatorio.ultimo()
+    c1, c2 = st.columns([3, 1])
+    if ultimo:
+        with open(ultimo["caminho"], "rb") as f:
+            c1.download_button(f"⬇️ Baixar relatório {ultimo['semana']}", f.read(), file_name=ultimo["arquivo"],
+                               mime="text/html")
+        c1.caption(f"Gerado em {ultimo['gerado']}. Para PDF, abra no navegador e imprima.")
+    else:
+        c1.caption("Nenhum relatório gerado ainda.")
+    if relatorio.pendente():
+        c2.info("⏳ Gerando relatório…")
+    elif not relatorio.atualizado() and c2.button("🔄 Gerar com os dados atuais"):
+        relatorio.solicitar(forcar=True)
+        st.rerun(scope="fragment")
+
+
+painel_relatorio()
 
 st.markdown("<hr>", unsafe_allow_html=True)
 
@@ -86,13 +161,14 @@ st.markdown('<div class="section-title">🔄 Atualizações e Histórico</div>',
 st.markdown("""
 - Toda vez que um **insumo for atualizado**, um novo registro será adicionado automaticamente ao **histórico**, refletindo seu status atual.  
 - **Erros podem ser corrigidos** utilizando a aba **Editar/Excluir registros**.
+- Toda inclusão, edição ou exclusão fica registrada no **diário de alterações** e pode ser **desfeita** na mesma aba.
 """)
 
 st.markdown("""
 <div class="attention">
 🚨 ATENÇÃO:<br>
-Evite atualizações incorretas. Caso ocorra, exclua o registro e lance um novo com as informações corretas.
+Evite atualizações incorretas. Caso ocorra, use o botão <b>Desfazer</b> em "Alterações recentes" ou corrija o registro na aba de edição.
 </div>
 """, unsafe_allow_html=True)
 
-
+componentes.painel_diagnostico()
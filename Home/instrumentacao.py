@@ -0,0 +1,133 @@
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import ContextDecorator
+from itertools import count
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+# -----------------------------
+# Medição de tempo das seções das páginas
+# -----------------------------
+# As medições ficam num buffer circular em memória, compartilhado pelo
+# processo do Streamlit. Cada execução (rerun) de uma página recebe um número,
+# guardado por thread, já que o Streamlit roda cada sessão em sua thread.
+TAMANHO_BUFFER = 5000
+ETAPAS = ("load", "transform", "figure", "write", "render")
+
+_buffer = deque(maxlen=TAMANHO_BUFFER)
+_falhas = deque(maxlen=200)  # erros de cálculos fora da página (derivados.py)
+_trava = threading.Lock()
+_contador = count(1)
+_local = threading.local()
+
+
+def nova_execucao(pagina):
+    """Marca o início de um rerun da página; as medições seguintes são associadas a ele."""
+    _local.pagina = pagina
+    _local.execucao = next(_contador)
+    return _local.execucao
+
+
+def execucao_atual():
+    return getattr(_local, "execucao", None)
+
+
+def pagina_atual():
+    return getattr(_local, "pagina", "")
+
+
+class medir(ContextDecorator):
+    """
+    Mede o tempo de um bloco (with) ou de uma função (decorador).
+    `etapa` é uma de ETAPAS: load, transform, figure, write ou render.
+    """
+
+    def __init__(self, secao, etapa="render"):
+        self.secao = secao
+        self.etapa = etapa
+
+    def _recreate_cm(self):
+        # como decorador, cada chamada usa uma instância própria
+        return medir(self.secao, self.etapa)
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duracao = time.perf_counter() - self._inicio
+        with _trava:
+            _buffer.append({
+                "ts": time.time(),
+                "pagina": getattr(_local, "pagina", ""),
+                "execucao": getattr(_local, "execucao", None),
+                "secao": self.secao,
+                "etapa": self.etapa,
+                "segundos": duracao,
+            })
+        return False
+
+
+def registrar_falha(secao, erro):
+    """Guarda um erro de cálculo em segundo plano, para o painel de diagnóstico."""
+    log.error("%s: %r", secao, erro, exc_info=erro)
+    with _trava:
+        _falhas.append({"ts": time.time(), "secao": secao, "erro": repr(erro)})
+
+
+def falhas():
+    with _trava:
+        return list(_falhas)
+
+
+def medicoes(pagina=None, execucao=None):
+    with _trava:
+        dados = list(_buffer)
+    if pagina is not None:
+        dados = [m for m in dados if m["pagina"] == pagina]
+    if execucao is not None:
+        dados = [m for m in dados if m["execucao"] == execucao]
+    return dados
+
+
+def resumo(pagina=None):
+    """Estatísticas por (página, seção, etapa): contagem, soma e quantis em segundos."""
+    grupos = {}
+    for m in medicoes(pagina):
+        grupos.setdefault((m["pagina"], m["secao"], m["etapa"]), []).append(m["segundos"])
+    linhas = []
+    for (pag, secao, etapa), valores in sorted(grupos.items()):
+        v = np.asarray(valores)
+        linhas.append({
+            "pagina": pag, "secao": secao, "etapa": etapa,
+            "n": len(v), "soma": float(v.sum()),
+            "p50": float(np.quantile(v, 0.5)), "p95": float(np.quantile(v, 0.95)),
+            "max": float(v.max()),
+        })
+    return linhas
+
+
+# -----------------------------
+# Exportação
+# -----------------------------
+def como_json():
+    return json.dumps(medicoes(), ensure_ascii=False, indent=1)
+
+
+def como_prometheus():
+    linhas = [
+        "# HELP ivg_secao_segundos Duração das seções instrumentadas das páginas.",
+        "# TYPE ivg_secao_segundos summary",
+    ]
+    for r in resumo():
+        rotulos = f'pagina="{r["pagina"]}",secao="{r["secao"]}",etapa="{r["etapa"]}"'
+        linhas.append(f'ivg_secao_segundos{{{rotulos},quantile="0.5"}} {r["p50"]:.6f}')
+        linhas.append(f'ivg_secao_segundos{{{rotulos},quantile="0.95"}} {r["p95"]:.6f}')
+        linhas.append(f"ivg_secao_segundos_sum{{{rotulos}}} {r['soma']:.6f}")
+        linhas.append(f"ivg_secao_segundos_count{{{rotulos}}} {r['n']}")
+    return "\n".join(linhas) + "\n"
@@ -0,0 +1,76 @@
+import pandas as pd
+
+import particoes
+
+# -----------------------------
+# Sobreposições e lacunas de períodos
+# -----------------------------
+# Varredura (sweep line) dos períodos de cada registro, ordenados por início
+# dentro de cada grupo: um rolo (Codigo) não pode estar em dois lugares ao
+# mesmo tempo, e o banho não tem duas campanhas ao mesmo tempo. Custa uma
+# ordenação, O(n log n), e uma passada. Movimentação sem Saída preenchida
+# termina na entrada seguinte do mesmo rolo (a troca de local fecha a
+# anterior); a última sem Saída segue em aberto. Entrar no mesmo dia em que
+# o anterior saiu não é sobreposição.
+GRUPOS = {"pote": "Codigo", "desengraxe": "Codigo", "tl": "Codigo", "banho": None}
+COLUNAS = ["tipo", "grupo", "ID", "outro_ID", "inicio", "fim", "dias"]
+SOBREPOSICAO, LACUNA = "Sobreposição", "Lacuna"
+EM_ABERTO = pd.Timestamp.max
+
+
+def _preparar(nome, df):
+    inicio, fim = particoes.COLUNAS[nome]
+    grupo = GRUPOS[nome]
+    p = pd.DataFrame({
+        "grupo": df[grupo].astype(str) if grupo else "banho",
+        "ID": df["ID"] if "ID" in df.columns else df.index.astype(str),
+        "ini": pd.to_datetime(df[inicio], format="%Y-%m-%d", errors="coerce"),
+        "fim": pd.to_datetime(df[fim], format="%Y-%m-%d", errors="coerce"),
+    })
+    p = p[p["ini"].notna() & (p["grupo"] != "")].sort_values(["grupo", "ini"], kind="stable")
+    # sem Saída: até a entrada seguinte do grupo (a última fica em aberto)
+    p["fim"] = p["fim"].fillna(p.groupby("grupo")["ini"].shift(-1))
+    return p
+
+
+def varrer(nome, df, lacuna_minima=1):
+    """
+    Sobreposições e lacunas (pelo menos `lacuna_minima` dias inteiros sem
+    registro entre dois períodos do grupo) em `df`, uma linha por ocorrência.
+    """
+    p = _preparar(nome, df)
+    ocorrencias = []
+    grupo_atual = maior_fim = dono = None
+    for grupo, id_, ini, fim in p[["grupo", "ID", "ini", "fim"]].itertuples(index=False):
+        fim = EM_ABERTO if pd.isna(fim) else fim
+        if grupo != grupo_atual:
+            grupo_atual, maior_fim, dono = grupo, fim, id_
+            continue
+        if ini < maior_fim:
+            ate = min(fim, maior_fim)
+            ocorrencias.append((SOBREPOSICAO, grupo, id_, dono, ini,
+                                None if ate == EM_ABERTO else ate, None if ate == EM_ABERTO else (ate - ini).days))
+        elif (ini - maior_fim).days - 1 >= lacuna_minima:
+            ocorrencias.append((LACUNA, grupo, dono, id_, maior_fim, ini, (ini - maior_fim).days - 1))
+        if fim > maior_fim:
+            maior_fim, dono = fim, id_
+    return pd.DataFrame(ocorrencias, columns=COLUNAS)
+
+
+def conferir_linhas(nome, df, linhas):
+    """
+    Verificação incremental: sobreposições que envolvem as `linhas` (dicts,
+    novas ou editadas) quando gravadas em `df`. Só os grupos das linhas são
+    varridos.
+    """
+    if df.empty:
+        return pd.DataFrame(columns=COLUNAS)
+    grupo = GRUPOS[nome]
+    novas = pd.DataFrame(linhas).astype(str)
+    ids = set(novas["ID"])
+    alvo = df[~df["ID"].astype(str).isin(ids)] if "ID" in df.columns else df
+    if grupo:
+        alvo = alvo[alvo[grupo].astype(str).isin(set(novas[grupo]))]
+    ocorrencias = varrer(nome, pd.concat([alvo.astype(str), novas], ignore_index=True))
+    envolvidas = ocorrencias["ID"].isin(ids) | ocorrencias["outro_ID"].isin(ids)
+    return ocorrencias[(ocorrencias["tipo"] == SOBREPOSICAO) & envolvidas]
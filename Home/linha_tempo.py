@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+# -----------------------------
+# Índice temporal das movimentações
+# -----------------------------
+class IndiceTemporal:
+    """
+    Índice de intervalos (Codigo, Entrada, Saída) montado uma vez por versão
+    dos dados. Cada código guarda suas entradas ordenadas, e a consulta
+    "onde estava em uma data" é uma busca binária por código.
+    """
+
+    def __init__(self, df, coluna_codigo="Codigo", coluna_entrada="Entrada", coluna_saida="Saída"):
+        df = df.copy()
+        df["_entrada"] = pd.to_datetime(df[coluna_entrada], errors="coerce")
+        df["_saida"] = pd.to_datetime(df[coluna_saida], errors="coerce") if coluna_saida in df.columns else pd.NaT
+        df = df[df["_entrada"].notna() & df[coluna_codigo].notna() & (df[coluna_codigo] != "")]
+        # ordenação estável: em empates de data vale a ordem de lançamento
+        df = df.sort_values([coluna_codigo, "_entrada"], kind="stable").reset_index(drop=True)
+
+        self.linhas = df.drop(columns=["_entrada", "_saida"])
+        self.entradas = df["_entrada"].to_numpy(dtype="datetime64[ns]")
+        self.saidas = df["_saida"].to_numpy(dtype="datetime64[ns]")
+
+        codigos = df[coluna_codigo].to_numpy()
+        inicio = np.flatnonzero(np.r_[True, codigos[1:] != codigos[:-1]]) if len(codigos) else np.array([], dtype=int)
+        fim = np.r_[inicio[1:], len(codigos)]
+        self.faixas = {codigos[i]: (i, f) for i, f in zip(inicio, fim)}
+
+    def posicao(self, codigo, data):
+        """Índice (em self.linhas) do registro vigente do código na data, ou None."""
+        if codigo not in self.faixas:
+            return None
+        ini, fim = self.faixas[codigo]
+        alvo = np.datetime64(pd.Timestamp(data), "ns")
+        i = ini + np.searchsorted(self.entradas[ini:fim], alvo, side="right") - 1
+        if i < ini:
+            return None
+        saida = self.saidas[i]
+        if not np.isnat(saida) and saida < alvo:
+            return None
+        return i
+
+    def em(self, data):
+        """Registro vigente de cada código na data (códigos sem registro ficam de fora)."""
+        posicoes = [self.posicao(codigo, data) for codigo in self.faixas]
+        posicoes = [p for p in posicoes if p is not None]
+        return self.linhas.iloc[posicoes]
+
+    def periodo(self):
+        if not len(self.entradas):
+            return None, None
+        return pd.Timestamp(self.entradas.min()).date(), pd.Timestamp(self.entradas.max()).date()
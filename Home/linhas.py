@@ -0,0 +1,138 @@
+import contextvars
+import copy
+import json
+import os
+from contextlib import contextmanager
+
+# -----------------------------
+# Linhas de galvanização
+# -----------------------------
+# Um mesmo deploy atende várias linhas. Cada linha tem sua pasta de dados
+# (CSVs, diário, partições, resumos, snapshots, relatórios e rolls.db) e seus
+# mapas de localização (imagem da planta e coordenadas de cada local).
+# A linha padrão continua em data/ e rolls.db, como antes; as demais ficam em
+# data/linhas/<codigo>/. Para incluir uma linha, acrescente-a em linhas.json,
+# na raiz do projeto (as chaves omitidas herdam da linha padrão):
+#   {"IVG2": {"nome": "Linha 2", "mapas": {"pote": {"imagem": "nova.png"}}}}
+# A linha em uso vem da sessão do Streamlit (seletor da barra lateral, ver
+# componentes.seletor_linha) ou, fora dela (threads de fundo, API, linha de
+# comando), de usar(); o padrão pode ser trocado com IVG_LINHA.
+CONFIGURACAO = "linhas.json"
+PASTA_LINHAS = os.path.join("data", "linhas")
+
+LINHAS = {
+    "IVG": {
+        "nome": "IVG",
+        "pasta": "data",
+        "banco": "rolls.db",
+        "mapas": {
+            "pote": {
+                "imagem": "decusi.png",
+                "locais": {"Em linha": (250, 505), "Oficina OCP": (250, 630),
+                           "Usinagem": (250, 225), "Revestimento": (250, 78)},
+            },
+            "desengraxe": {
+                "imagem": "desen.png",
+                "locais": {"Em linha": (75, 670), "Oficina OCP": (250, 630),
+                           "Usinagem": (250, 225), "Revestimento": (250, 78)},
+            },
+        },
+    },
+}
+
+
+def _mesclar(base, extra):
+    resultado = copy.deepcopy(base)
+    for chave, valor in extra.items():
+        if isinstance(valor, dict) and isinstance(resultado.get(chave), dict):
+            resultado[chave] = _mesclar(resultado[chave], valor)
+        else:
+            resultado[chave] = valor
+    return resultado
+
+
+def _carregar():
+    if not os.path.exists(CONFIGURACAO):
+        return
+    with open(CONFIGURACAO, encoding="utf-8") as f:
+        extras = json.load(f)
+    base = next(iter(LINHAS.values()))
+    for codigo, cfg in extras.items():
+        if codigo in LINHAS:
+            LINHAS[codigo] = _mesclar(LINHAS[codigo], cfg)
+            continue
+        pasta = cfg.get("pasta", os.path.join(PASTA_LINHAS, codigo))
+        padrao = {**base, "nome": codigo, "pasta": pasta, "banco": os.path.join(pasta, "rolls.db")}
+        LINHAS[codigo] = _mesclar(padrao, cfg)
+
+
+_carregar()
+PADRAO = os.environ.get("IVG_LINHA", next(iter(LINHAS)))
+if PADRAO not in LINHAS:
+    raise ValueError(f"IVG_LINHA desconhecida: {PADRAO}")
+
+_atual = contextvars.ContextVar("linha", default=None)
+
+
+def codigos():
+    return list(LINHAS)
+
+
+def nome(linha=None):
+    return LINHAS[linha or atual()]["nome"]
+
+
+def _da_sessao():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    import streamlit as st
+
+    return st.session_state.get("linha")
+
+
+def atual():
+    """Linha em uso: a de usar(), senão a da sessão do Streamlit, senão PADRAO."""
+    linha = _atual.get() or _da_sessao() or PADRAO
+    return linha if linha in LINHAS else PADRAO
+
+
+@contextmanager
+def usar(linha):
+    """Executa o bloco na `linha` (threads de fundo, API, linha de comando)."""
+    if linha not in LINHAS:
+        raise KeyError(f"linha desconhecida: {linha}")
+    token = _atual.set(linha)
+    try:
+        yield
+    finally:
+        _atual.reset(token)
+
+
+def definir(linha):
+    """Fixa a linha no contexto atual até o fim dele (uma requisição da API)."""
+    if linha not in LINHAS:
+        raise KeyError(f"linha desconhecida: {linha}")
+    _atual.set(linha)
+
+
+def pasta(linha=None):
+    return LINHAS[linha or atual()]["pasta"]
+
+
+def banco(linha=None):
+    return LINHAS[linha or atual()]["banco"]
+
+
+def mapa(equipamento, linha=None):
+    """(imagem de fundo, {local: (x, y)}) do mapa de localização do equipamento na linha."""
+    cfg = LINHAS[linha or atual()]["mapas"][equipamento]
+    return cfg["imagem"], {local: tuple(xy) for local, xy in cfg["locais"].items()}
+
+
+def por_linha(entradas):
+    """max_entries dos caches do Streamlit: `entradas` por linha, sem uma linha expulsar a outra."""
+    return entradas * len(LINHAS)
@@ -0,0 +1,215 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+import armazenamento
+import desgaste
+import diario
+import linhas
+import particoes
+import relatorio
+
+log = logging.getLogger(__name__)
+
+# -----------------------------
+# Manutenção periódica de data/
+# -----------------------------
+# Uma thread por processo verifica a cada 10 minutos se já se passaram
+# INTERVALO_HORAS desde a última manutenção de qualquer worker (trava +
+# manifesto) e, se sim, executa:
+# 1. snapshot gzip de cada registro e do rolls.db, com SHA-256 no manifesto;
+# 2. descarte dos snapshots além de MANTER_SNAPSHOTS por registro;
+# 3. só quando pedido (--arquivar, ou IVG_ARQUIVAR=1 para o agendador):
+#    arquivamento das movimentações encerradas há mais de DIAS_QUENTES dias
+#    nas partições mensais (particoes.py), mantendo o CSV quente pequeno;
+# 4. rotação do diário que passar de TAMANHO_MAXIMO_DIARIO bytes.
+# Cada linha de galvanização (linhas.py) tem seus snapshots e seu manifesto,
+# na própria pasta de dados; o agendador percorre todas.
+# Também pode ser executada à mão, a partir da raiz do projeto:
+#   python Home/manutencao.py            -> executa agora (linha padrão; IVG_LINHA para outra)
+#   python Home/manutencao.py --arquivar -> executa agora, com o arquivamento
+#   python Home/manutencao.py --verificar -> confere os checksums dos snapshots
+#
+# O que a aplicação cria na pasta de dados de cada linha:
+# - arquivo/: partições com as linhas arquivadas (particoes.py). Não é cópia
+#   nem cache: depois do arquivamento é o único lugar dessas linhas, por isso
+#   fica versionado no git junto com os CSVs (só os .tmp são ignorados);
+# fora do git (ver .gitignore):
+# - diario/: diário de alterações e checkpoints (diario.py);
+# - snapshots/: cópias gzip dos registros e do rolls.db, com o manifesto desta manutenção;
+# - resumo/, anomalias/, relatorios/: derivados, refeitos a partir dos registros.
+INTERVALO_HORAS = 6
+MANTER_SNAPSHOTS = 30
+DIAS_QUENTES = 365
+ARQUIVAR = os.environ.get("IVG_ARQUIVAR") == "1"  # arquivamento também no agendador
+TAMANHO_MAXIMO_DIARIO = 5 * 1024 * 1024
+
+ROTACIONAVEIS = tuple(particoes.COLUNAS)  # registros com período (início/fim) por linha
+
+_iniciado = False
+_trava = threading.Lock()
+
+
+def _pasta():
+    return os.path.join(linhas.pasta(), "snapshots")
+
+
+def _manifesto():
+    return os.path.join(_pasta(), "manifesto.json")
+
+
+def _ler_manifesto():
+    if not os.path.exists(_manifesto()):
+        return {"ultima_execucao": 0, "snapshots": []}
+    with open(_manifesto(), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _salvar_manifesto(manifesto):
+    tmp = _manifesto() + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, indent=1)
+    os.replace(tmp, _manifesto())
+
+
+def _gravar_snapshot(manifesto, registro, conteudo, instante):
+    dados = gzip.compress(conteudo)
+    arquivo = f"{registro}-{instante}.gz"
+    with open(os.path.join(_pasta(), arquivo), "wb") as f:
+        f.write(dados)
+    manifesto["snapshots"].append({
+        "arquivo": arquivo, "registro": registro, "ts": time.time(),
+        "bytes": len(dados), "sha256": hashlib.sha256(dados).hexdigest(),
+    })
+
+
+# -----------------------------
+# Etapas
+# -----------------------------
+def snapshots(manifesto):
+    os.makedirs(_pasta(), exist_ok=True)
+    instante = datetime.now().strftime("%Y%m%d-%H%M%S")
+    for nome in armazenamento.REGISTROS:
+        if armazenamento.versao(nome) is None:
+            continue
+        with armazenamento.trava(nome):
+            with open(armazenamento.caminho(nome), "rb") as f:
+                conteudo = f.read()
+        _gravar_snapshot(manifesto, nome, conteudo, instante)
+
+    if os.path.exists(linhas.banco()):
+        # backup online do SQLite: cópia consistente mesmo com gravações em andamento
+        with tempfile.TemporaryDirectory() as pasta:
+            copia = os.path.join(pasta, "rolls.db")
+            origem, destino = desgaste.conectar(), sqlite3.connect(copia)
+            try:
+                origem.backup(destino)
+            finally:
+                destino.close()
+                origem.close()
+            with open(copia, "rb") as f:
+                _gravar_snapshot(manifesto, "rolls", f.read(), instante)
+
+
+def podar(manifesto):
+    por_registro = {}
+    for s in manifesto["snapshots"]:
+        por_registro.setdefault(s["registro"], []).append(s)
+    manter = []
+    for lista in por_registro.values():
+        lista.sort(key=lambda s: s["ts"])
+        for s in lista[:-MANTER_SNAPSHOTS]:
+            try:
+                os.remove(os.path.join(_pasta(), s["arquivo"]))
+            except FileNotFoundError:
+                pass
+        manter += lista[-MANTER_SNAPSHOTS:]
+    manifesto["snapshots"] = sorted(manter, key=lambda s: s["ts"])
+
+
+def verificar():
+    """Confere o SHA-256 de cada snapshot do manifesto. Retorna [(arquivo, ok)]."""
+    resultado = []
+    for s in _ler_manifesto()["snapshots"]:
+        try:
+            with open(os.path.join(_pasta(), s["arquivo"]), "rb") as f:
+                ok = hashlib.sha256(f.read()).hexdigest() == s["sha256"]
+        except FileNotFoundError:
+            ok = False
+        resultado.append((s["arquivo"], ok))
+    return resultado
+
+
+def executar(forcar=True, arquivar=False):
+    """
+    Executa as etapas e retorna um resumo; o arquivamento só com `arquivar`.
+    Com vários workers, só um executa por vez (trava de arquivo); sem
+    `forcar`, nada é feito se outro worker já executou dentro do intervalo.
+    """
+    os.makedirs(_pasta(), exist_ok=True)
+    with open(os.path.join(_pasta(), "manutencao.lock"), "a") as trava:
+        if fcntl:
+            fcntl.flock(trava, fcntl.LOCK_EX)
+        manifesto = _ler_manifesto()
+        if not forcar and time.time() - manifesto["ultima_execucao"] < INTERVALO_HORAS * 3600:
+            return None
+        snapshots(manifesto)
+        podar(manifesto)
+        for nome in ROTACIONAVEIS:
+            particoes.migrar(nome)
+        arquivadas = {nome: armazenamento.arquivar_antigos(nome, DIAS_QUENTES) for nome in ROTACIONAVEIS
+                      if arquivar and armazenamento.versao(nome) is not None}
+        diarios = [nome for nome in armazenamento.REGISTROS if diario.tamanho(nome) > TAMANHO_MAXIMO_DIARIO]
+        for nome in diarios:
+            with armazenamento.trava(nome):
+                diario.arquivar(nome)
+        manifesto["ultima_execucao"] = time.time()
+        _salvar_manifesto(manifesto)
+    return {"snapshots": len(manifesto["snapshots"]), "arquivadas": arquivadas, "diarios_rotacionados": diarios}
+
+
+# -----------------------------
+# Agendamento
+# -----------------------------
+def _laco():
+    while True:
+        for linha in linhas.codigos():
+            try:
+                with linhas.usar(linha):
+                    executar(forcar=False, arquivar=ARQUIVAR)
+                    relatorio.solicitar()  # relatório da semana, se ainda não houver (em outro processo)
+            except Exception:  # a manutenção nunca derruba o app; tenta de novo no próximo ciclo
+                log.exception("manutencao %s", linha)
+        time.sleep(600)
+
+
+def iniciar():
+    """Inicia o agendador (uma vez por processo)."""
+    global _iniciado
+    with _trava:
+        if _iniciado:
+            return
+        _iniciado = True
+    threading.Thread(target=_laco, daemon=True, name="manutencao").start()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--verificar" in sys.argv:
+        for arquivo, ok in verificar():
+            print(f"{'ok    ' if ok else 'FALHOU'} {arquivo}")
+    else:
+        print(executar(arquivar="--arquivar" in sys.argv))
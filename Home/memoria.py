@@ -0,0 +1,176 @@
+import os
+import pickle
+import sys
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+
+# -----------------------------
+# Memória das sessões
+# -----------------------------
+# Telas de acompanhamento ficam abertas por dias. Os caches de dados e figuras
+# são do processo (st.cache_*, derivados.py, notificacao.espelho) e têm
+# tamanho limitado; o que cresce por sessão é o st.session_state (estado dos
+# widgets, como as áreas de texto obs_<ID> dos editores, e o que mais for
+# guardado nela).
+# Cada sessão se contabiliza nas próprias execuções (contabilizar(), chamado
+# ao fim de cada página e nas atualizações automáticas): o tamanho estimado de
+# cada entrada vai para um registro do processo, exibido no diagnóstico
+# (?diag=1). Na mesma chamada, e só na própria thread da sessão (o Streamlit
+# não permite mexer no estado de outra sessão), as entradas grandes guardadas
+# pela aplicação são descartadas quando:
+# - a sessão passa de ORCAMENTO_MB (as maiores primeiro, até caber), ou
+# - está sem interação (execução completa da página) há OCIOSA_MINUTOS.
+# Entradas menores que MINIMO_DESCARTE (filtros, seleções) e as de
+# PERMANENTES nunca são descartadas. O estado dos widgets exibidos entra na
+# conta, mas não é descartado: o navegador o reenvia a cada execução, e o
+# Streamlit já o libera quando o widget deixa de ser exibido.
+# tracemalloc (alocações do processo por arquivo e linha, com diferença entre
+# snapshots) é ligado no diagnóstico ou desde a subida com IVG_TRACEMALLOC=<quadros>.
+ORCAMENTO_MB = float(os.environ.get("IVG_ORCAMENTO_SESSAO_MB", 64))
+OCIOSA_MINUTOS = float(os.environ.get("IVG_SESSAO_OCIOSA_MIN", 30))
+MINIMO_DESCARTE = 64 * 1024  # bytes
+PERMANENTES = {"linha", "_linha", "operador"}
+EXPIRA_HORAS = 24  # sessões sem nenhuma execução há mais tempo saem do registro
+QUADROS = int(os.environ.get("IVG_TRACEMALLOC", 0))
+
+_trava = threading.Lock()
+_sessoes = {}  # id da sessão -> {"pagina", "interacao", "execucao", "bytes", "entradas", "descartes"}
+_snapshots = []  # [(instante, snapshot)]: os dois últimos
+
+if QUADROS and not tracemalloc.is_tracing():
+    tracemalloc.start(QUADROS)
+
+
+def tamanho(valor):
+    """Bytes estimados de um valor guardado na sessão."""
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(deep=True).sum())
+    if isinstance(valor, pd.Series):
+        return int(valor.memory_usage(deep=True))
+    try:
+        return len(pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:  # não serializável (travas, conexões): só o objeto em si
+        return sys.getsizeof(valor)
+
+
+def _widgets(ctx):
+    from streamlit.runtime.state.common import is_keyed_element_id, user_key_from_element_id
+
+    return {user_key_from_element_id(w.id) for w in ctx.session_state.get_widget_states()
+            if is_keyed_element_id(w.id)}
+
+
+def _descartar(estado, tamanhos, protegidas, ociosa):
+    orcamento = ORCAMENTO_MB * 1024 * 1024
+    total = sum(tamanhos.values())
+    descartadas = []
+    for chave, n in sorted(tamanhos.items(), key=lambda kv: kv[1], reverse=True):
+        if n < MINIMO_DESCARTE or (total <= orcamento and not ociosa):
+            break
+        if chave in PERMANENTES or chave in protegidas:
+            continue
+        del estado[chave]
+        total -= n
+        descartadas.append(chave)
+    return descartadas
+
+
+def contabilizar(pagina="", interacao=True):
+    """
+    Mede o st.session_state da sessão em execução, registra e descarta o que
+    passar do orçamento (ver acima). `interacao`: False nas atualizações
+    automáticas, que não contam como uso da tela. Retorna as chaves descartadas.
+    """
+    import streamlit as st
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is None:
+        return []
+    agora = time.time()
+    with _trava:
+        sessao = _sessoes.setdefault(ctx.session_id, {"pagina": pagina, "interacao": agora, "descartes": 0})
+        if interacao:
+            sessao["interacao"] = agora
+        ociosa = agora - sessao["interacao"] > OCIOSA_MINUTOS * 60
+
+    estado = st.session_state
+    tamanhos = {chave: tamanho(valor) for chave, valor in estado.to_dict().items()}
+    descartadas = _descartar(estado, tamanhos, _widgets(ctx), ociosa)
+    for chave in descartadas:
+        tamanhos.pop(chave)
+
+    with _trava:
+        sessao.update(pagina=pagina or sessao["pagina"], execucao=agora, bytes=sum(tamanhos.values()),
+                      entradas=sorted(tamanhos.items(), key=lambda kv: kv[1], reverse=True)[:5])
+        sessao["descartes"] += len(descartadas)
+        for id_, s in list(_sessoes.items()):
+            if agora - s.get("execucao", agora) > EXPIRA_HORAS * 3600:
+                del _sessoes[id_]
+    return descartadas
+
+
+def sessoes():
+    """Uma linha por sessão registrada neste processo, da que ocupa mais para a que ocupa menos."""
+    agora = time.time()
+    with _trava:
+        linhas = [{
+            "sessao": id_[:8], "pagina": s["pagina"], "MB": round(s.get("bytes", 0) / 1024 / 1024, 2),
+            "ociosa (min)": round((agora - s["interacao"]) / 60, 1), "descartes": s["descartes"],
+            "maiores entradas": ", ".join(f"{k} ({n / 1024:.0f} KB)" for k, n in s.get("entradas", [])),
+        } for id_, s in _sessoes.items()]
+    return sorted(linhas, key=lambda l: l["MB"], reverse=True)
+
+
+def rss():
+    """Memória residente do processo em bytes, ou None fora do Linux."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# -----------------------------
+# tracemalloc
+# -----------------------------
+def ativar(quadros=10):
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(quadros)
+
+
+def desativar():
+    tracemalloc.stop()
+    with _trava:
+        _snapshots.clear()
+
+
+def snapshot():
+    """Tira um snapshot das alocações (guarda os dois últimos, para a diferença)."""
+    instantaneo = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ])
+    with _trava:
+        _snapshots.append((time.time(), instantaneo))
+        del _snapshots[:-2]
+
+
+def maiores(n=15, agrupar="lineno"):
+    """
+    Maiores alocações do último snapshot, agrupadas por "lineno" ou "filename",
+    com a variação em relação ao anterior (quando houver).
+    """
+    with _trava:
+        if not _snapshots:
+            return []
+        atual = _snapshots[-1][1]
+        anterior = _snapshots[-2][1] if len(_snapshots) > 1 else None
+    estatisticas = atual.compare_to(anterior, agrupar) if anterior else atual.statistics(agrupar)
+    return [{
+        "local": str(s.traceback[0]), "KB": round(s.size / 1024, 1), "blocos": s.count,
+        "variação (KB)": round(getattr(s, "size_diff", 0) / 1024, 1),
+    } for s in estatisticas[:n]]
@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+
+import armazenamento
+import diario
+import linhas
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # sem watchdog: verificação periódica do mtime
+    FileSystemEventHandler = object
+    Observer = None
+
+# -----------------------------
+# Aviso de alterações nos registros
+# -----------------------------
+# Uma thread por processo observa a pasta de dados de cada linha (inotify via
+# watchdog, ou os.stat a cada segundo sem watchdog) e incrementa um contador
+# por linha e registro a cada gravação, venha ela deste worker, de outro
+# worker ou da API.
+# As telas de acompanhamento consultam o contador em memória a cada
+# INTERVALO segundos e só então leem as novidades (ver espelho()).
+INTERVALO = 5  # segundos entre verificações das telas abertas
+
+_contadores = {(linha, nome): 0 for linha in linhas.codigos() for nome in armazenamento.REGISTROS}
+_trava = threading.Lock()
+_iniciado = False
+
+# (linha, nome) -> {"versao", "df"}
+_espelhos = {}
+_trava_espelhos = threading.Lock()
+
+
+def _avisar(chave):
+    with _trava:
+        _contadores[chave] += 1
+
+
+def _versao(chave):
+    linha, nome = chave
+    with linhas.usar(linha):
+        return armazenamento.versao(nome)
+
+
+class _Observador(FileSystemEventHandler):
+    def __init__(self, linha):
+        self.arquivos = {cfg["arquivo"]: (linha, nome) for nome, cfg in armazenamento.REGISTROS.items()}
+
+    def on_any_event(self, evento):
+        # o arquivo é trocado por os.replace (moved) ou reescrito (modified)
+        if evento.event_type not in ("created", "modified", "moved"):
+            return
+        for caminho in (evento.src_path, getattr(evento, "dest_path", "")):
+            chave = self.arquivos.get(os.path.basename(caminho))
+            if chave:
+                _avisar(chave)
+
+
+def _verificar_periodicamente():
+    vistas = {chave: _versao(chave) for chave in _contadores}
+    while True:
+        time.sleep(1)
+        for chave in _contadores:
+            v = _versao(chave)
+            if v != vistas[chave]:
+                vistas[chave] = v
+                _avisar(chave)
+
+
+def iniciar():
+    """Inicia a observação das pastas de dados das linhas (uma vez por processo)."""
+    global _iniciado
+    with _trava:
+        if _iniciado:
+            return
+        _iniciado = True
+    for linha in linhas.codigos():
+        os.makedirs(linhas.pasta(linha), exist_ok=True)
+    if Observer is not None:
+        observador = Observer()
+        observador.daemon = True
+        for linha in linhas.codigos():
+            observador.schedule(_Observador(linha), os.path.abspath(linhas.pasta(linha)), recursive=False)
+        observador.start()
+    else:
+        threading.Thread(target=_verificar_periodicamente, daemon=True).start()
+
+
+def contador(nome):
+    """Número de alterações do registro, na linha em uso, vistas por este processo desde o início."""
+    iniciar()
+    return _contadores[(linhas.atual(), nome)]
+
+
+# -----------------------------
+# Cópia em memória atualizada pelo diário
+# -----------------------------
+def _ler(nome):
+    # sem a trava do registro: o arquivo é trocado por os.replace, então a leitura
+    # é sempre de uma versão inteira; se a versão mudou no meio, não se sabe qual
+    for _ in range(3):
+        versao = armazenamento.versao(nome)
+        df = armazenamento.ler_texto(nome)
+        if armazenamento.versao(nome) == versao:
+            return df, versao
+    return df, None  # None: relido por inteiro na próxima chamada
+
+
+def espelho(nome):
+    """
+    Registro em memória (colunas como string), compartilhado pelas sessões
+    do processo. Quando o arquivo muda, só as entradas novas do diário são
+    lidas e aplicadas, se elas explicam a mudança de versão
+    (diario.entradas_entre); o CSV é relido por inteiro na primeira vez e
+    sempre que houve gravação fora do diário ou rotação do diário.
+    Não usa a trava de gravação: numa queda simulada continua servindo a
+    cópia. O DataFrame retornado não deve ser alterado.
+    """
+    iniciar()
+    chave = (linhas.atual(), nome)
+    with _trava_espelhos:
+        atual = _espelhos.get(chave)
+        versao = armazenamento.versao(nome)
+        if atual and atual["versao"] == versao:
+            return atual["df"]
+
+        entradas = diario.entradas_entre(nome, atual["versao"], versao) if atual else None
+        if entradas is not None:
+            df = atual["df"]
+            for entrada in entradas:
+                df = diario.aplicar(df, entrada, armazenamento.chave(nome))
+        else:
+            df, versao = _ler(nome)
+
+        _espelhos[chave] = {"versao": versao, "df": df}
+        return df
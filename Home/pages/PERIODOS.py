@@ -0,0 +1,76 @@
+import streamlit as st
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import aquecimento
+import armazenamento
+import componentes
+import instrumentacao
+import intervalos
+import linhas
+import manutencao
+import particoes
+
+# -----------------------------
+# Configurações Iniciais
+# -----------------------------
+st.set_page_config(page_title="Conferência de períodos – IVG", layout="wide")
+instrumentacao.nova_execucao("periodos")
+manutencao.iniciar()
+aquecimento.iniciar()
+componentes.seletor_linha()
+st.title("🧭 Conferência de períodos")
+st.caption("Sobreposições e lacunas em todo o histórico (arquivo quente e partições arquivadas). "
+           "Um rolo não pode estar em dois lugares ao mesmo tempo, nem o banho em duas campanhas.")
+
+REGISTROS = {
+    "pote": "Pote (rolos de fundo)",
+    "desengraxe": "Desengraxe",
+    "tl": "Tension leveller",
+    "banho": "Banho (campanhas)",
+}
+
+
+@st.cache_data(max_entries=linhas.por_linha(8))
+@instrumentacao.medir("varrer", "transform")
+def ocorrencias(nome, versao, versao_arquivo, lacuna_minima):
+    # varredura completa, refeita só quando o registro ou o arquivo mudam
+    df = armazenamento.ler_com_arquivo(nome)
+    resultado = intervalos.varrer(nome, df, lacuna_minima)
+    # contexto das linhas envolvidas, para não obrigar a procurar os IDs
+    inicio, fim = particoes.COLUNAS[nome]
+    rotulos = df.set_index("ID")[inicio] + " → " + df.set_index("ID")[fim].replace("", "…")
+    resultado["período"] = resultado["ID"].map(rotulos)
+    resultado["outro período"] = resultado["outro_ID"].map(rotulos)
+    return resultado
+
+
+nome = st.sidebar.radio("Registro", list(REGISTROS), format_func=REGISTROS.get)
+lacuna_minima = st.sidebar.number_input("Lacuna mínima (dias)", min_value=1, value=1, step=1)
+
+if armazenamento.versao(nome) is None:
+    st.info("Registro ainda sem dados.")
+    st.stop()
+
+resultado = ocorrencias(nome, armazenamento.versao(nome), particoes.versao(nome), lacuna_minima)
+sobreposicoes = resultado[resultado["tipo"] == intervalos.SOBREPOSICAO].drop(columns="tipo")
+lacunas = resultado[resultado["tipo"] == intervalos.LACUNA].drop(columns="tipo")
+
+c1, c2 = st.columns(2)
+c1.metric("Sobreposições", len(sobreposicoes))
+c2.metric(f"Lacunas de {lacuna_minima}+ dia(s)", len(lacunas))
+
+st.subheader("Sobreposições")
+if sobreposicoes.empty:
+    st.success("✅ Nenhum período sobreposto.")
+else:
+    st.dataframe(sobreposicoes, use_container_width=True, hide_index=True)
+
+st.subheader("Lacunas")
+if lacunas.empty:
+    st.success("✅ Nenhuma lacuna.")
+else:
+    st.dataframe(lacunas.sort_values("dias", ascending=False), use_container_width=True, hide_index=True)
+
+componentes.painel_diagnostico()
@@ -1,16 +1,31 @@
 import streamlit as st
 import pandas as pd
 import os
+import sys
+import uuid
 from datetime import datetime
-import plotly.express as px
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import aquecimento
+import armazenamento
+import componentes
+import indicadores
+import fila
+import instrumentacao
+import linhas
+import manutencao
+import validacao
 
 # -----------------------------
 # Configurações Iniciais
 # -----------------------------
 st.set_page_config(page_title="Controle de Equipamentos do Banho – OCP", layout="wide")
-DATA_FOLDER = "data"
-FILE_PATH = os.path.join(DATA_FOLDER, "equipamentos_banho.csv")
-os.makedirs(DATA_FOLDER, exist_ok=True)
+instrumentacao.nova_execucao("banho")
+manutencao.iniciar()
+aquecimento.iniciar()
+componentes.seletor_linha()
+FILE_PATH = armazenamento.caminho("banho")
+os.makedirs(os.path.dirname(FILE_PATH), exist_ok=True)
 
 # -----------------------------
 # Funções Auxiliares
@@ -18,49 +33,43 @@ os.makedirs(DATA_FOLDER, exist_ok=True)
 def init_csv():
     if not os.path.exists(FILE_PATH):
         df = pd.DataFrame(columns=[
-            "Data_Registro", "Campanha", "Data_Inicio", "Data_Fim",
+            "ID", "Data_Registro", "Campanha", "Data_Inicio", "Data_Fim",
             "Conjunto_Titular", "Rolo_Titular", "Diametro_Titular", "Navalha_Titular", "Baffles_Titular",
             "Conjunto_Reserva", "Rolo_Reserva", "Diametro_Reserva", "Navalha_Reserva", "Baffles_Reserva",
             "Tromba", "Observacoes"
         ])
         df.to_csv(FILE_PATH, index=False)
 
-def load_data():
+@st.cache_data(max_entries=linhas.por_linha(2))
+@instrumentacao.medir("load_data", "load")
+def _read_csv(versao):
     # força leitura como string para evitar cast automático com vírgulas
-    return pd.read_csv(FILE_PATH, dtype=str).fillna("")
+    return armazenamento.ler("banho", dtype=str).fillna("")
 
-def save_data(new_data):
-    df = load_data()
-    df = pd.concat([df, pd.DataFrame([new_data])], ignore_index=True)
-    df.to_csv(FILE_PATH, index=False)
+def load_data():
+    # relê o disco só quando o arquivo muda; cada chamada recebe sua própria cópia
+    return _read_csv(armazenamento.versao("banho"))
 
+@instrumentacao.medir("save_data", "write")
+def save_data(new_data):
+    try:
+        if fila.incluir("banho", new_data, componentes.operador()):
+            componentes.avisar_periodos("banho", load_data(), new_data)
+        else:
+            componentes.avisar_fila()
+    except validacao.DadosInvalidos as e:
+        componentes.mostrar_problemas(e)
+        st.stop()
+
+@instrumentacao.medir("overwrite_data", "write")
 def overwrite_data(df):
     # garante salvar sem índices e com string coerente
-    df.to_csv(FILE_PATH, index=False)
-
-def safe_float(value, default=0.0):
-    """
-    Converte uma string ou número para float tratando:
-    - valores com vírgula (e.g. '597,5')
-    - strings vazias
-    - valores não conversíveis
-    """
-    if pd.isna(value):
-        return default
-    if isinstance(value, (int, float)):
-        try:
-            return float(value)
-        except:
-            return default
-    s = str(value).strip()
-    if s == "":
-        return default
-    # troca vírgula por ponto e remove espaços
-    s = s.replace(",", ".").replace(" ", "")
     try:
-        return float(s)
-    except:
-        return default
+        if not fila.gravar("banho", df, componentes.operador()):
+            componentes.avisar_fila()
+    except validacao.DadosInvalidos as e:
+        componentes.mostrar_problemas(e)
+        st.stop()
 
 init_csv()
 
@@ -68,13 +77,19 @@ init_csv()
 # Interface Principal
 # -----------------------------
 st.title("🧰 Controle de Equipamentos do Banho – OCP")
+componentes.campo_operador()
+componentes.painel_fila()
+componentes.mostrar_aviso()
 
+# cada aba é um fragmento: filtros e botões de uma aba reexecutam só ela
 abas = st.tabs(["📝 Lançar Dados", "📊 Histórico", "📈 Indicadores", "✏️ Editar / Excluir Registros"])
 
 # -----------------------------
 # 📝 Aba 1 – Lançar Novo Registro
 # -----------------------------
-with abas[0]:
+@st.fragment
+@instrumentacao.medir("aba_lancar")
+def aba_lancar():
     st.header("Lançar Novo Registro")
 
     with st.form("form_equipamentos"):
@@ -113,6 +128,7 @@ with abas[0]:
         if submitted:
             if data_fim >= data_inicio:
                 new_entry = {
+                    "ID": str(uuid.uuid4()),
                     "Data_Registro": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                     "Campanha": campanha,
                     "Data_Inicio": data_inicio.strftime("%Y-%m-%d"),
@@ -132,36 +148,29 @@ with abas[0]:
                     "Observacoes": obs
                 }
                 save_data(new_entry)
-                st.success("✅ Registro salvo com sucesso!")
+                componentes.recarregar_com_aviso("✅ Registro salvo com sucesso!")
             else:
                 st.error("❌ Corrija as datas antes de salvar.")
 
 # -----------------------------
 # 📊 Aba 2 – Histórico
 # -----------------------------
-with abas[1]:
+@st.fragment
+@instrumentacao.medir("aba_historico")
+def aba_historico():
     st.header("Histórico de Registros")
     df = load_data()
 
     if df.empty or len(df) == 0:
         st.info("Nenhum registro encontrado ainda.")
     else:
+        # período primeiro: só as partições arquivadas que cruzam o período são abertas
+        df_hist = componentes.filtro_periodo("banho", df, key="periodo_banho",
+                                             rotulo="Filtrar por Período (início da campanha)")
         campanha_filtro = st.multiselect("Filtrar por Campanha", df["Campanha"].unique(), key="filtro_historico")
-        df_hist = df.copy()
         if campanha_filtro:
             df_hist = df_hist[df_hist["Campanha"].isin(campanha_filtro)]
 
-        # tenta converter datas com segurança
-        df_hist["Data_Inicio"] = pd.to_datetime(df_hist["Data_Inicio"], errors="coerce")
-        df_hist["Data_Fim"] = pd.to_datetime(df_hist["Data_Fim"], errors="coerce")
-        if not df_hist["Data_Inicio"].isna().all():
-            min_date = df_hist["Data_Inicio"].min().date()
-            max_date = df_hist["Data_Fim"].max().date() if not df_hist["Data_Fim"].isna().all() else df_hist["Data_Inicio"].max().date()
-            periodo = st.date_input("Filtrar por Período", [min_date, max_date])
-            if len(periodo) == 2:
-                mask = (df_hist["Data_Inicio"].dt.date >= periodo[0]) & (df_hist["Data_Fim"].dt.date <= periodo[1])
-                df_hist = df_hist.loc[mask]
-
         df_hist["Tromba"] = df_hist["Tromba"].replace("", "—")
         st.dataframe(df_hist, use_container_width=True)
 
@@ -171,47 +180,24 @@ with abas[1]:
 # -----------------------------
 # 📈 Aba 3 – Indicadores
 # -----------------------------
-with abas[2]:
+@st.fragment
+@instrumentacao.medir("aba_indicadores")
+def aba_indicadores():
     st.header("Indicadores e Gráficos")
-    df = load_data()
-
-    if not df.empty and len(df) > 0:
-        # converter datas de forma resistente
-        df["Data_Inicio"] = pd.to_datetime(df["Data_Inicio"], errors="coerce")
-        df["Data_Fim"] = pd.to_datetime(df["Data_Fim"], errors="coerce")
-        df["Tempo_Banho_dias"] = (df["Data_Fim"] - df["Data_Inicio"]).dt.days
-
-        # converter diâmetros com safe_float
-        df["Diametro_Titular"] = df["Diametro_Titular"].apply(safe_float)
-        df["Diametro_Reserva"] = df["Diametro_Reserva"].apply(safe_float)
+    dados, atual = indicadores.banho()
 
+    if dados is not None:
+        componentes.legenda_recalculo(atual)
         col1, col2, col3 = st.columns(3)
-        col1.metric("Total de Campanhas", len(df))
-        col2.metric("Média Diâmetro Titular", f"{df['Diametro_Titular'].mean():.2f}")
-        col3.metric("Média Diâmetro Reserva", f"{df['Diametro_Reserva'].mean():.2f}")
+        col1.metric("Total de Campanhas", dados["total"])
+        col2.metric("Média Diâmetro Titular", f"{dados['media_titular']:.2f}")
+        col3.metric("Média Diâmetro Reserva", f"{dados['media_reserva']:.2f}")
 
         st.markdown("### ⏱️ Média de Tempo no Banho (por Campanha)")
-        media_tempo = df.groupby("Campanha")["Tempo_Banho_dias"].mean().reset_index()
-        media_tempo["Tempo_Banho_dias"] = media_tempo["Tempo_Banho_dias"].round(1)
-        st.dataframe(media_tempo, use_container_width=True)
-
-        # garantir que Data_Registro exista e seja legível para plot
-        if "Data_Registro" in df.columns:
-            # tenta parse; se falhar, plota por posição
-            try:
-                df_plot = df.copy()
-                df_plot["Data_Registro"] = pd.to_datetime(df_plot["Data_Registro"], errors="coerce")
-                fig2 = px.line(df_plot, x="Data_Registro", y=["Diametro_Titular", "Diametro_Reserva"],
-                               title="Evolução dos Diâmetros ao Longo do Tempo")
-                st.plotly_chart(fig2, use_container_width=True)
-            except Exception:
-                fig1 = px.bar(df, x="Campanha", y="Diametro_Titular", color="Campanha",
-                              title="Diâmetro Titular por Campanha", text_auto=True)
-                st.plotly_chart(fig1, use_container_width=True)
-
-        fig1 = px.bar(df, x="Campanha", y="Diametro_Titular", color="Campanha",
-                      title="Diâmetro Titular por Campanha", text_auto=True)
-        st.plotly_chart(fig1, use_container_width=True)
+        st.dataframe(dados["media_tempo"], use_container_width=True)
+
+        for fig in dados["figuras"]:
+            st.plotly_chart(fig, use_container_width=True)
 
     else:
         st.info("Nenhum dado disponível para gerar indicadores.")
@@ -219,7 +205,9 @@ with abas[2]:
 # -----------------------------
 # ✏️ Aba 4 – Editar / Excluir Registros
 # -----------------------------
-with abas[3]:
+@st.fragment
+@instrumentacao.medir("aba_editar_excluir")
+def aba_editar_excluir():
     st.header("Editar ou Excluir Registros")
     df = load_data()
 
@@ -236,20 +224,19 @@ with abas[3]:
             mask = df_filtered.apply(lambda row: row.astype(str).str.contains(termo_busca, case=False, na=False).any(), axis=1)
             df_filtered = df_filtered[mask]
 
-        # reset_index mantendo índice original em coluna 'index'
-        df_filtered = df_filtered.reset_index()  # cria coluna 'index' com o índice original
-        df_display = df_filtered.copy().reset_index(drop=True)  # índice 0..N para seleção
-        st.dataframe(df_display, use_container_width=True)
-
-        if not df_display.empty:
-            idx = st.number_input("Selecione o índice do registro (linha mostrada) para editar/excluir:",
-                                  min_value=0, max_value=len(df_display)-1, step=1, format="%d", key="select_idx")
+        st.dataframe(df_filtered, use_container_width=True, hide_index=True)
 
-            registro = df_display.loc[int(idx)]
-            original_idx = int(registro["index"])  # índice real no df original
+        if not df_filtered.empty:
+            # seleção pelo ID: continua no mesmo registro mesmo se outro for incluído ou excluído
+            rotulos = dict(zip(df_filtered["ID"], df_filtered[["Campanha", "Data_Inicio", "Data_Fim", "Rolo_Titular"]]
+                               .agg(" | ".join, axis=1)))
+            id_sel = st.selectbox("Selecione o registro para editar/excluir:", list(rotulos),
+                                  format_func=rotulos.get, key="select_id")
+            original_idx = armazenamento.indice(df, "banho")[id_sel]
+            registro = df.loc[original_idx]
 
             with st.form("form_editar"):
-                st.markdown(f"### ✏️ Editando registro original {original_idx}")
+                st.markdown(f"### ✏️ Editando registro {registro['Campanha']} de {registro['Data_Inicio']}")
                 col1, col2 = st.columns(2)
 
                 # datas convertidas de forma tolerante
@@ -266,14 +253,14 @@ with abas[3]:
                     data_fim = st.date_input("Data de Fim", parse_date_to_date(registro["Data_Fim"]))
                     conjunto_t = st.text_input("Conjunto (Titular)", registro["Conjunto_Titular"])
                     rolo_t = st.text_input("Rolo (Titular)", registro["Rolo_Titular"])
-                    diam_t = st.number_input("Diâmetro (Titular)", value=safe_float(registro.get("Diametro_Titular", "")), format="%.2f")
+                    diam_t = st.number_input("Diâmetro (Titular)", value=indicadores.safe_float(registro.get("Diametro_Titular", "")), format="%.2f")
                     navalha_t = st.text_input("Navalha (Titular)", registro["Navalha_Titular"])
                     baffles_t = st.text_input("Baffles (Titular)", registro["Baffles_Titular"])
 
                 with col2:
                     conjunto_r = st.text_input("Conjunto (Reserva)", registro["Conjunto_Reserva"])
                     rolo_r = st.text_input("Rolo (Reserva)", registro["Rolo_Reserva"])
-                    diam_r = st.number_input("Diâmetro (Reserva)", value=safe_float(registro.get("Diametro_Reserva", "")), format="%.2f")
+                    diam_r = st.number_input("Diâmetro (Reserva)", value=indicadores.safe_float(registro.get("Diametro_Reserva", "")), format="%.2f")
                     navalha_r = st.text_input("Navalha (Reserva)", registro["Navalha_Reserva"])
                     baffles_r = st.text_input("Baffles (Reserva)", registro["Baffles_Reserva"])
                     tromba = st.text_input("Tromba", registro["Tromba"])
@@ -288,9 +275,8 @@ with abas[3]:
                     if data_fim < data_inicio:
                         st.error("A data final não pode ser anterior à data inicial.")
                     else:
-                        # atualiza linha original no df
-                        df.loc[original_idx] = {
-                            "Data_Registro": df.loc[original_idx, "Data_Registro"],
+                        # atualiza a linha do registro no df
+                        alteracoes = {
                             "Campanha": campanha,
                             "Data_Inicio": data_inicio.strftime("%Y-%m-%d"),
                             "Data_Fim": data_fim.strftime("%Y-%m-%d"),
@@ -307,14 +293,29 @@ with abas[3]:
                             "Tromba": tromba,
                             "Observacoes": obs
                         }
+                        for col, valor in alteracoes.items():
+                            df.at[original_idx, col] = valor
                         overwrite_data(df)
-                        st.success(f"✅ Registro {original_idx} atualizado com sucesso!")
+                        componentes.recarregar_com_aviso("✅ Registro atualizado com sucesso!")
 
                 if excluir:
-                    confirmar = st.checkbox("⚠️ Confirmar exclusão", key=f"confirm_excluir_{original_idx}")
+                    confirmar = st.checkbox("⚠️ Confirmar exclusão", key=f"confirm_excluir_{id_sel}")
                     if confirmar:
-                        df = df.drop(original_idx).reset_index(drop=True)
+                        df = df.drop(original_idx)
                         overwrite_data(df)
-                        st.success(f"🗑️ Registro {original_idx} excluído com sucesso!")
+                        componentes.recarregar_com_aviso("🗑️ Registro excluído com sucesso!")
                     else:
                         st.warning("Marque a caixa de confirmação para excluir o registro.")
+
+    componentes.painel_desfazer("banho")
+
+with abas[0]:
+    aba_lancar()
+with abas[1]:
+    aba_historico()
+with abas[2]:
+    aba_indicadores()
+with abas[3]:
+    aba_editar_excluir()
+
+componentes.painel_diagnostico()
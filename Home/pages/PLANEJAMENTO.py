@@ -0,0 +1,108 @@
+import streamlit as st
+import pandas as pd
+import os
+import sys
+import time
+import plotly.express as px
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import aquecimento
+import armazenamento
+import componentes
+import desgaste
+import identidade
+import instrumentacao
+import linhas
+import manutencao
+import planejamento
+
+# -----------------------------
+# Configurações Iniciais
+# -----------------------------
+st.set_page_config(page_title="Planejamento das trocas – OCP", layout="wide")
+instrumentacao.nova_execucao("planejamento")
+manutencao.iniciar()
+aquecimento.iniciar()
+componentes.seletor_linha()
+st.title("🗓️ Planejamento das trocas de rolos")
+st.caption("Sugestão de titular e reserva para as próximas campanhas do banho, a partir da situação atual "
+           "de cada rolo. Prazos de oficina e desgaste por serviço são estimativas; nada é gravado.")
+
+
+@st.cache_resource(max_entries=linhas.por_linha(2))
+def indice_rolos(versoes):
+    # reconstruído apenas quando o pote ou o banho mudam
+    return identidade.carregar()
+
+
+@st.cache_data(max_entries=linhas.por_linha(2))
+def medicoes(versao):
+    # diâmetro atual de cada rolo medido (perfis m1..m5)
+    return desgaste.analisar(desgaste.carregar_medicoes())[1]
+
+
+# -----------------------------
+# Campanhas a planejar
+# -----------------------------
+n = st.sidebar.number_input("Campanhas a planejar", min_value=1, max_value=52, value=8, step=1)
+diametro_minimo = st.sidebar.number_input("Diâmetro mínimo de operação (mm)",
+                                          value=desgaste.DIAMETRO_MINIMO, step=1.0)
+
+versao_banho = armazenamento.versao("banho")
+if versao_banho is not None:
+    sugestao = planejamento.proximas(armazenamento.ler_com_arquivo("banho"), n)
+else:
+    sugestao = pd.DataFrame(columns=["Campanha", "Data_Inicio", "Data_Fim"])
+
+st.subheader("Próximas campanhas")
+st.caption("Sugeridas pelo histórico do banho (sequência dos tipos e duração mediana). "
+           "Ajuste as datas, os tipos ou inclua linhas conforme a programação.")
+campanhas = st.data_editor(
+    sugestao, num_rows="dynamic", use_container_width=True, hide_index=True,
+    key=f"campanhas_{linhas.atual()}_{n}_{versao_banho}",
+    column_config={
+        "Data_Inicio": st.column_config.DateColumn("Data_Inicio", format="YYYY-MM-DD"),
+        "Data_Fim": st.column_config.DateColumn("Data_Fim", format="YYYY-MM-DD"),
+    },
+)
+
+# -----------------------------
+# Plano
+# -----------------------------
+indice, medidas = indice_rolos(identidade.versoes()), medicoes(desgaste.versao())
+inicio = time.perf_counter()
+with instrumentacao.medir("planejar", "transform"):
+    rolos = planejamento.situacao(indice, medidas)
+    plano, ocupacao = planejamento.planejar(campanhas, rolos, diametro_minimo)
+decorrido = (time.perf_counter() - inicio) * 1000
+
+st.subheader("Plano sugerido")
+if rolos.empty:
+    st.info("Nenhum rolo registrado no pote, no banho ou nas medições desta linha.")
+    componentes.painel_diagnostico()
+    st.stop()
+
+c1, c2, c3 = st.columns(3)
+c1.metric("Campanhas", len(plano))
+c2.metric("Rolos na frota", len(rolos))
+c3.metric("Tempo de cálculo", f"{decorrido:.0f} ms")
+
+incompletas = plano[plano["Observação"] != ""]
+if not incompletas.empty:
+    st.warning(f"⚠️ {len(incompletas)} campanha(s) sem titular ou reserva disponível. Veja a coluna Observação.")
+st.dataframe(plano, use_container_width=True, hide_index=True)
+
+if not ocupacao.empty:
+    with instrumentacao.medir("grafico_ocupacao", "figure"):
+        fig = px.timeline(ocupacao, x_start="Inicio", x_end="Fim", y="Rolo", color="Situação",
+                          title="Ocupação dos rolos no plano")
+        fig.update_yaxes(categoryorder="category ascending")
+    st.plotly_chart(fig, use_container_width=True)
+
+csv = plano.to_csv(index=False).encode("utf-8")
+st.download_button("⬇️ Baixar plano em CSV", csv, "plano_trocas.csv", "text/csv")
+
+with st.expander("Situação atual dos rolos"):
+    st.dataframe(rolos, use_container_width=True, hide_index=True)
+
+componentes.painel_diagnostico()
@@ -1,15 +1,33 @@
 import streamlit as st
 import pandas as pd
-import os, uuid
-from datetime import datetime, date
+import os, sys, uuid
+from datetime import date
 import plotly.express as px
-from plotly import graph_objects as go
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import anomalias
+import aquecimento
+import armazenamento
+import componentes
+import indicadores
+import fila
+import instrumentacao
+import linha_tempo
+import linhas
+import manutencao
+import validacao
 
 # ==========================================================
 # CONFIGURAÇÃO
 # ==========================================================
 st.set_page_config(page_title="Controle dos Sink rolls", layout="wide")
+instrumentacao.nova_execucao("tl")
+manutencao.iniciar()
+aquecimento.iniciar()
+componentes.seletor_linha()
 st.title("⚙️ Controle da TL")
+componentes.campo_operador()
+componentes.painel_fila()
 
 # Tema rápido com CSS para abas
 st.markdown("""
@@ -32,59 +50,68 @@ st.markdown("""
 # ==========================================================
 # BANCO DE DADOS LOCAL
 # ==========================================================
-data_dir = "data"
-os.makedirs(data_dir, exist_ok=True)
-data_file = os.path.join(data_dir, "TL.csv")
+data_file = armazenamento.caminho("tl")
+os.makedirs(os.path.dirname(data_file), exist_ok=True)
 
 if not os.path.exists(data_file):
-    df = pd.DataFrame(columns=[
+    pd.DataFrame(columns=[
         "ID","Codigo","Entrada","Saída","Dias de uso",
         "Km de saída","Km/DIA","Posição","Observação"
-    ])
-    df.to_csv(data_file, index=False)
-else:
-    df = pd.read_csv(data_file)
+    ]).to_csv(data_file, index=False)
+
+@st.cache_data(max_entries=linhas.por_linha(2))
+@instrumentacao.medir("carregar", "load")
+def carregar(versao):
+    return armazenamento.ler("tl")
+
+def dados():
+    # lido do disco só quando o arquivo muda; cada chamada recebe sua própria cópia
+    return carregar(armazenamento.versao("tl"))
 
-def salvar():
-    df.to_csv(data_file, index=False)
+@st.cache_data(max_entries=linhas.por_linha(2))
+@instrumentacao.medir("carregar_historico", "load")
+def carregar_historico(versao):
+    # quente + partições arquivadas: os indicadores do dashboard cobrem o histórico inteiro
+    df = armazenamento.ler_com_arquivo("tl")
+    return df.mask(df == "")  # vazios como NaN, como em ler()
 
-def calc_dias(entrada, saida):
+@instrumentacao.medir("salvar", "write")
+def salvar(df):
+    alertas = componentes.alertas_desgaste()
     try:
-        ent = datetime.strptime(entrada, "%Y-%m-%d")
-        sai = datetime.strptime(saida, "%Y-%m-%d") if saida else datetime.today()
-        return (sai-ent).days
-    except:
-        return None
-
-def atualizar():
-    global df
-    for i, row in df.iterrows():
-        dias = calc_dias(row["Entrada"], row["Saída"])
-        df.at[i,"Dias de uso"] = dias
-        try:
-            km = float(row["Km de saída"]) if pd.notna(row["Km de saída"]) and row["Km de saída"] != "" else None
-        except:
-            km = None
-        df.at[i,"Km/DIA"] = round(km/dias,2) if km and dias and dias>0 else None
-    salvar()
-
-atualizar()
+        if fila.gravar("tl", df, componentes.operador()):
+            componentes.avisar_desgaste(alertas)
+        else:
+            componentes.avisar_fila()
+    except validacao.DadosInvalidos as e:
+        componentes.mostrar_problemas(e)
+        st.stop()
 
-# ==========================================================
-# ABAS PRINCIPAIS
-# ==========================================================
-aba1, aba2, aba3, aba4, aba5 = st.tabs([
-    "🖨 Registrar Bending",
-    "📊 Dashboard",
-    "📜 Histórico",
-    "🔁 Atualizar localização",
-    "✏️ Editar/Excluir"
-])
+@instrumentacao.medir("incluir", "write")
+def incluir(linha):
+    alertas = componentes.alertas_desgaste()
+    try:
+        if fila.incluir("tl", linha, componentes.operador()):
+            componentes.avisar_periodos("tl", dados(), linha)
+            componentes.avisar_desgaste(alertas)
+        else:
+            componentes.avisar_fila()
+    except validacao.DadosInvalidos as e:
+        componentes.mostrar_problemas(e)
+        st.stop()
+
+@st.cache_resource(max_entries=linhas.por_linha(2))
+def indice_temporal(versao):
+    # reconstruído apenas quando o arquivo ou as partições mudam
+    return linha_tempo.IndiceTemporal(armazenamento.ler_com_arquivo("tl"))
 
 # ==========================================================
 # 1 - REGISTRAR BENDING
 # ==========================================================
-with aba1:
+@st.fragment
+@instrumentacao.medir("aba_registrar")
+def aba_registrar():
+    df = dados()
     st.header("🖨 Registrar novo Bending")
     incluir_saida = st.checkbox("Incluir data de saída?")
     with st.form("form_mov"):
@@ -100,7 +127,7 @@ with aba1:
         if codigo:
             ent = data_entrada.strftime("%Y-%m-%d")
             sai = data_saida.strftime("%Y-%m-%d") if incluir_saida else ""
-            dias = calc_dias(ent, sai)
+            dias = indicadores.calc_dias(ent, sai)
             try:
                 km = float(km_saida) if km_saida else None
             except:
@@ -109,8 +136,7 @@ with aba1:
             novo = {"ID":str(uuid.uuid4()),"Codigo":codigo,"Entrada":ent,"Saída":sai,
                     "Dias de uso":dias,"Km de saída":km,"Km/DIA":km_dia,
                     "Posição":posicao,"Observação":obs}
-            df.loc[len(df)] = novo
-            salvar()
+            incluir(novo)
             st.success(f"✅ Movimentação do rolo {codigo} registrada!")
             st.rerun()
         else:
@@ -119,7 +145,10 @@ with aba1:
 # ==========================================================
 # 2 - DASHBOARD
 # ==========================================================
-with aba2:
+@st.fragment
+@instrumentacao.medir("aba_dashboard")
+def aba_dashboard():
+    df = carregar_historico(armazenamento.versao_com_arquivo("tl"))
     st.header("📊 Dashboard de Desempenho da TL")
     if df.empty:
         st.info("Nenhum registro cadastrado ainda.")
@@ -133,13 +162,22 @@ with aba2:
         col2.metric("Toneladas (Km) totais", f"{df['Km de saída'].sum():.1f}")
         col3.metric("Posições ativas", df["Posição"].nunique())
 
+        # alertas mantidos a cada gravação (anomalias.py): nada é recalculado aqui
+        alertas = pd.DataFrame((armazenamento.ler_anomalias() or {}).get("alertas", []))
+        if not alertas.empty:
+            st.subheader("🚨 Desgaste fora do padrão")
+            st.caption(f"Movimentações com Km/DIA ou dias de uso a {anomalias.LIMITE_Z:g}+ desvios-padrão "
+                       "da média do bending ou da posição, no momento em que foram lançadas.")
+            alertas = alertas.assign(_z=alertas["z"].abs()).sort_values("_z", ascending=False).drop(columns=["_z", "ID"])
+            st.dataframe(alertas, use_container_width=True, hide_index=True)
+
         st.markdown("---")
         modo = st.radio("Visualização:", ["🔎 Por Bending","📊 Visão geral"])
 
         if modo=="🔎 Por Bending":
             rolo = st.selectbox("Selecione um Bending", df["Codigo"].unique())
             df_r = df[df["Codigo"]==rolo].sort_values("Entrada")
-            ultimo_km = df_r["Km de saída"].dropna().iloc[-1] if not df_r.empty else 0
+            ultimo_km = df_r["Km de saída"].dropna().iloc[-1] if df_r["Km de saída"].notna().any() else 0
             dias = (df_r["Entrada"].max()-df_r["Entrada"].min()).days+1 if len(df_r)>1 else 1
             media_km_dia = df_r["Km de saída"].diff().mean() if len(df_r)>1 else 0
             progresso = min(ultimo_km/2000*100,100)
@@ -150,53 +188,66 @@ with aba2:
             c3.metric("⚡ Média Km/DIA", f"{media_km_dia:.1f}")
             c4.metric("🎯 Vida útil usada", f"{progresso:.1f}%")
 
-            fig = px.line(df_r, x="Entrada", y="Km de saída",
-                          title=f"Evolução do Bending {rolo}",
-                          markers=True)
-            fig.add_hline(y=2000, line_dash="dot", line_color="red",
-                          annotation_text="Meta 2000 km")
+            with instrumentacao.medir("grafico_bending", "figure"):
+                fig = px.line(df_r, x="Entrada", y="Km de saída",
+                              title=f"Evolução do Bending {rolo}",
+                              markers=True)
+                fig.add_hline(y=2000, line_dash="dot", line_color="red",
+                              annotation_text="Meta 2000 km")
             st.plotly_chart(fig, use_container_width=True)
 
         else:
-            st.subheader("🏆 Ranking dos Bendings que mais rodaram")
-            ranking = df.groupby("Codigo")["Km de saída"].max().reset_index().sort_values(by="Km de saída", ascending=False)
-            st.dataframe(ranking, use_container_width=True)
-            fig_rank = px.bar(ranking, x="Codigo", y="Km de saída",
-                              text_auto='.0f', title="Km total rodado por Bending")
-            st.plotly_chart(fig_rank, use_container_width=True)
-
-            st.subheader("📈 Evolução comparativa")
-            fig_all = px.line(df, x="Entrada", y="Km de saída",
-                              color="Codigo", markers=True)
-            fig_all.add_hline(y=2000, line_dash="dot", line_color="red",
-                              annotation_text="Meta 2000 km")
-            st.plotly_chart(fig_all, use_container_width=True)
+            visao, atual = indicadores.visao_geral_tl()
+            if visao is None:
+                st.warning("⚠️ Não foi possível montar a visão geral agora; uma nova tentativa é feita em instantes.")
+            else:
+                ranking, fig_rank, fig_all = visao
+                componentes.legenda_recalculo(atual)
+                st.subheader("🏆 Ranking dos Bendings que mais rodaram")
+                st.dataframe(ranking, use_container_width=True)
+                st.plotly_chart(fig_rank, use_container_width=True)
+
+                st.subheader("📈 Evolução comparativa")
+                st.plotly_chart(fig_all, use_container_width=True)
 
 # ==========================================================
 # 3 - HISTÓRICO
 # ==========================================================
-with aba3:
+@st.fragment
+@instrumentacao.medir("aba_historico")
+def aba_historico():
+    df = indicadores.com_dias(dados())
     st.header("📜 Histórico de movimentações")
     if df.empty:
         st.info("Nenhum registro ainda.")
     else:
-        codigos = ["Todos"] + sorted(df["Codigo"].dropna().unique().tolist())
+        # período primeiro: se ele chegar nas partições arquivadas, os filtros abaixo as incluem
+        dff = componentes.filtro_periodo("tl", df, key="periodo_tl")
+        codigos = ["Todos"] + sorted(dff["Codigo"].dropna().astype(str).unique().tolist())
         filtro_cod = st.selectbox("Filtrar por código", codigos)
-        dff = df if filtro_cod=="Todos" else df[df["Codigo"]==filtro_cod].copy()
+        dff = dff if filtro_cod=="Todos" else dff[dff["Codigo"].astype(str)==filtro_cod].copy()
         posicoes = ["Todas"] + sorted(dff["Posição"].dropna().unique().tolist())
         filtro_pos = st.selectbox("Filtrar por posição", posicoes)
         if filtro_pos != "Todas":
             dff = dff[dff["Posição"]==filtro_pos]
-        dff["Entrada"] = pd.to_datetime(dff["Entrada"], errors="coerce")
-        if not dff.empty:
-            d_ini, d_fim = st.date_input("Período", [dff["Entrada"].min(), dff["Entrada"].max()])
-            dff = dff[(dff["Entrada"].dt.date>=d_ini) & (dff["Entrada"].dt.date<=d_fim)]
+        dff = dff.assign(Entrada=pd.to_datetime(dff["Entrada"], errors="coerce"))
         st.dataframe(dff.sort_values("Entrada",ascending=False), use_container_width=True, height=500)
 
+        st.subheader("📍 Bendings montados em uma data")
+        indice = indice_temporal(armazenamento.versao_com_arquivo("tl"))
+        data_ref = st.date_input("Data de referência", value=date.today(), key="data_ref_tl")
+        montados = indice.em(data_ref)
+        montados = montados[montados["Posição"] != "Nenhum"]
+        st.dataframe(montados[["Posição","Codigo","Entrada","Saída","Km de saída","Observação"]].sort_values("Posição"),
+                     use_container_width=True)
+
 # ==========================================================
 # 4 - ATUALIZAR LOCALIZAÇÃO
 # ==========================================================
-with aba4:
+@st.fragment
+@instrumentacao.medir("aba_atualizar_localizacao")
+def aba_atualizar_localizacao():
+    df = dados()
     st.header("🔁 Atualizar dados de um rolo")
     if df.empty:
         st.info("Nenhum Bending registrado.")
@@ -207,7 +258,7 @@ with aba4:
         idx = df_rolos.index[-1]
         ultimo = df.loc[idx]
         st.subheader("📄 Última movimentação:")
-        st.write(ultimo[["Codigo","Entrada","Saída","Km de saída","Dias de uso","Km/DIA","Observação"]])
+        st.write(indicadores.com_dias(df.loc[[idx]]).iloc[0][["Codigo","Entrada","Saída","Km de saída","Dias de uso","Km/DIA","Observação"]])
 
         incluir_saida = st.checkbox("Atualizar saída e Km?")
         with st.form("form_atualiza"):
@@ -234,23 +285,26 @@ with aba4:
                 except:
                     kmv = None
                 df.at[idx,"Km de saída"] = kmv
-                dias = calc_dias(df.at[idx,"Entrada"], df.at[idx,"Saída"])
+                dias = indicadores.calc_dias(df.at[idx,"Entrada"], df.at[idx,"Saída"])
                 df.at[idx,"Dias de uso"] = dias
                 df.at[idx,"Km/DIA"] = round(kmv/dias,2) if kmv and dias and dias>0 else None
+                salvar(df)
 
             ent = nova_entrada.strftime("%Y-%m-%d")
             novo = {"ID":str(uuid.uuid4()),"Codigo":cod,"Entrada":ent,"Saída":"",
                     "Dias de uso":"","Km de saída":"","Km/DIA":"",
                     "Posição":nova_pos,"Observação":nova_obs}
-            df.loc[len(df)] = novo
-            salvar()
+            incluir(novo)
             st.success(f"✅ Rolo {cod} atualizado.")
             st.rerun()
 
 # ==========================================================
 # 5 - EDITAR / EXCLUIR
 # ==========================================================
-with aba5:
+@st.fragment
+@instrumentacao.medir("aba_editar_excluir")
+def aba_editar_excluir():
+    df = dados()
     st.header("✏️ Editar ou ❌ Excluir registros")
     if df.empty:
         st.info("Nenhum registro cadastrado.")
@@ -259,7 +313,10 @@ with aba5:
         cod = st.selectbox("Código do rolo", codigos)
         regs = df[df["Codigo"]==cod].sort_values("Entrada")
         st.dataframe(regs, use_container_width=True, height=400)
-        idx_sel = st.selectbox("Selecione o registro", regs.index)
+        # seleção pelo ID: continua no mesmo registro mesmo se outro for incluído ou excluído
+        rotulos = dict(zip(regs["ID"], regs["Entrada"].astype(str) + " → " + regs["Saída"].fillna("").astype(str)))
+        id_sel = st.selectbox("Selecione o registro", list(rotulos), format_func=rotulos.get)
+        idx_sel = armazenamento.indice(df, "tl")[id_sel]
         reg = df.loc[idx_sel]
 
         with st.form("form_edicao"):
@@ -283,16 +340,43 @@ with aba5:
                 kmv = None
             df.at[idx_sel,"Km de saída"] = kmv
             df.at[idx_sel,"Observação"] = nova_obs
-            dias = calc_dias(df.at[idx_sel,"Entrada"], df.at[idx_sel,"Saída"])
+            dias = indicadores.calc_dias(df.at[idx_sel,"Entrada"], df.at[idx_sel,"Saída"])
             df.at[idx_sel,"Dias de uso"] = dias
             df.at[idx_sel,"Km/DIA"] = round(kmv/dias,2) if kmv and dias and dias>0 else None
-            salvar()
+            salvar(df)
             st.success("✅ Registro atualizado!")
             st.rerun()
 
         if excluir:
             df.drop(idx_sel, inplace=True)
-            df.reset_index(drop=True, inplace=True)
-            salvar()
+            salvar(df)
             st.success("🗑 Registro excluído!")
             st.rerun()
+
+        componentes.painel_desfazer("tl")
+
+# ==========================================================
+# ABAS PRINCIPAIS
+# cada aba é um fragmento: filtros e botões de uma aba
+# reexecutam só ela, sem recalcular as demais
+# ==========================================================
+aba1, aba2, aba3, aba4, aba5 = st.tabs([
+    "🖨 Registrar Bending",
+    "📊 Dashboard",
+    "📜 Histórico",
+    "🔁 Atualizar localização",
+    "✏️ Editar/Excluir"
+])
+
+with aba1:
+    aba_registrar()
+with aba2:
+    aba_dashboard()
+with aba3:
+    aba_historico()
+with aba4:
+    aba_atualizar_localizacao()
+with aba5:
+    aba_editar_excluir()
+
+componentes.painel_diagnostico()
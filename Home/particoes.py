@@ -0,0 +1,182 @@
+import json
+import os
+import re
+
+import pandas as pd
+
+import linhas
+
+# -----------------------------
+# Partições mensais de arquivo
+# -----------------------------
+# Movimentações antigas saem do CSV "quente" de data/ (ver
+# armazenamento.arquivar_antigos) e vão para data/arquivo/<nome>/<AAAA-MM>.csv.gz,
+# pelo mês da data de início. Um manifesto por registro guarda a menor e a
+# maior data de início de cada partição, então um filtro de período abre só
+# as partições que ele cruza: o custo depende do período, não do histórico.
+# Linhas sem data de início válida ficam na partição 0000-00, lida em toda
+# consulta: nenhum período as exclui.
+# registro -> (coluna de início, coluna de fim) do período de cada linha
+COLUNAS = {
+    "pote": ("Entrada", "Saída"),
+    "desengraxe": ("Entrada", "Saída"),
+    "tl": ("Entrada", "Saída"),
+    "banho": ("Data_Inicio", "Data_Fim"),
+}
+SEM_DATA = "0000-00"
+
+
+def _pasta(nome):
+    return os.path.join(linhas.pasta(), "arquivo", nome)
+
+
+def caminho(nome, particao):
+    return os.path.join(_pasta(nome), f"{particao}.csv.gz")
+
+
+def _arquivo_manifesto(nome):
+    return os.path.join(_pasta(nome), "manifesto.json")
+
+
+def manifesto(nome):
+    """Partição -> {"min", "max", "linhas"} (datas de início em AAAA-MM-DD)."""
+    if not os.path.exists(_arquivo_manifesto(nome)):
+        return {}
+    with open(_arquivo_manifesto(nome), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _salvar_manifesto(nome, dados):
+    tmp = _arquivo_manifesto(nome) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(dados.items())), f, indent=1)
+    os.replace(tmp, _arquivo_manifesto(nome))
+
+
+def versao(nome):
+    """Identificador barato do conjunto de partições, usado como chave de cache."""
+    try:
+        return (os.stat(_arquivo_manifesto(nome)).st_mtime_ns, linhas.atual())
+    except FileNotFoundError:
+        return None
+
+
+def tem_sem_data(nome):
+    """True se há linhas arquivadas sem data de início válida."""
+    return any(not p["min"] for p in manifesto(nome).values())
+
+
+def inicio(nome):
+    """Menor data de início arquivada (date) ou None."""
+    datas = [p["min"] for p in manifesto(nome).values() if p["min"]]
+    return pd.Timestamp(min(datas)).date() if datas else None
+
+
+def _ler(nome, particao):
+    return pd.read_csv(caminho(nome, particao), dtype=str).fillna("")
+
+
+def _gravar(nome, particao, df):
+    tmp = caminho(nome, particao) + ".tmp"
+    df.to_csv(tmp, index=False, compression="gzip")
+    os.replace(tmp, caminho(nome, particao))
+
+
+# -----------------------------
+# Escrita
+# -----------------------------
+def _particao(df, col):
+    datas = pd.to_datetime(df[col], format="%Y-%m-%d", errors="coerce")
+    return datas.dt.strftime("%Y-%m").fillna(SEM_DATA)
+
+
+def _faixa(grupo, col):
+    d = pd.to_datetime(grupo[col], format="%Y-%m-%d", errors="coerce").dropna()
+    return {
+        "min": d.min().strftime("%Y-%m-%d") if not d.empty else "",
+        "max": d.max().strftime("%Y-%m-%d") if not d.empty else "",
+        "linhas": len(grupo),
+    }
+
+
+def acrescentar(nome, df, chave="ID"):
+    """Grava as linhas de `df` (strings) nas partições do mês de início de cada uma."""
+    os.makedirs(_pasta(nome), exist_ok=True)
+    anuais = _anuais(nome)
+    if anuais:
+        # partições anuais (<AAAA>.csv.gz) do formato anterior entram junto e viram mensais
+        df = pd.concat([pd.read_csv(a, dtype=str) for a in anuais] + [df], ignore_index=True).fillna("")
+    dados = manifesto(nome)
+    col = COLUNAS[nome][0]
+    for p, grupo in df.groupby(_particao(df, col)):
+        if p in dados:
+            grupo = pd.concat([_ler(nome, p), grupo], ignore_index=True).fillna("")
+            grupo = grupo.drop_duplicates(chave, keep="last")
+        _gravar(nome, p, grupo)
+        dados[p] = _faixa(grupo, col)
+    # manifesto por último: quem lê nunca vê uma partição listada antes de existir
+    _salvar_manifesto(nome, dados)
+    for a in anuais:
+        os.remove(a)
+
+
+def remover(nome, df, chave="ID"):
+    """Tira das partições as linhas de `df` (que voltaram para o arquivo quente)."""
+    dados = manifesto(nome)
+    col = COLUNAS[nome][0]
+    vazias = []
+    for p, grupo in df.groupby(_particao(df, col)):
+        if p not in dados:
+            continue
+        resto = _ler(nome, p)
+        resto = resto[~resto[chave].isin(grupo[chave])]
+        if resto.empty:
+            del dados[p]
+            vazias.append(p)
+        else:
+            _gravar(nome, p, resto)
+            dados[p] = _faixa(resto, col)
+    # partição vazia só sai do disco depois de sair do manifesto
+    _salvar_manifesto(nome, dados)
+    for p in vazias:
+        os.remove(caminho(nome, p))
+
+
+def migrar(nome):
+    """Converte as partições anuais do formato anterior, se houver."""
+    if os.path.isdir(_pasta(nome)) and _anuais(nome):
+        acrescentar(nome, pd.DataFrame(columns=[COLUNAS[nome][0]]))
+
+
+def _anuais(nome):
+    return [os.path.join(_pasta(nome), f) for f in sorted(os.listdir(_pasta(nome)))
+            if re.fullmatch(r"\d{4}\.csv\.gz", f)]
+
+
+# -----------------------------
+# Leitura com poda de partições
+# -----------------------------
+def selecionar(nome, inicio=None, fim=None):
+    """
+    Partições cuja faixa de datas de início cruza [inicio, fim] (datas; None
+    = aberto), mais as de linhas sem data, que o filtro não tem como excluir.
+    """
+    escolhidas = []
+    for p, faixa in manifesto(nome).items():
+        if not faixa["min"]:
+            escolhidas.append(p)
+            continue
+        if inicio is not None and faixa["max"] < inicio.strftime("%Y-%m-%d"):
+            continue
+        if fim is not None and faixa["min"] > fim.strftime("%Y-%m-%d"):
+            continue
+        escolhidas.append(p)
+    return escolhidas
+
+
+def ler(nome, inicio=None, fim=None):
+    """Linhas arquivadas com data de início no período, lendo só as partições necessárias."""
+    escolhidas = selecionar(nome, inicio, fim)
+    if not escolhidas:
+        return pd.DataFrame()
+    return pd.concat([_ler(nome, p) for p in escolhidas], ignore_index=True)
@@ -0,0 +1,205 @@
+from datetime import date, timedelta
+
+import pandas as pd
+
+import identidade
+
+# -----------------------------
+# Planejamento das trocas de rolos do banho
+# -----------------------------
+# A partir da situação atual de cada rolo (localização, diâmetro, dias de banho
+# desde o último serviço) e das datas das próximas campanhas, escolhe titular
+# e reserva de cada campanha. Heurística gulosa, em ordem de início das
+# campanhas: entre os rolos viáveis na data, fica com os de menor custo e
+# atualiza a situação deles (o titular vai para a oficina ao fim da campanha,
+# perde DESBASTE_MM no serviço e volta com os dias de banho zerados; a
+# reserva só fica comprometida durante a campanha). O(campanhas × rolos):
+# a frota inteira em milissegundos, sem solver.
+# Um rolo é viável quando já está livre (fora da oficina, ver PRAZO_OFICINA,
+# e fora de outra campanha), está acima do diâmetro mínimo e, como titular,
+# não passa de MAX_DIAS_BANHO imerso desde o último serviço. O custo prefere
+# rolos já usados no mesmo tipo de campanha, com menos dias de banho
+# acumulados e menos campanhas no plano (rodízio) e, para a reserva, maior
+# diâmetro.
+# Prazos e desgaste são estimativas: o plano é uma sugestão para o
+# planejador, nada é gravado.
+DIAS_SERVICO = 7      # dias na oficina depois de sair do banho como titular
+DESBASTE_MM = 1.0     # diâmetro perdido a cada serviço
+MAX_DIAS_BANHO = 45   # dias imerso entre dois serviços
+DIAS_CAMPANHA = 7     # duração sugerida de um tipo de campanha sem histórico
+PRAZO_OFICINA = {"Oficina OCP": 7, "Usinagem": 15, "Revestimento": 30}  # dias da entrada até voltar
+PESO_TIPO = 1.0       # custo de um rolo sem histórico no tipo da campanha
+PESO_USO = 0.25       # custo de cada campanha como titular já atribuída no plano (rodízio)
+
+COLUNAS_PLANO = ["Campanha", "Data_Inicio", "Data_Fim", "Rolo_Titular", "Diametro_Titular",
+                 "Rolo_Reserva", "Diametro_Reserva", "Observação"]
+
+
+def _numero(s):
+    return pd.to_numeric(s.astype(str).str.replace(",", ".").str.strip(), errors="coerce")
+
+
+def _data(s):
+    return pd.to_datetime(s, errors="coerce")
+
+
+def situacao(indice, medicoes=None, hoje=None):
+    """
+    Uma linha por rolo: localização atual, diâmetro mais recente (medição do
+    desgaste.py, senão o anotado no banho, senão o do pote), último serviço,
+    dias de banho desde ele, tipos de campanha em que já foi usado e a data
+    em que fica livre.
+    """
+    hoje = pd.Timestamp(hoje or date.today())
+    mov, camp = indice.movimentos, indice.campanhas
+    diametros = []
+    if medicoes is not None and not medicoes.empty:
+        medidos = medicoes.assign(Rolo=medicoes["rolo_id"].map(identidade.rolo)).dropna(subset=["Rolo"])
+        diametros.append(medidos.groupby("Rolo")["diametro_atual"].last())
+    # rolos com medição mas ainda sem movimentação também são da frota
+    codigos = set(indice.rolos()).union(*(d.index for d in diametros))
+    rolos = pd.DataFrame(index=pd.Index(sorted(codigos), name="Rolo"))
+
+    # movimentos já vêm em ordem de entrada dentro de cada rolo
+    ultimo = mov.assign(_e=_data(mov["Entrada"])).groupby("Rolo").tail(1).set_index("Rolo")
+    rolos["Localização"] = ultimo["Localização"].reindex(rolos.index).fillna("")
+
+    # diâmetro: a fonte mais precisa disponível
+    banho = camp.assign(_d=_numero(camp["Diametro"])).dropna(subset=["_d"])
+    diametros.append(banho.groupby("Rolo")["_d"].last())
+    pote = mov.assign(_d=_numero(mov["Diametro"]) if "Diametro" in mov.columns else pd.NA).dropna(subset=["_d"])
+    diametros.append(pote.groupby("Rolo")["_d"].last())
+    diametro = pd.Series(float("nan"), index=rolos.index)
+    for fonte in diametros:
+        diametro = diametro.fillna(fonte.reindex(rolos.index))
+    rolos["Diametro"] = diametro
+
+    # último serviço: saída da oficina (ou entrada, se ainda está lá)
+    oficina = mov[mov["Localização"].isin(identidade.LOCAIS_OFICINA)]
+    fim_servico = _data(oficina["Saída"]).fillna(_data(oficina["Entrada"]))
+    rolos["Ultimo_servico"] = fim_servico.groupby(oficina["Rolo"]).max().reindex(rolos.index)
+
+    titular = camp[camp["Papel"] == "Titular"].assign(_i=_data(camp["Data_Inicio"]))
+    titular = titular.join(rolos["Ultimo_servico"], on="Rolo")
+    depois = titular[titular["Ultimo_servico"].isna() | (titular["_i"] >= titular["Ultimo_servico"])]
+    rolos["Dias_de_banho"] = depois.groupby("Rolo")["Dias de banho"].sum().reindex(rolos.index).fillna(0).astype(int)
+    rolos["Tipos"] = camp.groupby("Rolo")["Campanha"].agg(lambda c: " ".join(sorted(set(c.dropna())))).reindex(
+        rolos.index).fillna("")
+
+    # livre: hoje, salvo em oficina (prazo a partir da entrada) ou em campanha em curso ou futura
+    livre = pd.Series(hoje, index=rolos.index)
+    prazo = rolos["Localização"].map(PRAZO_OFICINA)
+    volta = ultimo["_e"].reindex(rolos.index) + pd.to_timedelta(prazo, unit="D")
+    livre = livre.where(~(volta > hoje), volta)
+    fim = _data(camp["Data_Fim"])
+    em_curso = camp.assign(_f=fim + pd.to_timedelta((camp["Papel"] == "Titular") * DIAS_SERVICO, unit="D"))
+    em_curso = em_curso[fim >= hoje].groupby("Rolo")["_f"].max().reindex(rolos.index)
+    livre = livre.where(~(em_curso > livre), em_curso)
+    rolos["Livre_em"] = livre.dt.date
+    rolos["Ultimo_servico"] = rolos["Ultimo_servico"].dt.date
+    return rolos.reset_index()
+
+
+def proximas(banho, n, hoje=None):
+    """
+    Sugestão das próximas `n` campanhas, encadeadas a partir do fim da última:
+    o tipo é o que mais vezes sucedeu o anterior no histórico (senão, o próximo
+    no rodízio dos tipos) e a duração é a mediana do tipo.
+    """
+    hoje = pd.Timestamp(hoje or date.today())
+    hist = banho.assign(_i=_data(banho["Data_Inicio"]), _f=_data(banho["Data_Fim"])).dropna(subset=["_i"])
+    hist = hist.sort_values("_i", kind="stable")
+    tipos = hist["Campanha"].tolist()
+    duracao = (hist["_f"] - hist["_i"]).dt.days.groupby(hist["Campanha"]).median()
+    sucessores = pd.Series(list(zip(tipos, tipos[1:])), dtype=object).value_counts()
+    ordem = list(dict.fromkeys(tipos))
+
+    tipo = tipos[-1] if tipos else "GI"
+    inicio = max(hist["_f"].max(), hoje) if hist["_f"].notna().any() else hoje
+    linhas = []
+    for _ in range(n):
+        seguintes = [(b, q) for (a, b), q in sucessores.items() if a == tipo]
+        if seguintes:
+            tipo = max(seguintes, key=lambda s: s[1])[0]
+        elif tipo in ordem:  # tipo sem sucessor no histórico: rodízio na ordem em que os tipos apareceram
+            tipo = ordem[(ordem.index(tipo) + 1) % len(ordem)]
+        dias = duracao.get(tipo)
+        dias = int(dias) if pd.notna(dias) and dias > 0 else DIAS_CAMPANHA
+        fim = inicio + timedelta(days=dias)
+        linhas.append({"Campanha": tipo, "Data_Inicio": inicio.date(), "Data_Fim": fim.date()})
+        inicio = fim
+    return pd.DataFrame(linhas, columns=["Campanha", "Data_Inicio", "Data_Fim"])
+
+
+def _custo(rolo, tipo, papel):
+    custo = 0.0 if not rolo["tipos"] or tipo in rolo["tipos"] else PESO_TIPO
+    if papel == "Titular":
+        return custo + rolo["dias_banho"] / MAX_DIAS_BANHO + rolo["usos"] * PESO_USO
+    # reserva: a maior folga de diâmetro, para poder entrar a qualquer momento
+    return custo - rolo["diametro"] / 1000
+
+
+def planejar(campanhas, rolos, diametro_minimo):
+    """
+    Titular e reserva de cada campanha (DataFrame com Campanha, Data_Inicio e
+    Data_Fim), a partir de situacao(). Retorna (plano, ocupacao): o plano
+    segue COLUNAS_PLANO; a ocupação tem uma linha por rolo e período (em
+    campanha ou em serviço), para o gráfico.
+    """
+    estado = {}
+    for r in rolos.itertuples(index=False):
+        estado[r.Rolo] = {
+            "livre": pd.Timestamp(r.Livre_em), "diametro": r.Diametro, "dias_banho": r.Dias_de_banho,
+            "tipos": set(r.Tipos.split()), "usos": 0,
+        }
+    campanhas = campanhas.assign(inicio=_data(campanhas["Data_Inicio"]), fim=_data(campanhas["Data_Fim"]))
+    campanhas = campanhas.dropna(subset=["inicio", "fim"]).sort_values("inicio", kind="stable")
+
+    plano, ocupacao = [], []
+    for c in campanhas.itertuples(index=False):
+        dias = max((c.fim - c.inicio).days, 0)
+        motivos = {"em oficina ou em outra campanha": 0, "abaixo do diâmetro mínimo": 0, "sem diâmetro conhecido": 0}
+        viaveis = []
+        for codigo, r in estado.items():
+            if r["livre"] > c.inicio:
+                motivos["em oficina ou em outra campanha"] += 1
+            elif pd.isna(r["diametro"]):
+                motivos["sem diâmetro conhecido"] += 1
+            elif r["diametro"] < diametro_minimo:
+                motivos["abaixo do diâmetro mínimo"] += 1
+            else:
+                viaveis.append(codigo)
+        titulares = [k for k in viaveis if estado[k]["dias_banho"] + dias <= MAX_DIAS_BANHO]
+
+        titular = min(titulares, key=lambda k: (_custo(estado[k], c.Campanha, "Titular"), k)) if titulares else None
+        # o limite de dias de banho é só do titular: a reserva fica fora do banho
+        reservas = [k for k in viaveis if k != titular]
+        reserva = min(reservas, key=lambda k: (_custo(estado[k], c.Campanha, "Reserva"), k)) if reservas else None
+
+        linha = {"Campanha": c.Campanha, "Data_Inicio": c.inicio.date(), "Data_Fim": c.fim.date(),
+                 "Rolo_Titular": titular or "", "Diametro_Titular": estado[titular]["diametro"] if titular else None,
+                 "Rolo_Reserva": reserva or "", "Diametro_Reserva": estado[reserva]["diametro"] if reserva else None}
+        faltas = [p for p, k in (("titular", titular), ("reserva", reserva)) if k is None]
+        if faltas:
+            excesso = len(viaveis) - len(titulares)
+            detalhes = [f"{n} {m}" for m, n in motivos.items() if n] + (
+                [f"{excesso} com dias de banho acima de {MAX_DIAS_BANHO}"] if excesso and titular is None else [])
+            linha["Observação"] = f"⚠️ Sem {' e '.join(faltas)}: " + "; ".join(detalhes)
+        else:
+            linha["Observação"] = ""
+        plano.append(linha)
+
+        if titular:
+            r = estado[titular]
+            servico = c.fim + timedelta(days=DIAS_SERVICO)
+            ocupacao.append({"Rolo": titular, "Inicio": c.inicio, "Fim": c.fim, "Situação": f"Titular {c.Campanha}"})
+            ocupacao.append({"Rolo": titular, "Inicio": c.fim, "Fim": servico, "Situação": "Serviço"})
+            r.update(livre=servico, diametro=r["diametro"] - DESBASTE_MM, dias_banho=0, usos=r["usos"] + 1)
+            r["tipos"].add(c.Campanha)
+        if reserva:
+            ocupacao.append({"Rolo": reserva, "Inicio": c.inicio, "Fim": c.fim, "Situação": f"Reserva {c.Campanha}"})
+            estado[reserva]["livre"] = c.fim
+            estado[reserva]["tipos"].add(c.Campanha)
+
+    return (pd.DataFrame(plano, columns=COLUNAS_PLANO),
+            pd.DataFrame(ocupacao, columns=["Rolo", "Inicio", "Fim", "Situação"]))
@@ -0,0 +1,279 @@
+import base64
+import hashlib
+import html
+import json
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+import pandas as pd
+import plotly.express as px
+
+import armazenamento
+import identidade
+import instrumentacao
+import linhas
+import particoes
+import resumo
+
+# -----------------------------
+# Relatório semanal de manutenção
+# -----------------------------
+# Um HTML único com o ranking de km dos bendings da TL, os indicadores das
+# campanhas do banho e a localização dos rolos (pote e desengraxe), montado
+# fora da execução da página, em um processo separado: gerar as figuras e
+# exportá-las como imagem é CPU pura e travaria o worker do Streamlit.
+# O processo é iniciado por este arquivo (python Home/relatorio.py), e não
+# pelo multiprocessing: o filho do spawn reimporta o __main__, que sob o
+# Streamlit é o script da página em execução.
+# O relatório é guardado em data/relatorios/ (um por linha de galvanização,
+# na pasta da linha) com o hash do conteúdo no nome, e a página só oferece o
+# download do arquivo pronto.
+# "chave" identifica os dados de entrada (versões dos arquivos e das partições
+# mais a semana ISO): com a mesma chave, o relatório existente é reaproveitado.
+# Figuras viram PNG embutido quando o Kaleido está instalado; sem ele, vão
+# como gráfico interativo (plotly.js pela CDN). Para PDF, imprimir o HTML.
+# Também pode ser gerado à mão, a partir da raiz do projeto:
+#   python Home/relatorio.py
+MANTER = 12  # relatórios guardados
+
+_trava = threading.Lock()
+_espera = ThreadPoolExecutor(max_workers=1, thread_name_prefix="relatorio")  # aguarda um processo por vez
+_pendentes = {}  # linha -> Future da geração em andamento neste processo
+
+
+def pasta():
+    return os.path.join(linhas.pasta(), "relatorios")
+
+
+def _manifesto():
+    return os.path.join(pasta(), "manifesto.json")
+
+
+def _ler_manifesto():
+    try:
+        with open(_manifesto(), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"relatorios": []}
+
+
+def _salvar_manifesto(manifesto):
+    tmp = _manifesto() + f".{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, indent=1)
+    os.replace(tmp, _manifesto())
+
+
+def semana(dia=None):
+    ano, numero, _ = (dia or date.today()).isocalendar()
+    return f"{ano}-W{numero:02d}"
+
+
+def chave():
+    """Hash das versões de todos os registros (quente + partições) e da semana atual."""
+    versoes = [(n, armazenamento.versao(n), particoes.versao(n)) for n in armazenamento.REGISTROS]
+    return hashlib.sha256(repr((versoes, semana())).encode()).hexdigest()[:16]
+
+
+# -----------------------------
+# Conteúdo (roda no processo do relatório)
+# -----------------------------
+def _ranking_tl(tl):
+    if tl.empty:
+        return pd.DataFrame(columns=["Codigo", "Km de saída", "% da meta", "Posição"])
+    tl = tl.assign(**{"Km de saída": pd.to_numeric(tl["Km de saída"], errors="coerce")})
+    ranking = tl.groupby("Codigo")["Km de saída"].max().reset_index()
+    ranking["% da meta"] = (ranking["Km de saída"] / resumo.META_KM * 100).round(1)
+    posicao = resumo._ultimos(tl).set_index("Codigo")["Posição"]
+    ranking["Posição"] = ranking["Codigo"].map(posicao)
+    return ranking.sort_values("Km de saída", ascending=False).reset_index(drop=True)
+
+
+def _campanhas(banho):
+    if banho.empty:
+        return pd.DataFrame(columns=["Campanha", "Trocas", "Dias no banho (média)",
+                                     "Diâmetro titular (média)", "Diâmetro reserva (média)"])
+    diametro = lambda s: pd.to_numeric(s.astype(str).str.replace(",", "."), errors="coerce")
+    dias = (pd.to_datetime(banho["Data_Fim"], errors="coerce") - pd.to_datetime(banho["Data_Inicio"], errors="coerce")).dt.days
+    tabela = banho.assign(_dias=dias, _dt=diametro(banho["Diametro_Titular"]), _dr=diametro(banho["Diametro_Reserva"]))
+    tabela = tabela.groupby("Campanha").agg(**{
+        "Trocas": ("_dias", "size"),
+        "Dias no banho (média)": ("_dias", "mean"),
+        "Diâmetro titular (média)": ("_dt", "mean"),
+        "Diâmetro reserva (média)": ("_dr", "mean"),
+    })
+    return tabela.round(1).reset_index()
+
+
+def _localizacoes(pote, desengraxe, banho):
+    partes = [pd.DataFrame(columns=["Equipamento", "Rolo", "Localização atual"])]
+    if not pote.empty:
+        rolos = identidade.IndiceRolos(pote, banho).resumo()
+        rolos.insert(0, "Equipamento", "Pote")
+        partes.append(rolos)
+    if not desengraxe.empty:
+        atuais = resumo._ultimos(desengraxe)[["Codigo", "Localização"]]
+        partes.append(atuais.rename(columns={"Codigo": "Rolo", "Localização": "Localização atual"})
+                      .assign(Equipamento="Desengraxe"))
+    return pd.concat(partes, ignore_index=True).fillna("")
+
+
+def _figura(fig, primeira):
+    try:
+        png = fig.to_image(format="png", width=1000, height=450)
+        return f'<img src="data:image/png;base64,{base64.b64encode(png).decode()}">'
+    except (RuntimeError, ValueError, ImportError):  # sem Kaleido (ou sem Chrome para ele)
+        return fig.to_html(full_html=False, include_plotlyjs="cdn" if primeira else False)
+
+
+def _tabela(df):
+    if df.empty:
+        return "<p><i>Sem registros.</i></p>"
+    return df.to_html(index=False, border=0, classes="tabela", na_rep="")
+
+
+def _html(ranking, campanhas, locais, gerado):
+    secoes = []
+    fig = None
+    if not ranking.empty:
+        fig = px.bar(ranking, x="Codigo", y="Km de saída", text_auto=".0f", title="Km total rodado por Bending")
+        fig.add_hline(y=resumo.META_KM, line_dash="dot", line_color="red", annotation_text=f"Meta {resumo.META_KM} km")
+    secoes.append(("Ranking dos bendings da TL", fig, ranking))
+    fig = None
+    if not campanhas.empty:
+        fig = px.bar(campanhas, x="Campanha", y="Dias no banho (média)", text_auto=".1f",
+                     title="Média de dias no banho por campanha")
+    secoes.append(("Campanhas do banho", fig, campanhas))
+    fig = None
+    contagem = locais[locais["Localização atual"] != ""].groupby(["Localização atual", "Equipamento"]).size()
+    if not contagem.empty:
+        fig = px.bar(contagem.rename("Rolos").reset_index(), x="Localização atual", y="Rolos",
+                     color="Equipamento", barmode="group", title="Rolos por localização")
+    secoes.append(("Localização dos rolos", fig, locais))
+
+    corpo, primeira = [], True
+    for titulo, fig, tabela in secoes:
+        corpo.append(f"<h2>{html.escape(titulo)}</h2>")
+        if fig is not None:
+            corpo.append(_figura(fig, primeira))
+            primeira = False
+        corpo.append(_tabela(tabela))
+    corpo = "\n".join(corpo)
+    return f"""<!DOCTYPE html>
+<html lang="pt-BR"><head><meta charset="utf-8">
+<title>Relatório de manutenção – {html.escape(linhas.nome())} – {semana()}</title>
+<style>
+ body {{ font-family: sans-serif; margin: 24px; color: #222; }}
+ h1 {{ margin-bottom: 0; }} .sub {{ color: #666; margin-top: 4px; }}
+ h2 {{ border-bottom: 2px solid #1e90ff; padding-bottom: 4px; margin-top: 36px; }}
+ .tabela {{ border-collapse: collapse; font-size: 13px; margin-top: 12px; }}
+ .tabela th, .tabela td {{ padding: 4px 10px; border-bottom: 1px solid #ddd; text-align: left; }}
+ img {{ max-width: 100%; }}
+</style></head><body>
+<h1>Relatório de manutenção – {html.escape(linhas.nome())}</h1>
+<p class="sub">Semana {semana()} · gerado em {gerado}</p>
+{corpo}
+</body></html>
+"""
+
+
+def gerar(linha=None):
+    """
+    Monta o relatório da `linha` (padrão: a linha em uso), grava em
+    data/relatorios/ e registra no manifesto. Retorna a entrada do manifesto.
+    Roda no processo do relatório (ou à mão).
+    """
+    with linhas.usar(linha or linhas.atual()):
+        return _gerar()
+
+
+def _gerar():
+    pote, desengraxe, tl, banho = (armazenamento.ler_com_arquivo(n) if armazenamento.versao(n) is not None
+                                   else pd.DataFrame() for n in ("pote", "desengraxe", "tl", "banho"))
+    # depois da leitura: ler_com_arquivo pode gravar IDs que faltavam
+    chave_dados = chave()
+    gerado = datetime.now().strftime("%Y-%m-%d %H:%M")
+    conteudo = _html(_ranking_tl(tl), _campanhas(banho), _localizacoes(pote, desengraxe, banho), gerado).encode()
+    hash_ = hashlib.sha256(conteudo).hexdigest()[:12]
+    arquivo = f"relatorio-{semana()}.{hash_}.html"
+
+    os.makedirs(pasta(), exist_ok=True)
+    caminho = os.path.join(pasta(), arquivo)
+    tmp = caminho + f".{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(conteudo)
+    os.replace(tmp, caminho)
+
+    entrada = {"arquivo": arquivo, "hash": hash_, "chave": chave_dados, "semana": semana(),
+               "gerado": gerado, "bytes": len(conteudo)}
+    manifesto = _ler_manifesto()
+    relatorios = [r for r in manifesto["relatorios"] if r["arquivo"] != arquivo] + [entrada]
+    for antigo in relatorios[:-MANTER]:
+        try:
+            os.remove(os.path.join(pasta(), antigo["arquivo"]))
+        except FileNotFoundError:
+            pass
+    manifesto["relatorios"] = relatorios[-MANTER:]
+    _salvar_manifesto(manifesto)
+    return entrada
+
+
+# -----------------------------
+# Geração e consulta (processo do Streamlit)
+# -----------------------------
+def _gerar_em_processo(linha):
+    # processo novo a cada geração: um que falhe não deixa nada para refazer
+    processo = subprocess.run([sys.executable, os.path.abspath(__file__)], capture_output=True, text=True,
+                              env={**os.environ, "IVG_LINHA": linha})
+    if processo.returncode != 0:
+        erro = RuntimeError(f"relatório da linha {linha}: {processo.stderr.strip()[-2000:]}")
+        instrumentacao.registrar_falha("relatorio", erro)
+        raise erro
+    return json.loads(processo.stdout.strip().splitlines()[-1])
+
+
+def ultimo():
+    """Entrada do relatório mais recente (com "caminho"), ou None."""
+    for entrada in reversed(_ler_manifesto()["relatorios"]):
+        caminho = os.path.join(pasta(), entrada["arquivo"])
+        if os.path.exists(caminho):
+            return {**entrada, "caminho": caminho}
+    return None
+
+
+def atualizado():
+    """True se o último relatório corresponde aos dados e à semana atuais."""
+    entrada = ultimo()
+    return entrada is not None and entrada["chave"] == chave()
+
+
+def pendente():
+    futuro = _pendentes.get(linhas.atual())
+    return futuro is not None and not futuro.done()
+
+
+def solicitar(forcar=False):
+    """
+    Agenda a geração do relatório da linha em uso, sem esperar. Não
+    faz nada se já houver uma geração da linha em andamento neste processo ou,
+    sem `forcar`, se o último relatório já for da semana atual. Retorna o
+    Future, ou None.
+    """
+    linha = linhas.atual()
+    with _trava:
+        if pendente():
+            return _pendentes[linha]
+        entrada = ultimo()
+        if not forcar and entrada is not None and entrada["semana"] == semana():
+            return None
+        _pendentes[linha] = _espera.submit(_gerar_em_processo, linha)
+        return _pendentes[linha]
+
+
+if __name__ == "__main__":
+    # a última linha da saída é lida por _gerar_em_processo()
+    print(json.dumps(gerar(), ensure_ascii=False))
@@ -0,0 +1,52 @@
+import argparse
+
+import armazenamento
+import diario
+import validacao
+
+# -----------------------------
+# Reparo dos registros
+# -----------------------------
+# Normaliza de uma vez os arquivos de data/ segundo os esquemas de
+# validacao.py (decimais com vírgula, inteiros gravados como "8.0", datas,
+# colunas sobrando ou fora de ordem) e lista o que não pode ser corrigido
+# automaticamente. Executar a partir da raiz do projeto:
+#   python Home/reparar.py             -> só mostra o que seria corrigido
+#   python Home/reparar.py --aplicar   -> grava (as correções ficam no diário)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Normaliza e valida os registros de data/.")
+    parser.add_argument("registros", nargs="*", default=list(armazenamento.REGISTROS),
+                        help="registros a reparar (padrão: todos)")
+    parser.add_argument("--aplicar", action="store_true", help="grava os arquivos normalizados")
+    args = parser.parse_args()
+
+    for nome in args.registros:
+        if armazenamento.versao(nome) is None:
+            print(f"{nome}: arquivo inexistente")
+            continue
+        if args.aplicar:
+            corrigidas, problemas = armazenamento.reparar(nome)
+        else:
+            atual = armazenamento.ler_texto(nome)
+            # linhas sem chave ganham UUID ao aplicar; aqui são identificadas pela posição
+            col = armazenamento.chave(nome)
+            if col not in atual.columns:
+                atual.insert(0, col, "")
+            vazios = atual[col] == ""
+            atual.loc[vazios, col] = [f"(sem {col}) registro {i + 1}" for i in atual.index[vazios]]
+            novo = validacao.normalizar(nome, atual, colunas=True)
+            corrigidas = len(diario.diferencas(atual, novo, armazenamento.chave(nome)))
+            problemas = validacao.validar(nome, novo)
+            if list(novo.columns) != list(atual.columns):
+                print(f"{nome}: colunas {list(atual.columns)} -> {list(novo.columns)}")
+
+        print(f"{nome}: {corrigidas} linha(s) {'corrigidas' if args.aplicar else 'a corrigir'}, "
+              f"{len(problemas)} problema(s) restante(s)")
+        for p in problemas.itertuples():
+            print(f"    {p.linha or '-'} | {p.coluna}: {p.problema}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+import intervalos
+import linhas
+
+# -----------------------------
+# Resumo da página inicial
+# -----------------------------
+# Um JSON pequeno por registro em data/resumo/, que a página inicial lê sem
+# abrir os CSVs. No pote, no desengraxe e na TL o resumo guarda o estado de
+# cada rolo ("grupos", por Codigo) e cada gravação (armazenamento._escrever,
+# dentro da trava) refaz só os rolos das linhas alteradas, com as linhas
+# quentes e arquivadas deles; os totais saem dos grupos. Sem as alterações
+# (reparo, arquivamento, IDs) ou no banho, que é um grupo só, o resumo é
+# descartado e refeito na próxima leitura, fora da trava (armazenamento.ler_resumo).
+# "versao" guarda armazenamento.versao() do arquivo resumido: se o CSV for
+# alterado por fora, o resumo é refeito na próxima leitura.
+META_KM = 2000
+PERTO_DA_META = 0.9  # fração da meta a partir da qual o bending aparece em alerta
+
+
+def pasta():
+    return os.path.join(linhas.pasta(), "resumo")
+
+
+def caminho(nome):
+    return os.path.join(pasta(), f"{nome}.json")
+
+
+def _datas(s):
+    return pd.to_datetime(s, format="%Y-%m-%d", errors="coerce")
+
+
+def _ultimos(df):
+    # situação atual: último lançamento de cada código
+    return df.assign(_d=_datas(df["Entrada"])).sort_values("_d", kind="stable").drop_duplicates("Codigo", keep="last")
+
+
+def calcular(nome, df):
+    """Indicadores do registro a partir do DataFrame (strings) do histórico completo."""
+    if nome in ("pote", "desengraxe", "tl"):
+        grupos = _grupos(nome, df) if not df.empty else {}
+        return {**_totais(nome, grupos), "grupos": grupos}
+    if df.empty:
+        return {"linhas": 0}
+    return {**_banho(df), "sobreposicoes": int(
+        (intervalos.varrer(nome, df)["tipo"] == intervalos.SOBREPOSICAO).sum())}
+
+
+def _grupos(nome, df):
+    # por rolo: linhas, situação do último lançamento, última troca, sobreposições e (TL) último km
+    atuais = _ultimos(df).set_index("Codigo")
+    quantas = df["Codigo"].value_counts()
+    ocorrencias = intervalos.varrer(nome, df)
+    sobrepostas = ocorrencias.loc[ocorrencias["tipo"] == intervalos.SOBREPOSICAO, "grupo"].value_counts()
+    if nome == "tl":
+        situacao, trocas = "Posição", df["Entrada"]
+    else:
+        situacao, trocas = "Localização", df["Entrada"].where(df["Localização"] == "Em linha", "")
+    ultimas = _datas(trocas).groupby(df["Codigo"]).max()
+    grupos = {}
+    for codigo, atual in atuais[situacao].items():
+        d = ultimas.get(codigo)
+        grupos[codigo] = {"linhas": int(quantas[codigo]), "situacao": atual,
+                          "ultima_troca": d.strftime("%Y-%m-%d") if pd.notna(d) else "",
+                          "sobreposicoes": int(sobrepostas.get(codigo, 0))}
+    if nome == "tl":
+        com_km = df[pd.to_numeric(df["Km de saída"], errors="coerce").notna()]
+        if not com_km.empty:
+            for codigo, km in pd.to_numeric(_ultimos(com_km).set_index("Codigo")["Km de saída"]).items():
+                grupos[codigo]["km"] = float(km)
+    return grupos
+
+
+def _totais(nome, grupos):
+    if nome == "tl":
+        # em linha: última movimentação com posição na linha (não "Nenhum")
+        em_linha = [c for c, g in grupos.items() if g["situacao"] not in ("", "Nenhum")]
+    else:
+        em_linha = [c for c, g in grupos.items() if g["situacao"] == "Em linha"]
+    dados = {
+        "linhas": sum(g["linhas"] for g in grupos.values()),
+        "rolos": len(grupos),
+        "em_linha": sorted(em_linha),
+        "ultima_troca": max((g["ultima_troca"] for g in grupos.values()), default=""),
+    }
+    if nome == "tl":
+        perto = [(c, g["km"]) for c, g in grupos.items() if g.get("km", 0) >= META_KM * PERTO_DA_META]
+        dados["perto_da_meta"] = [[c, km] for c, km in sorted(perto, key=lambda p: (-p[1], p[0]))]
+    dados["sobreposicoes"] = sum(g["sobreposicoes"] for g in grupos.values())
+    return dados
+
+
+def _banho(df):
+    inicio = _datas(df["Data_Inicio"])
+    if inicio.isna().all():
+        return {"linhas": len(df)}
+    atual = df.loc[inicio.idxmax()]
+    return {
+        "linhas": len(df),
+        "campanha": atual["Campanha"],
+        "inicio": atual["Data_Inicio"],
+        "fim": atual["Data_Fim"],
+        "ultima_troca": atual["Data_Inicio"],
+    }
+
+
+def gravar(nome, dados, versao):
+    os.makedirs(pasta(), exist_ok=True)
+    dados = {**dados, "versao": list(versao) if versao else None,
+             "atualizado": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+    tmp = caminho(nome) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False)
+    os.replace(tmp, caminho(nome))
+
+
+def atualizar(nome, df, alteracoes, arquivado, versao_antes, versao_depois):
+    """
+    Chamado dentro da trava, depois de gravar `df` (arquivo quente). Com o
+    resumo da versão anterior, refaz só os rolos das `alteracoes` ([(antes,
+    depois)], ver anomalias.linhas_alteradas) a partir das linhas deles em
+    `df` e em `arquivado`. Senão descarta o resumo.
+    """
+    anterior = ler(nome, versao_antes)
+    if anterior is None or "grupos" not in anterior:
+        descartar(nome)
+        return
+    codigos = {linha["Codigo"] for par in alteracoes for linha in par if linha is not None}
+    linhas_ = df[df["Codigo"].isin(codigos)]
+    if not arquivado.empty:
+        linhas_ = pd.concat([arquivado[arquivado["Codigo"].isin(codigos)], linhas_],
+                            ignore_index=True).fillna("").drop_duplicates("ID", keep="last")
+    grupos = anterior["grupos"]
+    for codigo in codigos:
+        grupos.pop(codigo, None)
+    if not linhas_.empty:
+        grupos.update(_grupos(nome, linhas_))
+    gravar(nome, {**_totais(nome, grupos), "grupos": grupos}, versao_depois)
+
+
+def ler(nome, versao):
+    """Resumo gravado do registro, ou None se não existir ou não for da `versao` atual."""
+    try:
+        with open(caminho(nome), encoding="utf-8") as f:
+            dados = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return dados if dados.get("versao") == (list(versao) if versao else None) else None
+
+
+def descartar(nome):
+    try:
+        os.remove(caminho(nome))
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,21 @@
+import os
+import sys
+
+from streamlit.web import cli
+
+import aquecimento
+
+# -----------------------------
+# Subida do servidor com aquecimento dos caches
+# -----------------------------
+# Equivale a `streamlit run Home/inicio.py [opções]`, mas começa o
+# aquecimento (aquecimento.py) antes de o Streamlit abrir a porta: quando a
+# primeira sessão chega, os caches já estão prontos ou a caminho. Os módulos
+# de Home/ importados aqui são os mesmos que as páginas usam depois.
+# Uso (na raiz do projeto):
+#   python Home/servidor.py --server.port 8511 --server.headless true
+if __name__ == "__main__":
+    aquecimento.iniciar()
+    inicio = os.path.join(os.path.dirname(os.path.abspath(__file__)), "inicio.py")
+    sys.argv = ["streamlit", "run", inicio, *sys.argv[1:]]
+    sys.exit(cli.main())
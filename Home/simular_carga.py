@@ -0,0 +1,216 @@
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+# -----------------------------
+# Simulador de carga
+# -----------------------------
+# Abre N sessões simultâneas (AppTest do Streamlit, uma por operador) nas
+# páginas do pote, da TL e do banho e executa em cada uma uma sequência
+# aleatória de leituras, trocas de filtro e lançamentos de formulário.
+# Cada lançamento leva uma marca única na observação; no fim, as marcas são
+# procuradas nos arquivos para contar gravações perdidas (ou duplicadas).
+# Roda sobre uma cópia do projeto em uma pasta temporária: data/ real não é tocado.
+# Cada sessão roda em um processo próprio (o AppTest não pode ser usado por
+# várias threads ao mesmo tempo), então a carga equivale a N workers com um
+# operador cada sobre os mesmos arquivos (ver deploy/iniciar_workers.sh).
+# A partir da raiz do projeto:
+#   python Home/simular_carga.py --sessoes 8 --acoes 15
+PAGINAS = {
+    "pote": "SINK_ROLL.py",
+    "tl": os.path.join("Home", "pages", "TENSION_LEVELLER.py"),
+    "banho": os.path.join("Home", "pages", "PEÇAS_DO_POTE.py"),
+}
+COLUNA_MARCA = {"pote": "Observação", "tl": "Observação", "banho": "Observacoes"}
+MISTURA = {"leitura": 0.45, "filtro": 0.35, "lancamento": 0.20}
+TEMPO_LIMITE = 180
+
+
+def _por_rotulo(lista, rotulo):
+    return next(w for w in lista if w.label == rotulo)
+
+
+def _rodar(at, medidas, pagina, acao):
+    inicio = time.perf_counter()
+    at.run()
+    medidas.append((pagina, acao, time.perf_counter() - inicio))
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    if any("Dados não gravados" in e.value for e in at.error):
+        raise RuntimeError("gravação recusada pela validação")
+
+
+# -----------------------------
+# Ações por página
+# -----------------------------
+# Cada função recebe o AppTest já aberto, a lista de medidas e a marca do
+# lançamento (None para leituras/filtros) e retorna True se algo foi gravado.
+def _pote(at, acao, medidas, marca, sorteio):
+    menu = at.sidebar.radio[0]
+    if acao == "filtro":
+        menu.set_value("Histórico")
+        _rodar(at, medidas, "pote", "filtro")
+        filtro = _por_rotulo(at.selectbox, "Filtrar por código do rolo")
+        filtro.set_value(sorteio.choice(filtro.options))
+    elif acao == "lancamento":
+        menu.set_value("Registrar Rolo")
+        _rodar(at, medidas, "pote", "lancamento")
+        _por_rotulo(at.text_input, "Codigo do rolo (ex: SR03)").set_value(f"SR{sorteio.randint(900, 999)}")
+        _por_rotulo(at.text_area, "Observação (opcional)").set_value(marca)
+        _por_rotulo(at.button, "Registar rolo de fundo").click()
+    _rodar(at, medidas, "pote", acao)
+    return acao == "lancamento"
+
+
+def _tl(at, acao, medidas, marca, sorteio):
+    if acao == "filtro":
+        filtro = _por_rotulo(at.selectbox, "Filtrar por código")
+        filtro.set_value(sorteio.choice(filtro.options))
+    elif acao == "lancamento" and sorteio.random() < 0.5:
+        _por_rotulo(at.text_input, "Código do bending (ex: AC03)").set_value(f"CARGA{sorteio.randint(1, 99)}")
+        _por_rotulo(at.text_area, "Observação (opcional)").set_value(marca)
+        _por_rotulo(at.button, "Registrar rolo de fundo").click()
+    elif acao == "lancamento":
+        # atualização com saída: regrava a linha anterior e inclui a nova (caminho mais sujeito a corrida)
+        codigo = _por_rotulo(at.selectbox, "Selecione o código do Bending")
+        codigo.set_value(sorteio.choice(codigo.options))
+        _por_rotulo(at.checkbox, "Atualizar saída e Km?").check()
+        _rodar(at, medidas, "tl", "lancamento")
+        _por_rotulo(at.text_area, "Nova observação").set_value(marca)
+        _por_rotulo(at.button, "Atualizar rolo").click()
+    _rodar(at, medidas, "tl", acao)
+    return acao == "lancamento"
+
+
+def _banho(at, acao, medidas, marca, sorteio):
+    if acao == "filtro":
+        filtro = _por_rotulo(at.multiselect, "Filtrar por Campanha")
+        filtro.set_value(sorteio.sample(filtro.options, k=sorteio.randint(0, len(filtro.options))))
+    elif acao == "lancamento":
+        _por_rotulo(at.text_area, "Observações").set_value(marca)
+        _por_rotulo(at.button, "💾 Salvar Registro").click()
+    _rodar(at, medidas, "banho", acao)
+    return acao == "lancamento"
+
+
+ACOES = {"pote": _pote, "tl": _tl, "banho": _banho}
+
+
+# -----------------------------
+# Sessões
+# -----------------------------
+def _sessao(numero, pagina, acoes, semente, resultado):
+    from streamlit.testing.v1 import AppTest
+
+    sorteio = random.Random(semente)
+    at = AppTest.from_file(os.path.abspath(PAGINAS[pagina]), default_timeout=TEMPO_LIMITE)
+    at.session_state["operador"] = f"carga-{numero}"
+    try:
+        _rodar(at, resultado["medidas"], pagina, "abertura")
+    except Exception as e:
+        resultado["erros"].append(f"{pagina}#{numero} abertura: {e!r}")
+        return
+    for i in range(acoes):
+        acao = sorteio.choices(list(MISTURA), weights=list(MISTURA.values()))[0]
+        marca = f"carga:{numero}:{i}:{uuid.uuid4().hex[:8]}" if acao == "lancamento" else None
+        try:
+            if ACOES[pagina](at, acao, resultado["medidas"], marca, sorteio) and marca:
+                resultado["marcas"].append((pagina, marca))
+        except Exception as e:  # a sessão segue; o erro entra no relatório
+            resultado["erros"].append(f"{pagina}#{numero} {acao}: {e!r}")
+            at = AppTest.from_file(os.path.abspath(PAGINAS[pagina]), default_timeout=TEMPO_LIMITE)
+            at.session_state["operador"] = f"carga-{numero}"
+            at.run()
+
+
+def _processo(pasta, numero, pagina, acoes, semente):
+    import logging
+
+    logging.disable(logging.WARNING)  # avisos do AppTest sem contexto de execução
+    os.chdir(pasta)
+    sys.path.insert(0, os.path.join(pasta, "Home"))
+    resultado = {"medidas": [], "marcas": [], "erros": []}
+    _sessao(numero, pagina, acoes, semente + numero, resultado)
+    return resultado
+
+
+# -----------------------------
+# Relatório
+# -----------------------------
+def _percentis(s):
+    return {f"p{p}": s.quantile(p / 100) * 1000 for p in (50, 95, 99)}
+
+
+def relatorio(resultado, duracao, pasta):
+    medidas = pd.DataFrame(resultado["medidas"], columns=["pagina", "acao", "segundos"])
+    print(f"\n{len(medidas)} reexecuções em {duracao:.1f}s -> {len(medidas) / duracao:.2f} reexecuções/s")
+    tabela = medidas.groupby(["pagina", "acao"])["segundos"].apply(
+        lambda s: pd.Series({"n": len(s), **_percentis(s)})).unstack()
+    tabela.loc[("todas", ""), :] = {"n": len(medidas), **_percentis(medidas["segundos"])}
+    print("latência por reexecução (ms):")
+    print(tabela.round(0).astype(int).to_string())
+
+    sys.path.insert(0, os.path.join(pasta, "Home"))
+    os.chdir(pasta)
+    import armazenamento
+
+    print("\ngravações confirmadas x encontradas nos arquivos:")
+    for nome in PAGINAS:
+        marcas = [m for p, m in resultado["marcas"] if p == nome]
+        conteudo = armazenamento.ler_texto(nome)[COLUNA_MARCA[nome]] if marcas else pd.Series(dtype=str)
+        contagem = conteudo[conteudo.str.startswith("carga:")].value_counts()
+        perdidas = sum(1 for m in marcas if m not in contagem.index)
+        duplicadas = int((contagem > 1).sum())
+        print(f"  {nome:6} confirmadas {len(marcas):4}  perdidas {perdidas:4}  duplicadas {duplicadas:4}")
+
+    if resultado["erros"]:
+        print(f"\n{len(resultado['erros'])} erro(s):")
+        for erro in resultado["erros"][:20]:
+            print("  " + erro[:200])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simula vários operadores usando o app ao mesmo tempo.")
+    parser.add_argument("--sessoes", type=int, default=6, help="sessões simultâneas (divididas entre as páginas)")
+    parser.add_argument("--acoes", type=int, default=10, help="ações por sessão")
+    parser.add_argument("--paginas", nargs="*", default=list(PAGINAS), choices=list(PAGINAS))
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--manter", action="store_true", help="não apaga a cópia temporária do projeto")
+    args = parser.parse_args()
+
+    raiz = os.getcwd()
+    pasta = tempfile.mkdtemp(prefix="ivg_carga_")
+    shutil.copytree(raiz, pasta, dirs_exist_ok=True,
+                    ignore=shutil.ignore_patterns(".git", "__pycache__", "snapshots", "diario"))
+    os.environ["IVG_FILA_DIR"] = os.path.join(pasta, "fila")  # fila local também fica na cópia
+    print(f"cópia do projeto em {pasta}")
+
+    paginas = [args.paginas[i % len(args.paginas)] for i in range(args.sessoes)]
+    n = args.sessoes
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=n) as pool:
+        parciais = list(pool.map(_processo, [pasta] * n, range(n), paginas, [args.acoes] * n, [args.semente] * n))
+    duracao = time.perf_counter() - inicio
+
+    resultado = {"medidas": [], "marcas": [], "erros": []}
+    for parcial in parciais:
+        for chave in resultado:
+            resultado[chave] += parcial[chave]
+    try:
+        relatorio(resultado, duracao, pasta)
+    finally:
+        os.chdir(raiz)
+        if not args.manter:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
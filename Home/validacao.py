@@ -0,0 +1,219 @@
+import pandas as pd
+
+# -----------------------------
+# Esquemas dos registros
+# -----------------------------
+# Por registro: colunas na ordem do arquivo, obrigatórias, padrões (regex)
+# de códigos, opções fixas, números com faixa aceita e casas decimais
+# (0 = inteiro), datas (AAAA-MM-DD) e pares de datas que devem estar em ordem.
+# Campos vazios só são erro nas colunas obrigatórias.
+LOCALIZACOES = ["Em linha", "Oficina OCP", "Usinagem", "Revestimento"]
+# o desengraxe também passa pela oficina central e pela baia (formulário de registro)
+LOCALIZACOES_DESENGRAXE = LOCALIZACOES + ["Oficina central", "Baia"]
+POSICOES_TL = ["Nenhum", "#1 SUP", "#1 INF", "#2 SUP", "#2 INF", "Anticoil", "Anticross"]
+
+ESQUEMAS = {
+    "pote": {
+        "colunas": ["ID", "Codigo", "Localização", "Campanha", "Fornecedor", "Diametro",
+                    "Motivo da troca", "Serviço a realizar", "Entrada", "Saída", "Observação"],
+        "obrigatorias": ["ID", "Codigo", "Entrada"],
+        "padroes": {"Codigo": r"SR\d+"},
+        "opcoes": {"Localização": LOCALIZACOES, "Campanha": ["Nenhum", "GI", "GA"]},
+        "numeros": {"Diametro": (400, 800, 2)},
+        "datas": ["Entrada", "Saída"],
+        "ordem": [("Entrada", "Saída")],
+    },
+    "desengraxe": {
+        "colunas": ["ID", "Codigo", "Localização", "Campanha", "Fornecedor",
+                    "Motivo da troca", "Serviço a realizar", "Entrada", "Saída", "Observação"],
+        "obrigatorias": ["ID", "Codigo", "Entrada"],
+        "padroes": {"Codigo": r"[A-Z]{2}\d+"},
+        "opcoes": {"Localização": LOCALIZACOES_DESENGRAXE},
+        "numeros": {},
+        "datas": ["Entrada", "Saída"],
+        "ordem": [("Entrada", "Saída")],
+    },
+    "tl": {
+        "colunas": ["ID", "Codigo", "Entrada", "Saída", "Dias de uso", "Km de saída", "Km/DIA",
+                    "Posição", "Observação"],
+        "obrigatorias": ["ID", "Codigo", "Entrada"],
+        "padroes": {"Codigo": r"[A-Z0-9][A-Z0-9.\-]*"},
+        "opcoes": {"Posição": POSICOES_TL},
+        "numeros": {"Dias de uso": (0, 3650, 0), "Km de saída": (0, 50000, 2), "Km/DIA": (0, 2000, 2)},
+        "datas": ["Entrada", "Saída"],
+        "ordem": [("Entrada", "Saída")],
+    },
+    "banho": {
+        "colunas": ["ID", "Data_Registro", "Campanha", "Data_Inicio", "Data_Fim",
+                    "Conjunto_Titular", "Rolo_Titular", "Diametro_Titular", "Navalha_Titular", "Baffles_Titular",
+                    "Conjunto_Reserva", "Rolo_Reserva", "Diametro_Reserva", "Navalha_Reserva", "Baffles_Reserva",
+                    "Tromba", "Observacoes"],
+        "obrigatorias": ["ID", "Campanha", "Data_Inicio", "Data_Fim"],
+        "padroes": {},
+        "opcoes": {"Campanha": ["GI", "AS", "GL"]},
+        "numeros": {
+            "Diametro_Titular": (500, 700, 2), "Diametro_Reserva": (500, 700, 2),
+            **{c: (0, 999, 0) for c in ["Conjunto_Titular", "Rolo_Titular", "Navalha_Titular", "Baffles_Titular",
+                                        "Conjunto_Reserva", "Rolo_Reserva", "Navalha_Reserva", "Baffles_Reserva",
+                                        "Tromba"]},
+        },
+        "datas": ["Data_Inicio", "Data_Fim"],
+        "ordem": [("Data_Inicio", "Data_Fim")],
+    },
+    # medições de diâmetro (rolls.db), validadas na importação em lote
+    "medicoes": {
+        "colunas": ["rolo_id", "data_entrada", "m1", "m2", "m3", "m4", "m5",
+                    "certificado", "motivo_saida", "posicao", "data_saida"],
+        "obrigatorias": ["rolo_id", "data_entrada"],
+        "padroes": {"rolo_id": r"[A-Z0-9][A-Z0-9.\-]*"},
+        "opcoes": {},
+        "numeros": {m: (100, 1500, 2) for m in ["m1", "m2", "m3", "m4", "m5"]},
+        "datas": ["data_entrada", "data_saida"],
+        "ordem": [("data_entrada", "data_saida")],
+    },
+}
+
+
+class DadosInvalidos(ValueError):
+    """Gravação recusada; `problemas` é um DataFrame com linha, coluna e problema."""
+
+    def __init__(self, problemas):
+        self.problemas = problemas
+        super().__init__(f"{len(problemas)} problema(s) nos dados: " + "; ".join(
+            f"{p.coluna}: {p.problema}" for p in problemas.head(3).itertuples()))
+
+
+# -----------------------------
+# Normalização
+# -----------------------------
+def _como_texto(df):
+    # qualquer DataFrame -> só strings, vazio no lugar de NaN/None
+    return df.astype(object).where(df.notna(), "").astype(str)
+
+
+def _datas(s):
+    iso = pd.to_datetime(s, format="%Y-%m-%d", errors="coerce")
+    br = pd.to_datetime(s, format="%d/%m/%Y", errors="coerce")
+    # aceita também data com hora (ex.: Timestamp convertido em texto)
+    completa = pd.to_datetime(s.str[:10], format="%Y-%m-%d", errors="coerce")
+    return iso.fillna(br).fillna(completa)
+
+
+def normalizar(nome, df, linhas=None, colunas=False):
+    """
+    Retorna `df` como strings com os valores padronizados: códigos em
+    maiúsculas, decimal com ponto ("597,5" -> "597.50"), inteiros sem ".0",
+    datas em AAAA-MM-DD. `linhas` (máscara booleana) limita as linhas tocadas.
+    Com `colunas`, também ordena as colunas do esquema, cria as que faltam e
+    descarta colunas fora do esquema que estejam vazias.
+    """
+    esquema = ESQUEMAS[nome]
+    df = _como_texto(df)
+    alvo = pd.Series(True, index=df.index) if linhas is None else linhas
+
+    for col in esquema["padroes"]:
+        if col in df.columns:
+            df.loc[alvo, col] = df.loc[alvo, col].str.strip().str.upper()
+
+    for col, (_, _, decimais) in esquema["numeros"].items():
+        if col not in df.columns:
+            continue
+        s = df.loc[alvo, col].str.strip().str.replace(",", ".", regex=False)
+        n = pd.to_numeric(s, errors="coerce")
+        ok = n.notna()
+        if decimais == 0:
+            ok &= n == n.round()
+            s[ok] = n[ok].astype("int64").astype(str)
+        else:
+            s[ok] = n[ok].map(lambda x: f"{x:.{decimais}f}")
+        df.loc[alvo, col] = s
+
+    for col in esquema["datas"]:
+        if col not in df.columns:
+            continue
+        s = df.loc[alvo, col].str.strip()
+        d = _datas(s)
+        s[d.notna()] = d[d.notna()].dt.strftime("%Y-%m-%d")
+        df.loc[alvo, col] = s
+
+    if colunas:
+        extras = [c for c in df.columns if c not in esquema["colunas"] and (df[c] != "").any()]
+        df = df.reindex(columns=esquema["colunas"] + extras, fill_value="")
+    return df
+
+
+# -----------------------------
+# Validação (vetorizada por coluna)
+# -----------------------------
+def validar(nome, df, linhas=None, colunas_aceitas=()):
+    """
+    Confere `df` (já normalizado) contra o esquema e retorna um DataFrame com
+    uma linha por problema: chave da linha, coluna e descrição. `linhas`
+    (máscara booleana) restringe as linhas conferidas; colunas fora do esquema
+    só são aceitas se estiverem em `colunas_aceitas`.
+    """
+    esquema = ESQUEMAS[nome]
+    df = _como_texto(df)
+    if linhas is not None:
+        df = df[linhas]
+    chave = esquema["colunas"][0]
+    ids = df[chave] if chave in df.columns else pd.Series("", index=df.index)
+    problemas = []
+
+    def anotar(mascara, coluna, problema):
+        if mascara.any():
+            problemas.append(pd.DataFrame({"linha": ids[mascara], "coluna": coluna, "problema": problema}))
+
+    def anotar_coluna(coluna, problema):
+        problemas.append(pd.DataFrame({"linha": [""], "coluna": [coluna], "problema": [problema]}))
+
+    for col in df.columns:
+        if col not in esquema["colunas"] and col not in colunas_aceitas:
+            anotar_coluna(col, "coluna fora do esquema")
+
+    for col in esquema["obrigatorias"]:
+        if col not in df.columns:
+            anotar_coluna(col, "coluna obrigatória ausente")
+        else:
+            anotar(df[col].str.strip() == "", col, "campo obrigatório vazio")
+
+    if chave in df.columns:
+        anotar((df[chave] != "") & df[chave].duplicated(keep=False), chave, "chave repetida")
+
+    for col, padrao in esquema["padroes"].items():
+        if col in df.columns:
+            anotar((df[col] != "") & ~df[col].str.fullmatch(padrao), col, f"fora do padrão {padrao}")
+
+    for col, opcoes in esquema["opcoes"].items():
+        if col in df.columns:
+            anotar((df[col] != "") & ~df[col].isin(opcoes), col, "valor fora das opções: " + ", ".join(opcoes))
+
+    for col, (minimo, maximo, _) in esquema["numeros"].items():
+        if col not in df.columns:
+            continue
+        n = pd.to_numeric(df[col], errors="coerce")
+        anotar((df[col] != "") & n.isna(), col, "não é um número")
+        anotar(n.notna() & ((n < minimo) | (n > maximo)), col, f"fora da faixa {minimo}–{maximo}")
+
+    datas = {}
+    for col in esquema["datas"]:
+        if col in df.columns:
+            datas[col] = pd.to_datetime(df[col], format="%Y-%m-%d", errors="coerce")
+            anotar((df[col] != "") & datas[col].isna(), col, "data inválida (use AAAA-MM-DD)")
+
+    for inicio, fim in esquema["ordem"]:
+        if inicio in datas and fim in datas:
+            anotar(datas[inicio] > datas[fim], fim, f"{fim} anterior a {inicio}")
+
+    if not problemas:
+        return pd.DataFrame(columns=["linha", "coluna", "problema"])
+    return pd.concat(problemas, ignore_index=True)
+
+
+def conferir(nome, df, linhas=None, colunas_aceitas=()):
+    """Normaliza e valida `df`; levanta DadosInvalidos se houver problemas."""
+    df = normalizar(nome, df, linhas)
+    problemas = validar(nome, df, linhas, colunas_aceitas)
+    if not problemas.empty:
+        raise DadosInvalidos(problemas)
+    return df
@@ -0,0 +1,29 @@
+#!/usr/bin/env bash
+# Sobe N workers do Streamlit, a API e o nginx na porta 8501.
+# Todos os processos usam os mesmos arquivos de data/: as gravações passam
+# pela trava de arquivo de armazenamento.gravar() e os caches de cada worker
+# são indexados pela versão do arquivo, então se invalidam quando outro grava.
+#
+# Uso (na raiz do projeto): deploy/iniciar_workers.sh [N]
+set -euo pipefail
+cd "$(dirname "$0")/.."
+
+N="${1:-3}"
+PORTA_BASE=8510
+CONF=/tmp/ivg_nginx.conf
+
+servidores=""
+for i in $(seq 1 "$N"); do
+    porta=$((PORTA_BASE + i))
+    # = streamlit run Home/inicio.py, aquecendo os caches já na subida (Home/aquecimento.py)
+    python Home/servidor.py --server.port "$porta" --server.headless true &
+    servidores="${servidores}server 127.0.0.1:${porta};\n        "
+done
+
+uvicorn api:app --app-dir Home --port 8502 &
+
+sed "s|# WORKERS|${servidores}|" deploy/nginx.conf > "$CONF"
+nginx -c "$CONF" -g "daemon off;" &
+
+trap 'kill $(jobs -p) 2>/dev/null' EXIT INT TERM
+wait
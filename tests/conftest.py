@@ -0,0 +1,6 @@
+import os
+import sys
+
+# os módulos ficam em Home/ e são importados pelo nome, como nas páginas
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, "Home"))
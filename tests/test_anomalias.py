@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+import anomalias
+
+
+def _confere(serie, valores):
+    assert serie.n == len(valores)
+    assert serie.media == pytest.approx(np.mean(valores))
+    assert serie.desvio == pytest.approx(np.std(valores, ddof=1))
+
+
+def test_welford_incluir_e_remover_bate_com_numpy():
+    rng = np.random.default_rng(7)
+    valores = list(rng.normal(120.0, 15.0, 200))
+    serie = anomalias.Welford()
+    for x in valores:
+        serie.incluir(x)
+    _confere(serie, valores)
+
+    # remoções fora da ordem de inclusão, intercaladas com inclusões
+    for i in rng.permutation(len(valores))[:150]:
+        serie.remover(valores[i])
+        valores[i] = None
+    valores = [x for x in valores if x is not None]
+    _confere(serie, valores)
+    for x in rng.normal(80.0, 5.0, 20):
+        serie.incluir(x)
+        valores.append(x)
+    _confere(serie, valores)
+
+
+def test_welford_remover_ate_esvaziar():
+    serie = anomalias.Welford()
+    for x in (10.0, 12.0, 17.0):
+        serie.incluir(x)
+    serie.remover(12.0)
+    _confere(serie, [10.0, 17.0])
+    serie.remover(10.0)
+    assert (serie.n, serie.media, serie.desvio) == (1, pytest.approx(17.0), 0.0)
+    serie.remover(17.0)
+    assert serie.lista() == [0, 0.0, 0.0]
+    serie.incluir(5.0)
+    assert serie.lista() == [1, 5.0, 0.0]
+
+
+def test_welford_valores_grandes_e_proximos():
+    # a forma incremental não perde a variância por cancelamento
+    valores = [1e9 + x for x in (4.0, 7.0, 13.0, 16.0)]
+    serie = anomalias.Welford()
+    for x in valores:
+        serie.incluir(x)
+    _confere(serie, valores)
+
+
+def test_z_exige_minimo_de_amostras():
+    serie = anomalias.Welford()
+    for x in range(1, anomalias.MINIMO_AMOSTRAS):
+        serie.incluir(float(x))
+    assert serie.z(100.0) is None
+    serie.incluir(float(anomalias.MINIMO_AMOSTRAS))
+    valores = np.arange(1, anomalias.MINIMO_AMOSTRAS + 1, dtype=float)
+    assert serie.z(100.0) == pytest.approx((100.0 - valores.mean()) / valores.std(ddof=1))
+
+
+def _linha(id_, km, codigo="B01", posicao="P1", saida="2025-01-10"):
+    return {"ID": id_, "Codigo": codigo, "Posição": posicao, "Entrada": "2025-01-01", "Saída": saida,
+            "Km/DIA": str(km), "Dias de uso": "10"}
+
+
+def test_detector_remover_desfaz_incluir():
+    detector = anomalias.Detector()
+    kms = [100.0, 104.0, 98.0, 101.0, 97.0, 103.0]
+    for i, km in enumerate(kms):
+        assert detector.incluir(_linha(str(i), km)) == []
+    antes = detector.estado(None)["estatisticas"]
+
+    alertas = detector.incluir(_linha("fora", 300.0))
+    assert {(a["métrica"], a["grupo"]) for a in alertas} == {("Km/DIA", "Codigo B01"), ("Km/DIA", "Posição P1")}
+    detector.remover(_linha("fora", 300.0))
+    assert detector.alertas == []
+    depois = detector.estado(None)["estatisticas"]
+    assert depois.keys() == antes.keys()
+    for chave in antes:
+        assert depois[chave] == pytest.approx(antes[chave])
+    _confere(detector.estatisticas["Codigo|B01|Km/DIA"], kms)
+
+
+def test_detector_ignora_movimentacao_aberta():
+    detector = anomalias.Detector()
+    detector.incluir(_linha("a", 100.0, saida=""))
+    detector.incluir(_linha("b", 100.0, posicao="Nenhum"))
+    assert "Codigo|B01|Km/DIA" in detector.estatisticas
+    assert detector.estatisticas["Codigo|B01|Km/DIA"].n == 1
+    assert "Posição|Nenhum|Km/DIA" not in detector.estatisticas
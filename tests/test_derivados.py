@@ -0,0 +1,21 @@
+import derivados
+import instrumentacao
+
+
+def test_falha_sem_valor_anterior_nao_derruba_a_pagina():
+    chamadas = []
+
+    def calcular(x):
+        chamadas.append(x)
+        if len(chamadas) == 1:
+            raise ValueError("falha")
+        return x * 2
+
+    antes = len(instrumentacao.falhas())
+    assert derivados.obter("teste_falha", 1, calcular, 5) == (None, False)
+    assert len(instrumentacao.falhas()) == antes + 1
+    # dentro da espera, a mesma versão não é recalculada a cada execução
+    assert derivados.obter("teste_falha", 1, calcular, 5) == (None, False)
+    assert len(chamadas) == 1
+    # dados novos: nova tentativa
+    assert derivados.obter("teste_falha", 2, calcular, 5) == (10, True)
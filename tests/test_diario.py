@@ -0,0 +1,150 @@
+import os
+import shutil
+import time
+
+import pandas as pd
+import pytest
+
+import armazenamento
+import diario
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NOME = "teste"
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1_000_000.0
+
+    def __call__(self):
+        return self.agora
+
+
+@pytest.fixture
+def relogio(tmp_path, monkeypatch):
+    """Diário vazio em tmp_path, checkpoint a cada 3 entradas e relógio controlado pelo teste."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(diario, "INTERVALO_CHECKPOINT", 3)
+    r = Relogio()
+    monkeypatch.setattr(time, "time", r)
+    return r
+
+
+def _df(*linhas):
+    return pd.DataFrame(linhas, columns=["ID", "Codigo", "Observação"])
+
+
+def _gravar(anterior, novo, versao, desfaz=None):
+    diario.registrar_diferencas(NOME, anterior, novo, "ID", "teste", desfaz=desfaz)
+    diario.marcar_versao(NOME, (versao,), (versao + 1,))
+    return novo
+
+
+def _historico(relogio):
+    """Cinco gravações, um segundo entre elas; retorna os estados depois de cada uma."""
+    estados = [_df(("a", "SR01", ""))]
+    for novo in (_df(("a", "SR01", ""), ("b", "SR02", "")),
+                 _df(("a", "SR01", "x"), ("b", "SR02", ""), ("c", "SR03", "")),
+                 _df(("a", "SR01", "x"), ("c", "SR03", "")),
+                 _df(("a", "SR01", "y"), ("c", "SR03", ""), ("d", "SR04", "")),
+                 _df(("a", "SR01", "y"), ("c", "SR05", ""), ("d", "SR04", ""))):
+        relogio.agora += 1
+        estados.append(_gravar(estados[-1], novo, len(estados) - 1))
+    return estados
+
+
+def _iguais(a, b):
+    ordem = lambda df: df.sort_values("ID").reset_index(drop=True)[["ID", "Codigo", "Observação"]]
+    pd.testing.assert_frame_equal(ordem(a), ordem(b))
+
+
+def test_estado_em_atravessa_checkpoint(relogio):
+    estados = _historico(relogio)
+    meta = diario._ler_meta(NOME)
+    # 7 entradas, checkpoint a cada 3: o estado inicial e mais dois no meio
+    assert meta["proximo_seq"] == 7
+    assert len(meta["checkpoints"]) == 3
+
+    # o diário começa na primeira gravação, um segundo depois do início do relógio
+    inicio = 1_000_000.0
+    assert diario.estado_em(NOME, inicio + 0.5, "ID") is None
+    for i, estado in enumerate(estados[1:], start=1):
+        _iguais(diario.estado_em(NOME, inicio + i, "ID"), estado)
+        # entre duas gravações vale a anterior
+        _iguais(diario.estado_em(NOME, inicio + i + 0.5, "ID"), estado)
+
+
+def test_entradas_entre_versoes(relogio):
+    estados = _historico(relogio)
+    entradas = diario.entradas_entre(NOME, (1,), (4,))
+    assert [(e["op"], e["id"]) for e in entradas] == [
+        (diario.INSERCAO, "c"), (diario.EDICAO, "a"), (diario.EXCLUSAO, "b"),
+        (diario.INSERCAO, "d"), (diario.EDICAO, "a")]
+    # reaplicadas sobre a versão inicial, chegam à final
+    df = estados[1]
+    for e in entradas:
+        df = diario.aplicar(df, e, "ID")
+    _iguais(df, estados[4])
+
+    assert diario.entradas_entre(NOME, (2,), (2,)) == []
+    assert diario.entradas_entre(NOME, (4,), (1,)) is None
+    assert diario.entradas_entre(NOME, (1,), (99,)) is None
+
+
+def test_entradas_entre_com_gravacao_fora_do_diario(relogio):
+    estados = _historico(relogio)
+    # gravação que não passou pelo diário: a versão 5 não é a 5 que o diário conhece
+    diario.registrar_diferencas(NOME, estados[-1], estados[-1], "ID")
+    diario.marcar_versao(NOME, ("fora",), (7,))
+    assert diario.entradas_entre(NOME, (3,), (5,)) is not None
+    assert diario.entradas_entre(NOME, (3,), (7,)) is None
+
+
+def test_desfazer_cada_operacao(relogio):
+    estados = _historico(relogio)
+    atual = estados[-1]
+
+    # inclusão de "d" (seq 4), edição de "a" (seq 5) e exclusão de "b" (seq 3)
+    sem_d = diario.aplicar_inverso(NOME, atual, 4, "ID")
+    assert sorted(sem_d["ID"]) == ["a", "c"]
+    a = diario.aplicar_inverso(NOME, atual, 5, "ID")
+    assert a.loc[a["ID"] == "a", "Observação"].tolist() == ["x"]
+    com_b = diario.aplicar_inverso(NOME, atual, 3, "ID")
+    assert com_b.loc[com_b["ID"] == "b", "Codigo"].tolist() == ["SR02"]
+
+    # uma alteração desfeita não é desfeita de novo
+    relogio.agora += 1
+    _gravar(atual, sem_d, 5, desfaz=4)
+    assert diario.aplicar_inverso(NOME, sem_d, 4, "ID") is None
+    assert [(e["seq"], e["desfeita"]) for e in diario.recentes(NOME, 4)] == [
+        (7, False), (6, False), (5, False), (4, True)]
+
+
+def test_desfazer_edicao_sobrescrita_depois(relogio):
+    estados = _historico(relogio)
+    # "a" passou de "" para "x" (seq 2) e depois para "y": desfazer o "x" apagaria o "y"
+    assert diario.aplicar_inverso(NOME, estados[-1], 2, "ID") is None
+    # a troca de código de "c" (seq 6) é a última e volta
+    df = diario.aplicar_inverso(NOME, estados[-1], 6, "ID")
+    assert df.loc[df["ID"] == "c", "Codigo"].tolist() == ["SR03"]
+    assert diario.aplicar_inverso(NOME, estados[-1], 99, "ID") is None
+
+
+def test_desfazer_no_registro(tmp_path, monkeypatch):
+    shutil.copytree(os.path.join(RAIZ, "data"), tmp_path / "data",
+                    ignore=shutil.ignore_patterns("diario", "resumo", "arquivo", "anomalias", "*.lock"))
+    monkeypatch.chdir(tmp_path)
+    nome = "pote"
+    original = armazenamento.ler_texto(nome)
+
+    df = armazenamento.ler(nome, dtype=str, keep_default_na=False)
+    id_ = df.loc[0, "ID"]
+    df.loc[0, "Observação"] = "editado"
+    armazenamento.gravar(nome, df, "teste")
+    seq = diario.recentes(nome, 1)[0]["seq"]
+
+    assert armazenamento.desfazer(nome, seq, "teste")
+    pd.testing.assert_frame_equal(armazenamento.ler_texto(nome), original)
+    assert not armazenamento.desfazer(nome, seq, "teste")
+    assert diario.recentes(nome, 2)[-1]["desfeita"]
+    assert diario.recentes(nome, 1)[0]["id"] == id_
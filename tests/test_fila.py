@@ -0,0 +1,136 @@
+import errno
+import importlib
+import os
+import shutil
+import uuid
+
+import pytest
+
+import armazenamento
+import diario
+import fila
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NOME = "pote"
+
+
+@pytest.fixture
+def queda(tmp_path, monkeypatch):
+    """data/ copiado para tmp_path, fila em tmp_path/fila e queda simulada ativa; retorna o arquivo da queda."""
+    os.makedirs(tmp_path / "data")
+    shutil.copy(os.path.join(RAIZ, "data", armazenamento.REGISTROS[NOME]["arquivo"]), tmp_path / "data")
+    monkeypatch.chdir(tmp_path)
+    marca = tmp_path / "queda"
+    marca.touch()
+    monkeypatch.setenv("IVG_SIMULAR_QUEDA", str(marca))
+    monkeypatch.setenv("IVG_FILA_DIR", str(tmp_path / "fila"))
+    importlib.reload(fila)
+    monkeypatch.setattr(fila, "_iniciado", True)  # sem a thread de reenvio: o teste envia quando quer
+    yield marca
+    monkeypatch.delenv("IVG_FILA_DIR")
+    importlib.reload(fila)
+
+
+def _enfileirar_gravar_e_incluir():
+    df = armazenamento.ler(NOME, dtype=str, keep_default_na=False)
+    editado = df.copy()
+    editado.attrs = df.attrs
+    id_editado = editado.loc[0, "ID"]
+    editado.loc[0, "Observação"] = "editado offline"
+    assert fila.gravar(NOME, editado, "teste") is False
+    novo = {"ID": str(uuid.uuid4()), "Codigo": "SR99", "Localização": "Oficina OCP", "Campanha": "Nenhum",
+            "Fornecedor": "", "Diametro": "", "Motivo da troca": "", "Serviço a realizar": "",
+            "Entrada": "2025-09-01", "Saída": "", "Observação": ""}
+    assert fila.incluir(NOME, novo, "teste") is False
+    assert len(fila.pendentes()) == 2
+    return id_editado, novo["ID"]
+
+
+def _linha(id_):
+    df = armazenamento.ler_texto(NOME)
+    return df[df["ID"] == id_]
+
+
+def test_leitura_sem_trava_durante_a_queda(queda):
+    assert not armazenamento.disponivel()
+    assert len(armazenamento.ler_com_arquivo(NOME)) == len(armazenamento.ler_texto(NOME))
+    assert armazenamento.ler_resumo(NOME)["linhas"] == len(armazenamento.ler_texto(NOME))
+
+
+def test_reenvio_apos_a_queda_e_idempotente(queda):
+    id_editado, id_novo = _enfileirar_gravar_e_incluir()
+    queda.unlink()
+
+    assert fila.enviar(forcar=True) == (2, 0, 0)
+    assert _linha(id_editado)["Observação"].tolist() == ["editado offline"]
+    assert len(_linha(id_novo)) == 1
+
+    # segundo envio não tem o que fazer: nem o arquivo nem o diário mudam
+    versao, entradas = armazenamento.versao(NOME), diario.tamanho(NOME)
+    assert fila.enviar(forcar=True) == (0, 0, 0)
+    assert armazenamento.versao(NOME) == versao
+    assert diario.tamanho(NOME) == entradas
+
+
+def test_lote_reenviado_nao_duplica(queda):
+    _, id_novo = _enfileirar_gravar_e_incluir()
+    lotes = fila.pendentes()
+    queda.unlink()
+    assert fila.enviar(forcar=True) == (2, 0, 0)
+
+    # queda entre aplicar e apagar o lote: o mesmo lote volta à fila
+    for lote in lotes:
+        fila._salvar(lote)
+    entradas = diario.tamanho(NOME)
+    assert fila.enviar(forcar=True) == (2, 0, 0)
+    assert len(_linha(id_novo)) == 1
+    assert diario.tamanho(NOME) == entradas
+    assert fila.conflitos() == []
+
+
+def test_edicao_concorrente_vai_para_conflitos(queda):
+    id_editado, id_novo = _enfileirar_gravar_e_incluir()
+    queda.unlink()
+
+    # outra pessoa (outro worker, a API) altera a mesma linha antes do reenvio
+    df = armazenamento.ler(NOME, dtype=str, keep_default_na=False)
+    df.loc[df["ID"] == id_editado, "Observação"] = "editado no servidor"
+    armazenamento.gravar(NOME, df, "outro")
+
+    assert fila.enviar(forcar=True) == (1, 1, 0)
+    assert _linha(id_editado)["Observação"].tolist() == ["editado no servidor"]
+    assert len(_linha(id_novo)) == 1
+    conflitos = fila.conflitos()
+    assert len(conflitos) == 1
+    assert [c["id"] for c in conflitos[0]["conflitos"]] == [id_editado]
+    assert fila.pendentes() == []
+
+
+@pytest.mark.parametrize("erro", [errno.ENOSPC, errno.EACCES, errno.EROFS])
+def test_erro_que_nao_e_queda_chega_a_pagina(queda, monkeypatch, erro):
+    queda.unlink()
+
+    def falhar(*args, **kwargs):
+        raise OSError(erro, os.strerror(erro))
+
+    monkeypatch.setattr(armazenamento, "gravar", falhar)
+    monkeypatch.setattr(armazenamento, "incluir", falhar)
+    df = armazenamento.ler(NOME, dtype=str, keep_default_na=False)
+    with pytest.raises(OSError):
+        fila.gravar(NOME, df, "teste")
+    with pytest.raises(OSError):
+        fila.incluir(NOME, df.iloc[0].to_dict(), "teste")
+    assert fila.pendentes() == []
+
+
+def test_compartilhamento_fora_do_ar_vai_para_a_fila(queda, monkeypatch):
+    queda.unlink()
+
+    def falhar(*args, **kwargs):
+        raise OSError(errno.ESTALE, os.strerror(errno.ESTALE))
+
+    monkeypatch.setattr(armazenamento, "gravar", falhar)
+    df = armazenamento.ler(NOME, dtype=str, keep_default_na=False)
+    df.loc[0, "Observação"] = "editado"
+    assert fila.gravar(NOME, df, "teste") is False
+    assert len(fila.pendentes()) == 1
@@ -0,0 +1,43 @@
+import ast
+import os
+
+import pytest
+
+import validacao
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# página -> registro gravado pelos formulários dela
+PAGINAS = {
+    "SINK_ROLL.py": "pote",
+    os.path.join("Home", "pages", "DESENGRAXE.py"): "desengraxe",
+    os.path.join("Home", "pages", "TENSION_LEVELLER.py"): "tl",
+    os.path.join("Home", "pages", "PEÇAS_DO_POTE.py"): "banho",
+}
+# rótulo do selectbox -> coluna gravada com a opção escolhida
+ROTULOS = {
+    "Localização?": "Localização", "Nova localização": "Localização",
+    "Campanha?": "Campanha", "Nova campanha": "Campanha", "Campanha": "Campanha",
+    "Posição?": "Posição",
+}
+
+
+def _selectboxes(arquivo):
+    with open(os.path.join(RAIZ, arquivo), encoding="utf-8") as f:
+        arvore = ast.parse(f.read())
+    for no in ast.walk(arvore):
+        if (isinstance(no, ast.Call) and isinstance(no.func, ast.Attribute) and no.func.attr == "selectbox"
+                and len(no.args) >= 2 and isinstance(no.args[0], ast.Constant) and no.args[0].value in ROTULOS):
+            yield no.args[0].value, ast.literal_eval(no.args[1])
+
+
+@pytest.mark.parametrize("arquivo, nome", PAGINAS.items())
+def test_opcoes_dos_formularios_sao_aceitas_pelo_esquema(arquivo, nome):
+    opcoes = validacao.ESQUEMAS[nome]["opcoes"]
+    selectboxes = list(_selectboxes(arquivo))
+    assert selectboxes, f"nenhum selectbox conferido em {arquivo}"
+    for rotulo, valores in selectboxes:
+        if ROTULOS[rotulo] not in opcoes:  # coluna sem opções fixas no esquema: aceita qualquer valor
+            continue
+        recusadas = set(valores) - set(opcoes[ROTULOS[rotulo]])
+        assert not recusadas, f"{arquivo}, '{rotulo}': {sorted(recusadas)} não passam em validacao.conferir"
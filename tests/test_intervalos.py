@@ -0,0 +1,84 @@
+import pandas as pd
+
+import intervalos
+
+
+def _pote(*linhas):
+    return pd.DataFrame(linhas, columns=["ID", "Codigo", "Entrada", "Saída"])
+
+
+def _tuplas(ocorrencias):
+    return [(o.tipo, o.grupo, o.ID, o.outro_ID, o.inicio, o.fim, o.dias)
+            for o in ocorrencias.itertuples(index=False)]
+
+
+def test_sobreposicao_e_lacuna():
+    df = _pote(("a", "SR01", "2025-01-01", "2025-01-10"),
+               ("b", "SR01", "2025-01-05", "2025-01-20"),
+               ("c", "SR01", "2025-01-25", "2025-01-30"))
+    assert _tuplas(intervalos.varrer("pote", df)) == [
+        (intervalos.SOBREPOSICAO, "SR01", "b", "a", pd.Timestamp("2025-01-05"), pd.Timestamp("2025-01-10"), 5),
+        (intervalos.LACUNA, "SR01", "b", "c", pd.Timestamp("2025-01-20"), pd.Timestamp("2025-01-25"), 4),
+    ]
+
+
+def test_periodo_contido_sobrepoe_o_mais_longo():
+    # "c" começa depois do fim de "b" mas dentro de "a", que segue dono do maior fim
+    df = _pote(("a", "SR01", "2025-01-01", "2025-01-31"),
+               ("b", "SR01", "2025-01-05", "2025-01-10"),
+               ("c", "SR01", "2025-01-15", "2025-01-20"))
+    ocorrencias = intervalos.varrer("pote", df)
+    assert ocorrencias["tipo"].tolist() == [intervalos.SOBREPOSICAO] * 2
+    assert ocorrencias["outro_ID"].tolist() == ["a", "a"]
+    assert ocorrencias["dias"].tolist() == [5, 5]
+
+
+def test_entrar_no_dia_da_saida_nao_e_sobreposicao():
+    df = _pote(("a", "SR01", "2025-01-01", "2025-01-10"),
+               ("b", "SR01", "2025-01-10", "2025-01-20"),
+               ("c", "SR01", "2025-01-21", "2025-01-25"))
+    # nem sobreposição nem lacuna: de 20 para 21 não sobra dia inteiro sem registro
+    assert intervalos.varrer("pote", df).empty
+    assert intervalos.varrer("pote", df, lacuna_minima=0)["tipo"].tolist() == [intervalos.LACUNA]
+
+
+def test_grupos_sao_independentes_e_fora_de_ordem():
+    df = _pote(("b", "SR01", "2025-01-05", "2025-01-20"),
+               ("x", "SR02", "2025-01-01", "2025-01-30"),
+               ("a", "SR01", "2025-01-01", "2025-01-10"))
+    ocorrencias = intervalos.varrer("pote", df)
+    assert ocorrencias[["grupo", "ID", "outro_ID"]].values.tolist() == [["SR01", "b", "a"]]
+
+
+def test_sem_saida_termina_na_entrada_seguinte():
+    df = _pote(("a", "SR01", "2025-01-01", ""),
+               ("b", "SR01", "2025-01-10", ""),
+               ("c", "SR01", "2025-01-20", "2025-01-25"))
+    # "a" fecha em 10 e "b" em 20: a troca de local não é sobreposição
+    assert intervalos.varrer("pote", df).empty
+
+
+def test_ultimo_sem_saida_fica_em_aberto():
+    df = _pote(("a", "SR01", "2025-01-01", "2025-01-31"),
+               ("b", "SR01", "2025-01-05", ""))
+    # em aberto, "b" sobrepõe "a" até a saída dela
+    assert _tuplas(intervalos.varrer("pote", df)) == [
+        (intervalos.SOBREPOSICAO, "SR01", "b", "a", pd.Timestamp("2025-01-05"), pd.Timestamp("2025-01-31"), 26),
+    ]
+
+    df = _pote(("a", "SR01", "2025-01-01", ""),
+               ("b", "SR01", "2025-01-20", ""),
+               ("c", "SR02", "2025-01-02", ""))
+    # "a" fecha na entrada de "b", sem lacuna; "b" e "c" seguem em aberto em grupos diferentes
+    assert intervalos.varrer("pote", df).empty
+
+
+def test_banho_e_um_grupo_so():
+    df = pd.DataFrame({"ID": ["a", "b"], "Campanha": ["GI", "GA"],
+                       "Data_Inicio": ["2025-01-01", "2025-01-05"], "Data_Fim": ["", "2025-01-08"]})
+    # a campanha sem fim fecha no início da seguinte
+    assert intervalos.varrer("banho", df).empty
+
+    df["Data_Fim"] = ["2025-01-06", "2025-01-08"]
+    assert intervalos.varrer("banho", df)[["grupo", "ID", "outro_ID", "dias"]].values.tolist() == [
+        ["banho", "b", "a", 1]]
@@ -0,0 +1,60 @@
+from datetime import date
+
+import pandas as pd
+
+import linha_tempo
+
+
+def _indice():
+    df = pd.DataFrame([
+        {"Codigo": "SR02", "Localização": "Estoque", "Entrada": "2025-01-03", "Saída": ""},
+        {"Codigo": "SR01", "Localização": "Linha", "Entrada": "2025-01-10", "Saída": "2025-01-20"},
+        {"Codigo": "SR01", "Localização": "Oficina OCP", "Entrada": "2025-01-01", "Saída": "2025-01-05"},
+        {"Codigo": "SR01", "Localização": "Estoque", "Entrada": "2025-01-20", "Saída": ""},
+        {"Codigo": "SR01", "Localização": "Usinagem", "Entrada": "2025-01-20", "Saída": ""},
+        {"Codigo": "", "Localização": "Linha", "Entrada": "2025-01-01", "Saída": ""},
+        {"Codigo": "SR03", "Localização": "Linha", "Entrada": "sem data", "Saída": ""},
+    ])
+    return linha_tempo.IndiceTemporal(df)
+
+
+def _local(indice, codigo, data):
+    i = indice.posicao(codigo, data)
+    return None if i is None else indice.linhas.loc[i, "Localização"]
+
+
+def test_posicao_nas_datas_exatas():
+    indice = _indice()
+    assert _local(indice, "SR01", "2025-01-01") == "Oficina OCP"
+    # a saída ainda é do registro: no dia 5 o rolo estava na oficina
+    assert _local(indice, "SR01", "2025-01-05") == "Oficina OCP"
+    assert _local(indice, "SR01", "2025-01-10") == "Linha"
+    # empate de entrada: vale o último lançado
+    assert _local(indice, "SR01", "2025-01-20") == "Usinagem"
+
+
+def test_posicao_entre_datas():
+    indice = _indice()
+    assert _local(indice, "SR01", "2024-12-31") is None
+    assert _local(indice, "SR01", pd.Timestamp("2025-01-03 12:00")) == "Oficina OCP"
+    # entre a saída da oficina e a entrada seguinte não há registro vigente
+    assert _local(indice, "SR01", "2025-01-07") is None
+    assert _local(indice, "SR01", date(2025, 1, 15)) == "Linha"
+    # sem saída: vigente daí em diante
+    assert _local(indice, "SR01", "2026-06-01") == "Usinagem"
+    assert _local(indice, "SR99", "2025-01-15") is None
+
+
+def test_em_devolve_um_registro_por_codigo():
+    indice = _indice()
+    assert indice.em("2025-01-02")[["Codigo", "Localização"]].values.tolist() == [["SR01", "Oficina OCP"]]
+    assert indice.em("2025-01-07")[["Codigo", "Localização"]].values.tolist() == [["SR02", "Estoque"]]
+    assert indice.em("2025-01-15")[["Codigo", "Localização"]].values.tolist() == [
+        ["SR01", "Linha"], ["SR02", "Estoque"]]
+
+
+def test_linhas_sem_codigo_ou_data_ficam_de_fora():
+    indice = _indice()
+    assert sorted(indice.faixas) == ["SR01", "SR02"]
+    assert indice.periodo() == (date(2025, 1, 1), date(2025, 1, 20))
+    assert linha_tempo.IndiceTemporal(pd.DataFrame(columns=["Codigo", "Entrada", "Saída"])).periodo() == (None, None)
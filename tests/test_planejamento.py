@@ -0,0 +1,123 @@
+from datetime import date
+
+import pandas as pd
+
+import identidade
+import planejamento
+
+HOJE = date(2025, 9, 10)
+
+
+def _indice():
+    pote = pd.DataFrame([
+        {"Codigo": "SR01", "Localização": "Oficina OCP", "Entrada": "2025-08-01", "Saída": "2025-08-05", "Diametro": "600"},
+        {"Codigo": "SR01", "Localização": "Linha", "Entrada": "2025-08-05", "Saída": "", "Diametro": ""},
+        {"Codigo": "SR02", "Localização": "Usinagem", "Entrada": "2025-09-05", "Saída": "", "Diametro": "590"},
+        {"Codigo": "SR03", "Localização": "Estoque", "Entrada": "2025-07-01", "Saída": "", "Diametro": ""},
+    ])
+    banho = pd.DataFrame([
+        {"Campanha": "GI", "Data_Inicio": "2025-08-06", "Data_Fim": "2025-08-26",
+         "Rolo_Titular": "1", "Conjunto_Titular": "", "Diametro_Titular": "599,5",
+         "Rolo_Reserva": "3", "Conjunto_Reserva": "", "Diametro_Reserva": "610"},
+        {"Campanha": "GA", "Data_Inicio": "2025-09-08", "Data_Fim": "2025-09-15",
+         "Rolo_Titular": "3", "Conjunto_Titular": "", "Diametro_Titular": "610",
+         "Rolo_Reserva": "1", "Conjunto_Reserva": "", "Diametro_Reserva": "599,5"},
+    ])
+    return identidade.IndiceRolos(pote, banho, hoje=HOJE)
+
+
+def test_situacao_por_rolo():
+    medicoes = pd.DataFrame({"rolo_id": ["sr01"], "diametro_atual": [598.0]})
+    rolos = planejamento.situacao(_indice(), medicoes, hoje=HOJE).set_index("Rolo")
+
+    assert rolos.index.tolist() == ["SR01", "SR02", "SR03"]
+    assert rolos["Localização"].tolist() == ["Linha", "Usinagem", "Estoque"]
+    # medição > banho > pote
+    assert rolos["Diametro"].tolist() == [598.0, 590.0, 610.0]
+    assert rolos.loc["SR01", "Ultimo_servico"] == date(2025, 8, 5)
+    assert rolos.loc["SR02", "Ultimo_servico"] == date(2025, 9, 5)
+    # só as campanhas como titular contam dias de banho
+    assert rolos["Dias_de_banho"].tolist() == [20, 0, 7]
+    assert rolos["Tipos"].tolist() == ["GA GI", "", "GA GI"]
+    # reserva da campanha em curso, oficina pelo prazo do local, titular em curso mais o serviço
+    assert rolos["Livre_em"].tolist() == [date(2025, 9, 15), date(2025, 9, 20), date(2025, 9, 22)]
+
+
+def test_proximas_segue_o_historico():
+    banho = pd.DataFrame({
+        "Campanha": ["GI", "GA", "GI", "GA"],
+        "Data_Inicio": ["2025-06-01", "2025-06-11", "2025-06-16", "2025-06-28"],
+        "Data_Fim": ["2025-06-11", "2025-06-16", "2025-06-28", "2025-07-03"],
+    })
+    sugestao = planejamento.proximas(banho, 3, hoje=date(2025, 7, 1))
+
+    assert sugestao["Campanha"].tolist() == ["GI", "GA", "GI"]
+    # encadeadas a partir do fim da última, com a mediana de cada tipo (GI 11 dias, GA 5)
+    assert sugestao["Data_Inicio"].tolist() == [date(2025, 7, 3), date(2025, 7, 14), date(2025, 7, 19)]
+    assert sugestao["Data_Fim"].tolist() == [date(2025, 7, 14), date(2025, 7, 19), date(2025, 7, 30)]
+
+
+def test_proximas_sem_sucessor_usa_o_rodizio():
+    banho = pd.DataFrame({"Campanha": ["GI", "GA"], "Data_Inicio": ["2025-06-01", "2025-06-11"],
+                          "Data_Fim": ["2025-06-11", "2025-06-16"]})
+    sugestao = planejamento.proximas(banho, 2, hoje=date(2025, 7, 1))
+
+    assert sugestao["Campanha"].tolist() == ["GI", "GA"]
+    assert sugestao["Data_Inicio"].iloc[0] == date(2025, 7, 1)
+
+
+def _rolos(*linhas):
+    return pd.DataFrame([dict(zip(["Rolo", "Diametro", "Dias_de_banho", "Tipos", "Livre_em"], linha))
+                         for linha in linhas])
+
+
+def _campanhas(*linhas):
+    return pd.DataFrame(linhas, columns=["Campanha", "Data_Inicio", "Data_Fim"])
+
+
+def test_planejar_respeita_disponibilidade_e_diametro():
+    rolos = _rolos(("SR01", 600.0, 0, "GI", date(2025, 9, 1)),
+                   ("SR02", 620.0, 0, "GI", date(2025, 9, 20)),   # na oficina até a segunda campanha
+                   ("SR03", 580.0, 0, "GI", date(2025, 9, 1)),    # abaixo do mínimo
+                   ("SR04", 605.0, 0, "GA", date(2025, 9, 1)))
+    plano, ocupacao = planejamento.planejar(
+        _campanhas(("GI", "2025-09-10", "2025-09-17"), ("GI", "2025-09-20", "2025-09-27")), rolos, 590)
+
+    assert plano["Rolo_Titular"].tolist() == ["SR01", "SR02"]
+    # a reserva prefere o maior diâmetro entre os livres; SR01 está em serviço na segunda
+    assert plano["Rolo_Reserva"].tolist() == ["SR04", "SR04"]
+    assert "SR03" not in set(ocupacao["Rolo"])
+    assert plano["Observação"].tolist() == ["", ""]
+    servico = ocupacao[(ocupacao["Rolo"] == "SR01") & (ocupacao["Situação"] == "Serviço")]
+    assert servico["Fim"].tolist() == [pd.Timestamp("2025-09-24")]
+
+
+def test_planejar_desgaste_tira_o_rolo_do_minimo():
+    rolos = _rolos(("SR01", 590.5, 0, "GI", date(2025, 9, 1)))
+    plano, _ = planejamento.planejar(
+        _campanhas(("GI", "2025-09-01", "2025-09-05"), ("GI", "2025-10-01", "2025-10-05")), rolos, 590)
+
+    assert plano["Rolo_Titular"].tolist() == ["SR01", ""]
+    assert plano["Observação"].iloc[1] == "⚠️ Sem titular e reserva: 1 abaixo do diâmetro mínimo"
+
+
+def test_planejar_reserva_fora_do_limite_de_dias_de_banho():
+    rolos = _rolos(("SR01", 600.0, 44, "GI", date(2025, 9, 1)),
+                   ("SR02", 600.0, 0, "GI", date(2025, 9, 1)))
+    plano, _ = planejamento.planejar(_campanhas(("GI", "2025-09-10", "2025-09-17")), rolos, 590)
+
+    assert plano.loc[0, ["Rolo_Titular", "Rolo_Reserva", "Observação"]].tolist() == ["SR02", "SR01", ""]
+
+
+def test_planejar_avisa_o_que_falta():
+    rolos = _rolos(("SR01", 600.0, 44, "GI", date(2025, 9, 1)),
+                   ("SR02", 600.0, 0, "GI", date(2025, 10, 1)),
+                   ("SR03", float("nan"), 0, "GI", date(2025, 9, 1)))
+    plano, ocupacao = planejamento.planejar(_campanhas(("GI", "2025-09-10", "2025-09-17")), rolos, 590)
+
+    assert plano.loc[0, "Rolo_Titular"] == ""
+    assert plano.loc[0, "Rolo_Reserva"] == "SR01"
+    assert plano.loc[0, "Observação"] == (
+        "⚠️ Sem titular: 1 em oficina ou em outra campanha; 1 sem diâmetro conhecido; "
+        "1 com dias de banho acima de 45")
+    assert ocupacao["Situação"].tolist() == ["Reserva GI"]
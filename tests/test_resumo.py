@@ -0,0 +1,67 @@
+import os
+import shutil
+import uuid
+
+import pytest
+
+import armazenamento
+import resumo
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def dados(tmp_path, monkeypatch):
+    shutil.copytree(os.path.join(RAIZ, "data"), tmp_path / "data",
+                    ignore=shutil.ignore_patterns("diario", "resumo", "arquivo", "anomalias", "*.lock"))
+    monkeypatch.chdir(tmp_path)
+
+
+def _gravado(nome):
+    dados = resumo.ler(nome, armazenamento.versao(nome))
+    assert dados is not None, "a gravação não atualizou o resumo"
+    return {k: v for k, v in dados.items() if k not in ("versao", "atualizado")}
+
+
+def _completo(nome):
+    return resumo.calcular(nome, armazenamento.ler_com_arquivo(nome))
+
+
+def test_gravacoes_atualizam_so_os_rolos_alterados(dados):
+    nome = "tl"
+    armazenamento.ler_resumo(nome)
+    df = armazenamento.ler(nome, dtype=str, keep_default_na=False)
+    df.loc[0, "Posição"] = "Nenhum"
+    df.loc[1, "Km de saída"] = "1990"
+    df.loc[2, "Codigo"] = df.loc[5, "Codigo"]
+    df = df.drop(index=3)
+    armazenamento.gravar(nome, df, "teste")
+    assert _gravado(nome) == _completo(nome)
+
+    armazenamento.incluir(nome, {"ID": str(uuid.uuid4()), "Codigo": "77", "Entrada": "2031-02-01",
+                                 "Posição": "#1 SUP", "Km de saída": "1950"}, "teste")
+    gravado = _gravado(nome)
+    assert gravado == _completo(nome)
+    assert "77" in gravado["em_linha"] and ["77", 1950.0] in gravado["perto_da_meta"]
+
+
+def test_com_linhas_arquivadas(dados):
+    nome = "tl"
+    completo = _completo(nome)
+    assert armazenamento.arquivar_antigos(nome, 120) > 0
+    # arquivar não tem alterações: o resumo é refeito na leitura, igual ao de antes
+    assert resumo.ler(nome, armazenamento.versao(nome)) is None
+    assert {k: v for k, v in armazenamento.ler_resumo(nome).items() if k not in ("versao", "atualizado")} == completo
+
+    df = armazenamento.ler(nome, dtype=str, keep_default_na=False)
+    armazenamento.gravar(nome, df.drop(index=0), "teste")
+    assert _gravado(nome) == _completo(nome)
+
+
+def test_sem_resumo_anterior_descarta(dados):
+    nome = "pote"
+    df = armazenamento.ler(nome, dtype=str, keep_default_na=False)
+    df.loc[0, "Observação"] = "editado"
+    armazenamento.gravar(nome, df, "teste")
+    assert resumo.ler(nome, armazenamento.versao(nome)) is None
+    assert armazenamento.ler_resumo(nome)["linhas"] == len(df)